@@ -0,0 +1,99 @@
+"""
+Latency of matching many templates against one frame with the serial, thread
+pool and process pool backends of `src.core.workers` on 1080p and 4K screens.
+
+The baseline is the original `find_multiple`: a new `multiprocessing.Pool`
+per call, the frame pickled to every task and the templates read from disk
+again in the workers.
+
+The haystacks are synthetic screens built from the templates in
+`src/images`; every backend must return the same boxes as the serial one.
+
+Usage:
+    python -m benchmarks.bench_matching_backends [--repeat N] [--needles N] [--threads N]
+"""
+
+import argparse
+import functools
+import multiprocessing
+import time
+
+import cv2
+import numpy
+
+from benchmarks.bench_pyramid import _template_paths, synthetic_screen
+from src.core import cv2find, workers
+
+RESOLUTIONS = [(1920, 1080), (3840, 2160)]
+BACKENDS = ["serial", "thread", "process"]
+BASELINE = "per-call pool"
+
+
+def _locate_from_disk(frame, path):
+    needle = cv2.imread(path, cv2.IMREAD_COLOR)
+    return cv2find.locate_opencv(needle, frame, confidence=0.9)
+
+
+def locate_per_call_pool(frame, paths):
+    processes = max(1, multiprocessing.cpu_count() - 1)
+    with multiprocessing.Pool(processes=processes) as pool:
+        return pool.map(functools.partial(_locate_from_disk, frame), paths)
+
+
+def _variants():
+    variants = {BASELINE: locate_per_call_pool}
+    for backend in BACKENDS:
+        variants[backend] = functools.partial(workers.locate, backend=backend)
+    return variants
+
+
+def run(repeat, needles, threads):
+    if threads:
+        workers.threads = workers.MatchingThreads(threads)
+    paths = _template_paths()
+    rng = numpy.random.default_rng(0)
+    selected = [paths[i] for i in rng.choice(len(paths), needles, replace=False)]
+
+    # Start the persistent pools and load the templates outside of the measurements.
+    variants = _variants()
+    warmup = synthetic_screen(640, 480, paths, rng)
+    for backend in BACKENDS:
+        workers.locate(warmup, selected, backend=backend)
+
+    header = "{:>11} | ".format("resolution") + " | ".join(
+        "{:>13}".format(name) for name in variants
+    )
+    print(
+        f"{needles} templates, {workers.threads.threads} threads, "
+        f"{workers.pool.processes} processes"
+    )
+    print(header)
+    print("-" * len(header))
+    mismatch = False
+    for width, height in RESOLUTIONS:
+        totals = {name: 0.0 for name in variants}
+        for _ in range(repeat):
+            screen = synthetic_screen(width, height, paths, rng)
+            expected = None
+            for name, locate in variants.items():
+                start = time.perf_counter()
+                boxes = locate(screen, selected)
+                totals[name] += time.perf_counter() - start
+                boxes = [None if b is None else tuple(int(v) for v in b) for b in boxes]
+                if expected is None:
+                    expected = boxes
+                elif boxes != expected:
+                    mismatch = True
+        cells = ["{:>10.1f} ms".format(1000 * totals[name] / repeat) for name in variants]
+        print("{:>11} | ".format(f"{width}x{height}") + " | ".join(cells))
+    if mismatch:
+        print("\nvariants returned different boxes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--needles", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+    run(args.repeat, args.needles, args.threads)
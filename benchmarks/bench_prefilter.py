@@ -0,0 +1,120 @@
+"""
+Latency and recall of `cv2find.locate_all_opencv` with and without the
+discriminative-pixel prefilter.
+
+The frames are the screenshots of a directory, e.g. recorded Receitanet BX
+screens, or synthetic screens built from the templates in `src/images` when
+no directory is given. Every template is searched in every frame; the recall
+is the fraction of the hits of the full search that the prefiltered search
+also returns.
+
+Usage:
+    python -m benchmarks.bench_prefilter [--frames DIR] [--repeat N] [--confidence C]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy
+
+from benchmarks.bench_pyramid import _template_paths, synthetic_screen
+from src.core import cv2find, templates
+
+FRAME_EXTENSIONS = (".png", ".bmp", ".jpg", ".jpeg")
+
+
+def _frames(directory, repeat, paths):
+    if directory is None:
+        rng = numpy.random.default_rng(0)
+        for index in range(repeat):
+            yield f"synthetic-{index}", synthetic_screen(1920, 1080, paths, rng)
+        return
+    files = sorted(
+        f
+        for f in glob.glob(os.path.join(directory, "*"))
+        if f.lower().endswith(FRAME_EXTENSIONS)
+    )
+    if not files:
+        raise SystemExit(f"No frames found in {directory}")
+    for file in files:
+        yield os.path.basename(file), cv2.imread(file, cv2.IMREAD_COLOR)
+
+
+def _search(template, frame, confidence, prefilter, stats=None):
+    start = time.perf_counter()
+    boxes = cv2find.locate_all_opencv(
+        template.bgr,
+        frame,
+        confidence=confidence,
+        prefilter=template.probes if prefilter else None,
+        stats=stats,
+    )
+    hits = {(int(b.left), int(b.top)) for b in boxes}
+    return time.perf_counter() - start, hits
+
+
+def run(directory, repeat, confidence):
+    paths = _template_paths()
+    loaded = [templates.store.load(path) for path in paths]
+    usable = [t for t in loaded if t.probes is not None]
+    print(f"{len(usable)} of {len(loaded)} templates have discriminative pixels")
+
+    header = "{:>24} | {:>10} | {:>10} | {:>7} | {:>7} | {:>8}".format(
+        "frame", "full", "prefilter", "speedup", "recall", "pruned"
+    )
+    print(header)
+    print("-" * len(header))
+    totals = {"full": 0.0, "prefilter": 0.0, "hits": 0, "kept": 0}
+    for name, frame in _frames(directory, repeat, paths):
+        full_time = prefilter_time = 0.0
+        hits = kept = positions = pruned = 0
+        for template in usable:
+            if template.height > frame.shape[0] or template.width > frame.shape[1]:
+                continue
+            elapsed, expected = _search(template, frame, confidence, False)
+            full_time += elapsed
+            stats = {}
+            elapsed, found = _search(template, frame, confidence, True, stats)
+            prefilter_time += elapsed
+            hits += len(expected)
+            kept += len(expected & found)
+            positions += stats.get("positions", 0)
+            pruned += stats.get("pruned", 0)
+
+        recall = kept / hits if hits else 1.0
+        row = "{:>24} | {:>7.1f} ms | {:>7.1f} ms | {:>6.1f}x | {:>6.1%} | {:>7.3%}"
+        print(
+            row.format(
+                name[-24:],
+                1000 * full_time,
+                1000 * prefilter_time,
+                full_time / prefilter_time,
+                recall,
+                pruned / positions if positions else 0.0,
+            )
+        )
+        totals["full"] += full_time
+        totals["prefilter"] += prefilter_time
+        totals["hits"] += hits
+        totals["kept"] += kept
+
+    recall = totals["kept"] / totals["hits"] if totals["hits"] else 1.0
+    print(
+        "\ntotal: {:.1f}x faster, recall {:.1%} ({} of {} hits)".format(
+            totals["full"] / totals["prefilter"], recall, totals["kept"], totals["hits"]
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--frames", help="directory with recorded screenshots (default: synthetic)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="synthetic frames")
+    parser.add_argument("--confidence", type=float, default=0.9)
+    args = parser.parse_args()
+    run(args.frames, args.repeat, args.confidence)
@@ -0,0 +1,95 @@
+"""
+Latency of the full resolution search against the coarse-to-fine pyramid
+search of `cv2find.locate_all_opencv` for several screen resolutions.
+
+The haystacks are synthetic screens built from the templates in
+`src/images`; one template is planted at a random position and every mode
+must find it.
+
+Usage:
+    python -m benchmarks.bench_pyramid [--repeat N] [--confidence C]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import numpy
+
+from src.core import cv2find, templates
+
+RESOLUTIONS = [(1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)]
+MODES = [("full", 0), ("pyramid=1", 1), ("pyramid=2", 2)]
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), "..", "src", "images")
+
+
+def _template_paths():
+    paths = glob.glob(os.path.join(IMAGES_DIR, "**", "*.*"), recursive=True)
+    return sorted(p for p in paths if "telainicial" not in p)
+
+
+def synthetic_screen(width, height, paths, rng):
+    """
+    Build a light UI-like screen tiled with real templates.
+    """
+    screen = numpy.full((height, width, 3), 238, numpy.uint8)
+    for _ in range((width * height) // 20000):
+        tpl = templates.store.load(paths[rng.integers(len(paths))]).bgr
+        h, w = tpl.shape[:2]
+        if w >= width or h >= height:
+            continue
+        x, y = rng.integers(0, width - w), rng.integers(0, height - h)
+        screen[y: y + h, x: x + w] = tpl
+    return screen
+
+
+def run(repeat, confidence):
+    paths = _template_paths()
+    rng = numpy.random.default_rng(0)
+
+    missed = False
+    header = "{:>11} | ".format("resolution") + " | ".join(
+        "{:>14}".format(name) for name, _ in MODES
+    )
+    print(header)
+    print("-" * len(header))
+    for width, height in RESOLUTIONS:
+        totals = {name: 0.0 for name, _ in MODES}
+        misses = {name: 0 for name, _ in MODES}
+        for _ in range(repeat):
+            screen = synthetic_screen(width, height, paths, rng)
+            needle = templates.store.load(paths[rng.integers(len(paths))]).bgr
+            h, w = needle.shape[:2]
+            x, y = int(rng.integers(0, width - w)), int(rng.integers(0, height - h))
+            screen[y: y + h, x: x + w] = needle
+
+            for name, levels in MODES:
+                start = time.perf_counter()
+                boxes = list(
+                    cv2find.locate_all_opencv(
+                        needle, screen, confidence=confidence, pyramid=levels
+                    )
+                )
+                totals[name] += time.perf_counter() - start
+                if (x, y) not in [(int(b.left), int(b.top)) for b in boxes]:
+                    misses[name] += 1
+
+        missed = missed or any(misses.values())
+        cells = [
+            "{:>8.1f} ms{:>3}".format(
+                1000 * totals[name] / repeat, "*" if misses[name] else ""
+            )
+            for name, _ in MODES
+        ]
+        print("{:>11} | ".format(f"{width}x{height}") + " | ".join(cells))
+    if missed:
+        print("\n* planted template missed at least once")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--confidence", type=float, default=0.9)
+    args = parser.parse_args()
+    run(args.repeat, args.confidence)
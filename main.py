@@ -1,13 +1,20 @@
+import argparse
+import contextlib
 import logging
-import unicodedata
+import sys
+import time
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Any, Callable, ContextManager, Dict, List, Optional, TextIO, Union
 
 from receitanet import ReceitaNetBx
 from sped import Sped
-from src.modules.common import attempts, get_message, time_execution
+from src.config.settings import Settings
+from src.core import polling
+from src.modules import batch, scheduler
+from src.modules.daemon import JobDaemon
+from src.modules.common import get_message, time_execution
 from src.modules.data import Data
-from src.modules.exceptions import SpedError, ValidationError
+from src.modules.exceptions import LoginError, SpedError, ValidationError
 from src.modules.file import File
 from src.modules.log import LogManager
 from src.modules.types import SpedType
@@ -17,14 +24,21 @@ from src.modules.validate import Validar
 class Bot:
     """Orquestra a execução do robô ReceitaNet BX."""
 
+    # Execuções de cada sistema antes de registrá-lo como erro.
+    TENTATIVAS_POR_SISTEMA = 3
+
     def __init__(
-        self, sistema: str, contribuinte: str, data_inicial: str, data_final: str
+        self,
+        sistema: Union[str, List[str]],
+        contribuinte: str,
+        data_inicial: str,
+        data_final: str,
     ) -> None:
         """
         Inicializa o orquestrador com os dados da solicitação.
 
         Args:
-            sistema (str): Identificador do sistema solicitado.
+            sistema (Union[str, List[str]]): Sistema solicitado ou lista de sistemas.
             contribuinte (str): CNPJ do contribuinte.
             data_inicial (str): Data inicial do período (DD/MM/AAAA).
             data_final (str): Data final do período (DD/MM/AAAA).
@@ -46,46 +60,49 @@ class Bot:
             SpedType.FISCAL: self.sped.download_sped_fiscal,
         }
 
-    @staticmethod
-    def _normalize_system_name(name: str) -> str:
+    def _resolve_sped_types(self, sistema: Union[str, List[str]]) -> List[SpedType]:
         """
-        Remove acentos e padroniza o nome do sistema para comparação com SpedType.
+        Converte o sistema, ou a lista de sistemas, nos SpedTypes correspondentes.
 
         Args:
-            name (str): Nome informado na mensagem.
+            sistema (Union[str, List[str]]): Sistema ou sistemas informados na mensagem.
 
         Returns:
-            str: Nome normalizado em minúsculas e sem acentos.
+            List[SpedType]: Enums na ordem de `ORDEM_SISTEMAS`, que segue a cadeia de
+                `sistema_anterior` e evita reabrir a combobox de sistemas.
+
+        Raises:
+            ValidationError: Quando algum sistema não é suportado.
         """
-        if not name:
-            return ""
-        normalized = unicodedata.normalize("NFKD", name)
-        ascii_name = normalized.encode("ASCII", "ignore").decode("ASCII")
-        return ascii_name.strip().lower()
+        try:
+            return SpedType.from_names(sistema)
+        except (TypeError, ValueError):
+            raise ValidationError(f"Sistema não suportado: {sistema!r}")
 
-    def _resolve_sped_type(self, sistema_key: str) -> SpedType:
+    def baixar(self) -> None:
         """
-        Converte a chave normalizada no SpedType correspondente.
+        Baixa os arquivos dos sistemas solicitados em uma sessão já logada com o
+        CNPJ do contribuinte.
+        """
+        for sped_type in self._resolve_sped_types(self.sistema):
+            File.delete_files_and_subdirectories(str(self.dir_docs))
+            self._handlers[sped_type]()
 
-        Args:
-            sistema_key (str): Nome do sistema normalizado.
+    @time_execution
+    def main(self) -> Dict[str, str]:
+        """
+        Executa o fluxo principal do robô.
 
-        Returns:
-            SpedType: Enum correspondente.
+        Os sistemas solicitados são baixados sobre um único login. Um sistema que
+        falha volta para o fim da fila e é tentado de novo com o aplicativo
+        reaberto, sem repetir os que já terminaram.
 
-        Raises:
-            ValidationError: Quando o sistema não é suportado.
+        Returns:
+            Dict[str, str]: Resultado de cada sistema: "ok" ou a descrição do erro.
         """
-        try:
-            return SpedType(sistema_key)
-        except ValueError:
-            raise ValidationError(f"Sistema não suportado: '{sistema_key}'")
-
-    @time_execution
-    @attempts(max_attempts=3, waiting_time=5)
-    def main(self) -> None:
-        """Executa o fluxo principal do robô."""
         receitanet = ReceitaNetBx()
+        polling.savings.reset()
+        resultados: Dict[str, str] = {}
         try:
             File.delete_files_and_subdirectories(str(self.dir_docs))
 
@@ -97,21 +114,298 @@ class Bot:
                     self.data_inicial,
                     self.data_final,
                 )
-                return
-
-            sistema_key = self._normalize_system_name(self.sistema)
-            sped_type = self._resolve_sped_type(sistema_key)
-            handler = self._handlers[sped_type]
+                return resultados
 
-            receitanet.login(contribuinte=self.contribuinte)
-            handler()
+            pendentes = self._resolve_sped_types(self.sistema)
+            falhas: Dict[SpedType, int] = {}
+            logado = False
+            while pendentes:
+                sped_type = pendentes.pop(0)
+                try:
+                    if not logado:
+                        receitanet.login(contribuinte=self.contribuinte)
+                        logado = True
+                    File.delete_files_and_subdirectories(str(self.dir_docs))
+                    self._handlers[sped_type]()
+                    resultados[sped_type.label] = "ok"
+                    continue
+                except LoginError as exc:
+                    # login já tentou de novo reabrindo o aplicativo.
+                    for restante in [sped_type, *pendentes]:
+                        resultados[restante.label] = f"{type(exc).__name__}: {exc}"
+                    break
+                except Exception as exc:
+                    falhas[sped_type] = falhas.get(sped_type, 0) + 1
+                    logging.warning(
+                        "%s falhou na tentativa %d de %d: %s - %s",
+                        sped_type.label,
+                        falhas[sped_type],
+                        self.TENTATIVAS_POR_SISTEMA,
+                        type(exc).__name__,
+                        exc,
+                    )
+                    if falhas[sped_type] < self.TENTATIVAS_POR_SISTEMA:
+                        pendentes.append(sped_type)
+                    else:
+                        resultados[sped_type.label] = f"{type(exc).__name__}: {exc}"
+                receitanet.fechar_aplicativo()
+                time.sleep(5)
+                logado = False
+            return resultados
         finally:
             receitanet.fechar_aplicativo()
             File.delete_files_and_subdirectories(str(self.dir_docs))
+            logging.info(
+                "Tempo economizado aguardando a tela estabilizar: %.1f s (%d esperas)",
+                polling.savings.total,
+                polling.savings.waits,
+            )
+            for sistema, resultado in resultados.items():
+                logging.info("[RESULTADO] %s: %s", sistema, resultado)
+
+
+class Sessao:
+    """
+    Sessão do aplicativo reaproveitada entre jobs.
+
+    O aplicativo fica aberto e logado com o CNPJ do último job. Ao trocar de
+    contribuinte o perfil é alterado na própria sessão, e o aplicativo só é
+    reaberto quando a troca falha ou depois de uma falha no job, quando o estado
+    da interface é desconhecido.
+    """
+
+    def __init__(self, tentativas: int = 2) -> None:
+        """
+        Args:
+            tentativas (int): Execuções de cada job antes de registrá-lo como erro.
+                Padrão: 2.
+        """
+        self.tentativas = tentativas
+        self.dir_docs = Path.home() / "Documents" / "Arquivos ReceitanetBX"
+        self.receitanet = ReceitaNetBx()
+        self.contribuinte: Optional[str] = None
+        self.estado: Optional[scheduler.Estado] = None
+        self.tempos = scheduler.TimingLog(Settings.RECEITANET_TIMING_LOG)
+        self.ultimo_erro: Optional[Exception] = None
+
+    def _logar(self, cnpj: str) -> None:
+        if self.contribuinte == cnpj:
+            return
+        if self.contribuinte is not None:
+            if self.receitanet.trocar_contribuinte(cnpj):
+                self.contribuinte = cnpj
+                return
+            logging.info("Troca de contribuinte falhou; reabrindo o aplicativo")
+            self.encerrar()
+        self.receitanet.login(contribuinte=cnpj)
+        self.contribuinte = cnpj
+
+    def executar(self, job: batch.Job) -> Dict[str, Any]:
+        """
+        Executa um job, logando com o CNPJ dele quando necessário.
+
+        Args:
+            job (batch.Job): Job validado.
+
+        Returns:
+            Dict[str, Any]: Registro de resultado do job.
+        """
+        inicio = time.monotonic()
+        anterior = self.estado
+        self.ultimo_erro = None
+        polling.savings.reset()
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                self._logar(job.cnpj)
+                Bot(
+                    sistema=job.sped_type.label,
+                    contribuinte=job.cnpj,
+                    data_inicial=job.data_inicial,
+                    data_final=job.data_final,
+                ).baixar()
+                self.ultimo_erro = None
+                break
+            except LoginError as exc:
+                # login já tentou de novo reabrindo o aplicativo.
+                self.ultimo_erro = exc
+                break
+            except Exception as exc:
+                self.ultimo_erro = exc
+                logging.warning(
+                    "Job da linha %d falhou na tentativa %d de %d: %s - %s",
+                    job.linha,
+                    tentativa,
+                    self.tentativas,
+                    type(exc).__name__,
+                    exc,
+                )
+                self.encerrar()
+
+        duracao = time.monotonic() - inicio
+        esperas = polling.savings.waits
+        economia = polling.savings.reset()
+        logging.info(
+            "Job da linha %d: tempo economizado aguardando a tela estabilizar: "
+            "%.1f s (%d esperas)",
+            job.linha,
+            economia,
+            esperas,
+        )
+        if self.ultimo_erro is not None:
+            return batch.resultado(
+                job, batch.STATUS_ERRO, self.ultimo_erro, duracao, economia
+            )
+        self.estado = scheduler.Estado.de(job)
+        if tentativa == 1:
+            # Com novas tentativas a duração mede a falha, não a transição.
+            self.tempos.registrar(anterior, self.estado, duracao)
+        return batch.resultado(job, batch.STATUS_OK, duracao=duracao, economia=economia)
+
+    def encerrar(self) -> None:
+        """
+        Fecha o aplicativo e limpa a pasta de downloads.
+        """
+        self.receitanet.fechar_aplicativo()
+        File.delete_files_and_subdirectories(str(self.dir_docs))
+        if self.contribuinte is not None:
+            time.sleep(2)
+        self.contribuinte = None
+        self.estado = None
+
+
+@time_execution
+def executar_lote(entrada: TextIO, saida: TextIO) -> Dict[str, int]:
+    """
+    Executa um lote de payloads JSONL reaproveitando o aplicativo aberto.
+
+    Todas as linhas são validadas antes de abrir o aplicativo e os jobs de um
+    mesmo CNPJ rodam em sequência sobre um único login. A ordem dos jobs é a
+    de menor custo estimado pelas durações do log de tempos
+    (`RECEITANET_TIMING_LOG`).
+
+    Args:
+        entrada (TextIO): Linhas JSONL com um payload cada.
+        saida (TextIO): Destino dos registros de resultado, um por job.
+
+    Returns:
+        Dict[str, int]: Quantidade de registros por status.
+    """
+    jobs, invalidos = batch.ler_jobs(entrada)
+    writer = batch.ResultWriter(saida)
+    for registro in invalidos:
+        writer.write(registro)
+    if not jobs:
+        logging.info("Lote sem jobs válidos: %d linha(s) inválida(s)", len(invalidos))
+        return writer.contagem
+
+    sessao = Sessao()
+    modelo = scheduler.CustoTransicoes()
+    observacoes = modelo.aprender(sessao.tempos.ler())
+    ordenados = scheduler.ordenar(jobs, modelo)
+    grupos = batch.agrupar_por_contribuinte(ordenados)
+    logging.info(
+        "Lote com %d job(s) de %d contribuinte(s) e %d linha(s) inválida(s); "
+        "custo estimado %.0f s na ordem de chegada e %.0f s reordenado "
+        "(%d tempo(s) observado(s))",
+        len(jobs),
+        len(grupos),
+        len(invalidos),
+        scheduler.custo_total(jobs, modelo),
+        scheduler.custo_total(ordenados, modelo),
+        observacoes,
+    )
+    economia = 0.0
+    try:
+        for cnpj, grupo in grupos.items():
+            for posicao, job in enumerate(grupo):
+                registro = sessao.executar(job)
+                economia += registro.get("economia", 0.0)
+                writer.write(registro)
+                erro = sessao.ultimo_erro
+                if isinstance(erro, LoginError):
+                    logging.error("Login falhou para %s; pulando os demais jobs", cnpj)
+                    for restante in grupo[posicao + 1:]:
+                        writer.write(batch.resultado(restante, batch.STATUS_ERRO, erro))
+                    break
+    finally:
+        sessao.encerrar()
+        logging.info(
+            "Lote finalizado: %s. Tempo economizado aguardando a tela estabilizar: "
+            "%.1f s",
+            writer.contagem,
+            economia,
+        )
+    return writer.contagem
+
+
+def executar_servidor() -> None:
+    """
+    Atende jobs enviados pelo socket local até receber `encerrar` ou Ctrl+C.
+
+    O aplicativo e os templates são carregados uma vez; a sessão logada é
+    reaproveitada entre jobs e o aplicativo é fechado depois de
+    `RECEITANET_DAEMON_IDLE` segundos sem jobs.
+    """
+    sessao = Sessao()
+    daemon = JobDaemon(
+        sessao.executar,
+        ocioso=sessao.encerrar,
+        host=Settings.RECEITANET_DAEMON_HOST,
+        port=Settings.RECEITANET_DAEMON_PORT,
+        capacidade=Settings.RECEITANET_DAEMON_QUEUE,
+        tempo_ocioso=Settings.RECEITANET_DAEMON_IDLE,
+    )
+    daemon.start()
+    try:
+        daemon.wait()
+    except KeyboardInterrupt:
+        logging.info("Servidor interrompido")
+    finally:
+        daemon.shutdown()
+        sessao.encerrar()
+
+
+def _argumentos() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Robô ReceitaNet BX")
+    parser.add_argument(
+        "--batch",
+        metavar="ARQUIVO",
+        help="arquivo JSONL com um payload por linha ('-' para stdin)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="atende jobs enviados por um socket local (ver RECEITANET_DAEMON_*)",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="ARQUIVO",
+        default="-",
+        help="arquivo JSONL dos resultados do lote (padrão: stdout)",
+    )
+    return parser.parse_args()
+
+
+def _abrir(caminho: str, modo: str) -> ContextManager[TextIO]:
+    if caminho == "-":
+        # O `with` não deve fechar stdin/stdout.
+        return contextlib.nullcontext(sys.stdin if "r" in modo else sys.stdout)
+    return open(caminho, modo, encoding="utf-8")
 
 
 if __name__ == "__main__":
     DEVELOP_MODE = False
+    args = _argumentos()
+    if args.daemon:
+        LogManager()
+        executar_servidor()
+        sys.exit(0)
+    if args.batch:
+        LogManager()
+        with _abrir(args.batch, "r") as entrada, _abrir(args.output, "a") as saida:
+            contagem = executar_lote(entrada, saida)
+        sys.exit(1 if contagem.get(batch.STATUS_ERRO) else 0)
+
     try:
         LogManager()
 
@@ -129,7 +423,9 @@ if __name__ == "__main__":
         logging.info("[MENSAGEM RECEBIDA]: %s", mensagem)
 
         cnpj_value: Optional[str] = mensagem.get("Cnpj") or mensagem.get("cnpj")
-        sistema: Optional[str] = mensagem.get("Sistema") or mensagem.get("sistema")
+        sistema: Optional[Union[str, List[str]]] = mensagem.get(
+            "Sistema"
+        ) or mensagem.get("sistema")
 
         if cnpj := Validar.validar_cnpj(cnpj_value):
             data_inicial_raw = mensagem.get("DataInicial") or mensagem.get("datainicial")
@@ -3,17 +3,34 @@
 import logging
 import shutil
 import subprocess
-import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 from src.config.settings import Settings
+from src.core import fingerprint
 from src.core.bot import DesktopBot
 from src.modules.exceptions import DownloadError, LoginError, UIError
 
 
+class Popup(NamedTuple):
+    """
+    Desfecho de uma solicitação indicado por um popup.
+
+    Attributes:
+        acao (bool): Se a solicitação foi registrada e os arquivos devem ser baixados.
+        log_msg (str): Mensagem para log.
+        status (str): Status da operação.
+        resultado (str): Resultado da operação.
+    """
+
+    acao: bool
+    log_msg: str
+    status: str
+    resultado: str
+
+
 class ReceitaNetBx(DesktopBot):
     """
     Classe destinada a automatizar tarefas relacionadas ao aplicativo "ReceitaNet BX".
@@ -23,14 +40,84 @@ class ReceitaNetBx(DesktopBot):
         nome_app (str): Nome do aplicativo.
         dir_app (Path): Caminho para o atalho do aplicativo.
         image_paths (Dict[str, Path]): Dicionário contendo os caminhos para as imagens utilizadas.
+        TEMPO_DOWNLOAD (int): Tempo máximo em segundos para o download terminar.
+        POPUPS (Dict[str, Popup]): Desfecho indicado por cada popup após a solicitação.
     """
 
+    # Tempo máximo (s) para o download dos arquivos solicitados terminar.
+    TEMPO_DOWNLOAD = 900
+
+    POPUPS: Dict[str, Popup] = {
+        "msg-falha-comunicacao": Popup(
+            False,
+            "Falha na comunicação com o sistema do Receita Net!",
+            "Falha",
+            "Falha na comunicação com o sistema do Receita Net!",
+        ),
+        "pop-up-pedido": Popup(
+            True,
+            "Pedido Registrado Com Sucesso",
+            "Processando...",
+            "Pedido Registrado Com Sucesso!",
+        ),
+        "pop-up-error": Popup(
+            False,
+            "Erro ao registrar o pedido",
+            "Falha",
+            "Erro ao registrar o pedido!",
+        ),
+        "pop-up-nao-encontrado": Popup(
+            False,
+            "Não foi encontrado nenhum arquivo correspondente a pesquisa!",
+            "Processado",
+            "Não foi localizado nenhum arquivo!",
+        ),
+        "popup-nenhum-arquivo": Popup(
+            False,
+            "Não foi encontrado nenhum arquivo correspondente a pesquisa!",
+            "Processado",
+            "Não foi localizado nenhum arquivo!",
+        ),
+        "msg-erro-data": Popup(
+            False,
+            "A Data final deve ser igual ou menor que a data atual!",
+            "Falha",
+            "A Data final deve ser igual ou menor que a data atual!",
+        ),
+        "msg-procuracao-vencida": Popup(
+            False,
+            "A procuração está vencida!",
+            "Falha",
+            "Procuração eletrônica vencida!",
+        ),
+        "msg-nao-existe-procuracao": Popup(
+            False,
+            "Não existe procuração para este CNPJ!",
+            "Falha",
+            "Sem procuração para este CNPJ!",
+        ),
+    }
+    # Controles do diálogo de login, buscados apenas dentro da janela do aplicativo
+    # (âncora `janela-login`) em vez da tela inteira.
+    LABELS_LOGIN: Tuple[str, ...] = (
+        "atualizar-lista",
+        "combobox-perfil",
+        "input-pf",
+        "input-pj",
+        "procurador-pf",
+        "procurador-pj",
+        "selecionar-procurador",
+    )
+
+    # Janela do aplicativo (1006x737) relativa ao canto do logo "Receita Federal"
+    # do diálogo de login, como em telainicial.png.
+    EXTENSAO_JANELA_LOGIN: Tuple[int, int, int, int] = (-207, -203, 1006, 737)
+
     def __init__(self) -> None:
         """
         Inicializa a classe ReceitaNetBx.
         """
         super().__init__()
-        self.found = threading.Event()
         self.dir_docs = Path(Settings.RECEITANET_DOCS_DIR)
         self.nome_app = "Receitanet BX"
         self.dir_app = Path(Settings.RECEITANET_APP_PATH)
@@ -54,8 +141,6 @@ class ReceitaNetBx(DesktopBot):
         self.dir_selecione_periodo = self.dir_combobox_periodo / "selecione periodo"
         self.list_btn_baixar = self.dir_baixa / "button-baixar"
         self.list_icon_marcar = self.dir_baixa / "icon-marcar"
-        self.result: Optional[Dict[str, str]] = None
-        self._popup_lock = threading.Lock()
         self.load_images()
 
     def action(self, execution=None):
@@ -86,6 +171,14 @@ class ReceitaNetBx(DesktopBot):
     def load_images(self) -> None:
         """
         Carrega as imagens necessárias para a execução do robô.
+
+        Os templates ficam decodificados no store compartilhado do processo, então
+        as chamadas repetidas (uma por tentativa de login) não voltam a ler os PNGs.
+        O índice de telas conhecidas (`fingerprint.screens`) é montado durante a
+        execução, à medida que os passos são concluídos. O logo do diálogo de
+        login é declarado como âncora dos controles do login, que passam a ser
+        buscados só dentro da janela; a âncora é localizada de novo a cada
+        abertura do aplicativo.
         """
         try:
             mappings: List[Tuple[str, Path, str]] = [
@@ -214,6 +307,7 @@ class ReceitaNetBx(DesktopBot):
                 ("procurador-pj", self.dir_login, "procurador-pj.png"),
                 ("resultado-pesquisa", self.dir_baixa, "resultado-pesquisa.png"),
                 ("selecionar-procurador", self.dir_login, "combobox-procurador.png"),
+                ("logo-login", self.dir_login, "logo-receita-federal.png"),
                 (
                     "validacao-periodo-contabil",
                     self.dir_combobox_periodo,
@@ -229,41 +323,40 @@ class ReceitaNetBx(DesktopBot):
 
             for identifier, directory, filename in mappings:
                 self.add_image(identifier, str(directory / filename))
+            # Botão de alteração de perfil usado por trocar_contribuinte; opcional.
+            alterar_perfil = self.dir_login / "alterar-perfil.png"
+            if alterar_perfil.exists():
+                self.add_image("alterar-perfil", str(alterar_perfil))
+            self.preload_images()
+            # O logo do diálogo de login é pequeno e não muda; a região de busca
+            # continua sendo a janela inteira ao redor dele.
+            self.add_anchor(
+                "janela-login",
+                "logo-login",
+                labels=self.LABELS_LOGIN,
+                extent=self.EXTENSAO_JANELA_LOGIN,
+            )
         except Exception as exc:  # pylint: disable=broad-except
             raise UIError("Falha ao carregar imagens de referência.") from exc
 
-    def verificar_popup(
-        self,
-        nome_popup: str,
-        acao: str,
-        log_msg: str,
-        status: str,
-        resultado: str,
-    ) -> None:
+    def classificar_popup(self, timeout: int = 10) -> Optional[Tuple[str, Any]]:
         """
-        Verifica se um popup específico existe na tela e executa uma ação.
+        Identifica qual popup de desfecho da solicitação está na tela.
+
+        A cada captura todos os templates de `POPUPS` são comparados com o mesmo
+        frame (via `wait_any`), e vence o de maior pontuação.
 
         Args:
-            nome_popup (str): Nome/identificador do popup a ser verificado.
-            acao (str): Ação a ser realizada se o popup for encontrado.
-            log_msg (str): Mensagem para log.
-            status (str): Status da operação.
-            resultado (str): Resultado da operação.
-        """
-        if not self.found.is_set() and self.find(nome_popup, matching=0.8):
-            with self._popup_lock:
-                if (
-                    not self.found.is_set()
-                ):  # Double check to avoid race conditions
-                    self.click()
-                    self.enter()
-                    logging.info(log_msg)
-                    self.result = {
-                        "acao": acao,
-                        "status": status,
-                        "resultado": resultado,
-                    }
-                    self.found.set()  # Signals that a condition has been met
+            timeout (int): Tempo máximo de espera em segundos.
+
+        Returns:
+            Optional[Tuple[str, Any]]: Identificador do popup e sua posição na tela,
+                ou None se nenhum aparecer dentro do tempo.
+        """
+        label, box = self.wait_any(list(self.POPUPS), timeout, matching=0.8, pyramid=1)
+        if label is None:
+            return None
+        return label, box
 
     def login(self, contribuinte: str) -> None:
         """
@@ -281,37 +374,21 @@ class ReceitaNetBx(DesktopBot):
                 logging.info("Realizando login com certificado A1")
                 logging.info("Selecionando -> Certificado A1 <-")
                 self.find_click_list_image(path=str(self.certificado_alz), match=0.7)
-                logging.info(
-                    "Selecionando Combo Box -> Selecione um Perfil de Acesso <-"
+                self._informar_perfil(contribuinte)
+                logging.info("Validando se o login foi efetuado")
+                desfecho, _ = self.wait_any(
+                    ["login-efetuado", "msg-falha-comunicacao"], timeout=30, matching=0.7
                 )
-                self.find_click_image(identifier="combobox-perfil", match=0.8)
-                logging.info("Selecionando Combo Box -> Procurador <-")
-                self.find_click_image(identifier="selecionar-procurador", match=0.8)
-                logging.info("Procurador PJ")
-                self.find_click_image(identifier="procurador-pf", match=0.8)
-                logging.info("Selecionando -> Procurador PJ <-")
-                self.find_click_image(identifier="procurador-pj", match=0.8)
-                logging.info("Selecionando Input -> CNPJ <-")
-                self.find_click_image(identifier="input-pj", match=0.8)
-                logging.info("Inserindo CNPJ do Procurador")
-                self.control_a()
-                self.paste(contribuinte)
-                self.tab()
-                time.sleep(1)
-                logging.info("Selecionando Botão -> Entrar <-")
-                self.find_click_list_image(
-                    path=str(self.list_btn_entrar), match=0.7
+                if desfecho == "login-efetuado":
+                    self.maximize_window()
+                    self.wait_until_stable(timeout=1, replaces=1)
+                    logging.info("* LOGIN EFETUADO COM SUCESSO")
+                    break
+                logging.warning(
+                    "Login não confirmado: %s", desfecho or "tempo esgotado"
                 )
-                logging.info("Validando se o login foi efetuado")
-                try:
-                    if self.wait_find_image(identifier="login-efetuado", match=0.7, tempo=30):
-                        self.maximize_window()
-                        time.sleep(1)
-                        logging.info("* LOGIN EFETUADO COM SUCESSO")
-                        break
-                except FileNotFoundError:
-                    self.fechar_aplicativo()
-                    time.sleep(2)
+                self.fechar_aplicativo()
+                time.sleep(2)
             except Exception as e:
                 logging.warning("Erro ao logar no Receitanet BX: %s", e)
                 self.fechar_aplicativo()
@@ -321,6 +398,75 @@ class ReceitaNetBx(DesktopBot):
                 "[FALHA]: Ocorreu um erro ao tentar logar com certificado A1"
             )
 
+    def _informar_perfil(self, contribuinte: str) -> None:
+        """
+        Preenche o perfil de acesso como procurador do CNPJ informado e confirma.
+
+        Os passos são os mesmos no login e na troca de perfil de uma sessão aberta.
+
+        Args:
+            contribuinte (str): CNPJ do contribuinte.
+        """
+        logging.info("Selecionando Combo Box -> Selecione um Perfil de Acesso <-")
+        self.find_click_image(identifier="combobox-perfil", match=0.8)
+        logging.info("Selecionando Combo Box -> Procurador <-")
+        self.find_click_image(identifier="selecionar-procurador", match=0.8)
+        logging.info("Procurador PJ")
+        self.find_click_image(identifier="procurador-pf", match=0.8)
+        logging.info("Selecionando -> Procurador PJ <-")
+        self.find_click_image(identifier="procurador-pj", match=0.8)
+        logging.info("Selecionando Input -> CNPJ <-")
+        self.find_click_image(identifier="input-pj", match=0.8)
+        logging.info("Inserindo CNPJ do Procurador")
+        self.control_a()
+        self.paste(contribuinte)
+        self.tab()
+        self.wait_until_stable(timeout=1, replaces=1)
+        logging.info("Selecionando Botão -> Entrar <-")
+        self.find_click_list_image(path=str(self.list_btn_entrar), match=0.7)
+
+    def trocar_contribuinte(self, contribuinte: str) -> bool:
+        """
+        Troca o CNPJ representado sem reabrir o aplicativo.
+
+        Abre a alteração de perfil de acesso da sessão logada e preenche o novo
+        perfil como no login. Requer a captura `src/images/login/alterar-perfil.png`
+        do botão de alteração de perfil; sem ela a troca não é tentada.
+
+        Args:
+            contribuinte (str): CNPJ do novo contribuinte.
+
+        Returns:
+            bool: True se a sessão passou a representar o contribuinte. False quando a
+                troca não foi possível e o chamador deve refazer o login.
+        """
+        logging.info("* INICIANDO FUNÇÃO -> TROCAR CONTRIBUINTE <- *")
+        if "alterar-perfil" not in self.state.map_images:
+            logging.warning("Imagem alterar-perfil ausente; troca indisponível")
+            return False
+        try:
+            if not self.find("alterar-perfil", matching=0.8, waiting_time=10000):
+                logging.warning("Botão de alteração de perfil não encontrado")
+                return False
+            self.click()
+            self._informar_perfil(contribuinte)
+            # O cabeçalho "Representando" da sessão anterior continua na tela até o
+            # diálogo fechar, então login-efetuado só vale depois disso.
+            if self.wait_until_vanished("input-pj", timeout=30, matching=0.8) is None:
+                logging.warning("Diálogo de perfil não fechou após confirmar")
+                return False
+            desfecho, _ = self.wait_any(
+                ["login-efetuado", "msg-falha-comunicacao"], timeout=30, matching=0.7
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.warning("Erro ao trocar de contribuinte: %s", exc)
+            return False
+        if desfecho != "login-efetuado":
+            logging.warning("Troca não confirmada: %s", desfecho or "tempo esgotado")
+            return False
+        logging.info("* CONTRIBUINTE ALTERADO PARA %s", contribuinte)
+        return True
+
     def selecionar_sistema(
         self, sistema: str, sistema_anterior: Optional[str] = None
     ) -> None:
@@ -334,19 +480,26 @@ class ReceitaNetBx(DesktopBot):
         logging.info("* SELECIONANDO O SISTEMA E O TIPO DE ARQUIVO *")
         try:
             self.mudar_tela_pesquisa()
+            tela = f"sistema:{sistema}"
+            if self.is_screen(tela, sistema):
+                logging.info("Sistema já selecionado: %s", sistema)
+                return
             if self.validate_list_exists(path=str(self.dir_selecione_sistema)):
                 self.find_click_list_image(path=str(self.dir_selecione_sistema))
+                caixa = self.state.element
                 self.click_image(sistema)
             else:
                 if self.validate_exists(identifier=sistema):
-                    pass
+                    caixa = self.state.element
                 elif sistema_anterior and self.validate_exists(
                     identifier=sistema_anterior
                 ):
                     self.click_image(sistema_anterior)
+                    caixa = self.state.element
                     self.click_image(sistema)
                 else:
                     raise UIError(f"Erro ao selecionar sistema: {sistema}")
+            self._registrar_selecao(tela, caixa)
             logging.info("Sistema selecionado: %s", sistema)
         except UIError:
             raise
@@ -369,22 +522,30 @@ class ReceitaNetBx(DesktopBot):
         """
         logging.info("* SELECIONANDO O TIPO DE ARQUIVO *")
         try:
+            tela = f"arquivo:{tipo_arquivo}"
+            confirmacao = validacao or tipo_arquivo
+            if self.is_screen(tela, confirmacao, matching=0.9 if validacao else 0.8):
+                logging.info("Tipo de arquivo já selecionado: %s", tipo_arquivo)
+                return
             if self.validate_list_exists(path=str(self.dir_selecione_arquivo)):
                 self.find_click_list_image(path=str(self.dir_selecione_arquivo))
+                caixa = self.state.element
                 self.click_image(tipo_arquivo, confidence=0.8)
             else:
                 logging.info("Selecionando tipo de arquivo anterior")
                 if validacao and self.validate_exists(identifier=validacao):
-                    pass
+                    caixa = self.state.element
                 elif tipo_arquivo_anterior and self.validate_exists(
                     identifier=tipo_arquivo_anterior
                 ):
                     self.click_image(tipo_arquivo_anterior)
+                    caixa = self.state.element
                     self.click_image(tipo_arquivo)
                 else:
                     raise UIError(
                         f"Erro ao selecionar tipo de arquivo: {tipo_arquivo}"
                     )
+            self._registrar_selecao(tela, caixa)
             logging.info("Tipo de arquivo selecionado: %s", tipo_arquivo)
         except UIError:
             raise
@@ -403,33 +564,72 @@ class ReceitaNetBx(DesktopBot):
         """
         try:
             logging.info("Selecionando período: %s", periodo)
+            tela = f"periodo:{periodo}"
+            if self.is_screen(tela, periodo):
+                logging.info("Período já selecionado: %s", periodo)
+                return
             if self.validate_list_exists(path=str(self.dir_selecione_periodo)):
                 self.find_click_list_image(path=str(self.dir_selecione_periodo))
+                caixa = self.state.element
                 self.click_image(periodo)
             else:
                 if self.validate_exists(identifier=periodo):
-                    pass
+                    caixa = self.state.element
                 elif periodo_anterior and self.validate_exists(
                     identifier=periodo_anterior
                 ):
                     self.click_image(periodo_anterior, confidence=0.8)
+                    caixa = self.state.element
                     self.click_image(periodo, confidence=0.8)
                 else:
                     raise UIError(f"Erro ao selecionar período: {periodo}")
+            self._registrar_selecao(tela, caixa)
         except UIError:
             raise
         except Exception as e:
             raise UIError("[FALHA]: Ao selecionar o período.") from e
 
+    def _registrar_selecao(self, tela: str, caixa: Any) -> None:
+        """
+        Registra a aparência de um elemento que identifica o passo, como a
+        combobox após uma seleção, no índice de telas, para que as próximas
+        passagens pelo mesmo passo possam pulá-lo. A impressão digital não
+        distingue textos curtos, então quem consulta o índice confirma o passo
+        buscando a imagem do valor esperado dentro da mesma região.
+
+        Args:
+            tela (str): Nome do estado no índice de telas.
+            caixa (Any): Posição do elemento na tela.
+        """
+        if caixa is None or tela in fingerprint.screens:
+            return
+        self.wait_until_stable(timeout=1)
+        margem = 4
+        self.register_screen(
+            tela,
+            max(0, int(caixa.left) - margem),
+            max(0, int(caixa.top) - margem),
+            int(caixa.width) + 2 * margem,
+            int(caixa.height) + 2 * margem,
+        )
+
     def mudar_tela_pesquisa(self) -> None:
         """
         Muda para a tela de pesquisa.
         """
         try:
             self.wait_window_app(self.nome_app, extension="javaw.exe")
+            if self.is_screen("pesquisa", "button-pesquisar"):
+                logging.info("Tela de pesquisa já aberta")
+                return
             self.find("icon-pesquisa", matching=0.9)
             self.click()
             self.double_click()
+            if "pesquisa" not in fingerprint.screens:
+                # Só a aba de pesquisa tem o botão Pesquisar; a janela inteira é
+                # parecida demais entre as abas para identificá-la.
+                botao = self.find("button-pesquisar", matching=0.9, waiting_time=5000)
+                self._registrar_selecao("pesquisa", botao)
         except Exception as exc:
             logging.error("Erro ao alterar para tela de pesquisa: %s", exc)
             raise UIError("Falha ao alternar para a aba de pesquisa.") from exc
@@ -447,13 +647,13 @@ class ReceitaNetBx(DesktopBot):
             logging.info("Selecionando o Input -> Data Inicio <-")
             if self.validate_exists(identifier="input-data-inicio"):
                 self.double_click()
-                time.sleep(0.5)
+                self.wait_until_stable(timeout=0.5, replaces=0.5)
                 self.type_key(primeiro_dia)
                 self.tab()
                 logging.info("Selecionando o Input -> Data Fim <-")
                 if self.validate_exists(identifier="input-data-fim"):
                     self.double_click()
-                    time.sleep(0.5)
+                    self.wait_until_stable(timeout=0.5, replaces=0.5)
                     self.type_key(ultimo_dia)
                     self.enter()
                 else:
@@ -560,89 +760,30 @@ class ReceitaNetBx(DesktopBot):
         Returns:
             Dict[str, str]: Dicionário de resultados se bem-sucedido, gera DownloadError caso contrário.
         """
-        # Reseta o estado antes de cada chamada para permitir reutilização da instância.
-        self.found.clear()
-        self.result = None
-
         try:
-            while True:
-                if not self.validate_exists(identifier="msg-aguardando"):
-                    break
-
-            popups = [
-                (
-                    "msg-falha-comunicacao",
-                    False,
-                    "Falha na comunicação com o sistema do Receita Net!",
-                    "Falha",
-                    "Falha na comunicação com o sistema do Receita Net!",
-                ),
-                (
-                    "pop-up-pedido",
-                    True,
-                    "Pedido Registrado Com Sucesso",
-                    "Processando...",
-                    "Pedido Registrado Com Sucesso!",
-                ),
-                (
-                    "pop-up-error",
-                    False,
-                    "Erro ao registrar o pedido",
-                    "Falha",
-                    "Erro ao registrar o pedido!",
-                ),
-                (
-                    "pop-up-nao-encontrado",
-                    False,
-                    "Não foi encontrado nenhum arquivo correspondente a pesquisa!",
-                    "Processado",
-                    "Não foi localizado nenhum arquivo!",
-                ),
-                (
-                    "popup-nenhum-arquivo",
-                    False,
-                    "Não foi encontrado nenhum arquivo correspondente a pesquisa!",
-                    "Processado",
-                    "Não foi localizado nenhum arquivo!",
-                ),
-                (
-                    "msg-erro-data",
-                    False,
-                    "A Data final deve ser igual ou menor que a data atual!",
-                    "Falha",
-                    "A Data final deve ser igual ou menor que a data atual!",
-                ),
-                (
-                    "msg-procuracao-vencida",
-                    False,
-                    "A procuração está vencida!",
-                    "Falha",
-                    "Procuração eletrônica vencida!",
-                ),
-                (
-                    "msg-nao-existe-procuracao",
-                    False,
-                    "Não existe procuração para este CNPJ!",
-                    "Falha",
-                    "Sem procuração para este CNPJ!",
-                ),
-            ]
-
-            threads = []
-            for popup in popups:
-                thread = threading.Thread(
-                    target=self.verificar_popup,
-                    args=(popup[0], popup[1], popup[2], popup[3], popup[4]),
+            espera = self.wait_until_vanished(
+                "msg-aguardando", timeout=600, appear_timeout=10
+            )
+            if espera is None:
+                raise DownloadError(
+                    "[FALHA]: Tempo esgotado aguardando a resposta da Receita."
                 )
-                threads.append(thread)
-                thread.start()
+            logging.info("Resposta da Receita recebida após %.1f s", espera)
 
-            for thread in threads:
-                thread.join()
+            popup = self.classificar_popup()
+            if popup is None:
+                raise DownloadError("Nenhuma condição de popup foi satisfeita")
 
-            if self.found.is_set() and self.result:
-                return self.result
-            raise DownloadError("Nenhuma condição de popup foi satisfeita")
+            label, box = popup
+            desfecho = self.POPUPS[label]
+            self.click_at(box.left + box.width / 2, box.top + box.height / 2)
+            self.enter()
+            logging.info(desfecho.log_msg)
+            return {
+                "acao": desfecho.acao,
+                "status": desfecho.status,
+                "resultado": desfecho.resultado,
+            }
         except DownloadError:
             raise
         except Exception as e:
@@ -675,10 +816,15 @@ class ReceitaNetBx(DesktopBot):
             self.find_click_list_image(
                 path=str(self.list_btn_baixar), match=0.7, max_attempts=10
             )
-            while True:
-                if self.find("fim-download", matching=0.90):
-                    logging.info("Download Finalizado")
-                    break
+            desfecho, _ = self.wait_any(
+                {"fim-download": 0.9, "msg-falha-comunicacao": 0.8, "pop-up-error": 0.8},
+                timeout=self.TEMPO_DOWNLOAD,
+            )
+            if desfecho != "fim-download":
+                raise DownloadError(
+                    f"[FALHA]: Download não finalizado: {desfecho or 'tempo esgotado'}."
+                )
+            logging.info("Download Finalizado")
         except DownloadError:
             raise
         except Exception as e:
@@ -1,5 +1,4 @@
 import logging
-import time
 from pathlib import Path
 from typing import Optional
 
@@ -59,12 +58,9 @@ class Sped(DesktopBot):
         Returns:
             bool: True se o elemento for encontrado dentro do tempo limite.
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self.find(element, matching=matching):
-                return True
-            time.sleep(0.5)
-        return False
+        # find paces its captures with the poll scheduler of DesktopBot.
+        elemento = self.find(element, matching=matching, waiting_time=timeout * 1000)
+        return elemento is not None
 
     def _solicitar_arquivos_criterios_acima(self, tipo: str) -> None:
         """
@@ -89,7 +85,15 @@ class Sped(DesktopBot):
         """
         logging.info("Selecionando o botão -> PESQUISAR <-")
         self.click_image("button-pesquisar")
-        if self.wait_for_element("resultado-pesquisa"):
+        desfecho, _ = self.receitanet.wait_any(
+            {
+                "resultado-pesquisa": 0.97,
+                "pop-up-nao-encontrado": 0.8,
+                "popup-nenhum-arquivo": 0.8,
+            },
+            timeout=30,
+        )
+        if desfecho == "resultado-pesquisa":
             logging.info("Arquivo encontrado")
             self.find_click_list_image(path=str(self.dir_selector_box))
             has_btn = self.wait_for_element(
@@ -132,10 +136,10 @@ class Sped(DesktopBot):
         try:
             if self.find("resultado-pesquisa", matching=0.9):
                 logging.info("Arquivo encontrado")
-                time.sleep(5)
+                self.wait_until_stable(timeout=5, replaces=5)
                 logging.info("Validando se existe o marcador no seletor")
                 self.find_click_list_image(path=str(self.dir_selector_box))
-                time.sleep(10)
+                self.wait_until_stable(timeout=10, replaces=10)
                 logging.info("Selecionando botão -> SOLICITAR ARQUIVOS MARCADOS <-")
                 self.click_image("button-solicitar-arquivos-marcados")
                 if self.receitanet.validar_solicitacao():
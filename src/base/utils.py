@@ -52,6 +52,27 @@ def only_if_element(func):
     return wrapper
 
 
+def input_action(func):
+    """
+    Decorator which notifies the bot after an input action through `_on_input`.
+
+    Args:
+        func (callable): The function to be wrapped
+
+    Returns:
+        wrapper (callable): The decorated function
+    """
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self._on_input()
+
+    return wrapper
+
+
 def find_bot_class(module):
     """
     Args:
@@ -66,3 +66,15 @@ class Settings:
         "RECEITANET_ONEDRIVE_DIR",
         str(Path.home() / "OneDrive - Alianzo" / "ReceitaNet-Bx")
     )
+
+    # Modo servidor (main.py --daemon): escuta apenas localhost por padrão.
+    RECEITANET_DAEMON_HOST = os.getenv("RECEITANET_DAEMON_HOST", "127.0.0.1")
+    RECEITANET_DAEMON_PORT = int(os.getenv("RECEITANET_DAEMON_PORT", "8765"))
+    RECEITANET_DAEMON_QUEUE = int(os.getenv("RECEITANET_DAEMON_QUEUE", "100"))
+    # Segundos sem jobs antes de fechar o aplicativo.
+    RECEITANET_DAEMON_IDLE = float(os.getenv("RECEITANET_DAEMON_IDLE", "600"))
+
+    # Durações dos jobs dos modos lote e servidor, usadas para ordenar os lotes.
+    RECEITANET_TIMING_LOG = os.getenv(
+        "RECEITANET_TIMING_LOG", str(PROJECT_ROOT / "logs" / "tempos.jsonl")
+    )
@@ -1,7 +1,6 @@
+import collections
 import ctypes
-import functools
 import logging
-import multiprocessing
 import os
 import platform
 import random
@@ -9,17 +8,37 @@ import subprocess
 import time
 import webbrowser
 
+import cv2
 import psutil
-import pyautogui
 import pyperclip
-import win32gui
 from PIL import Image
 
+try:
+    import pyautogui
+except Exception:  # No display available, e.g. replaying captured frames on Linux.
+    pyautogui = None
+
+try:
+    import win32gui
+except ImportError:  # Not on Windows.
+    win32gui = None
+
 from src.base.bot import BaseBot
 from src.base.state import State
-from src.base.utils import is_retina, only_if_element
-
-from . import config, cv2find, os_compat
+from src.base.utils import input_action, is_retina, only_if_element
+
+from . import (
+    capture,
+    config,
+    cv2find,
+    fingerprint,
+    frames,
+    locations,
+    os_compat,
+    polling,
+    templates,
+    workers,
+)
 
 try:
     from pywinauto.application import Application, WindowSpecification
@@ -30,6 +49,28 @@ except ImportError:
 
 from .application.utils import Backend, if_app_connected, if_windows_os
 
+Anchor = collections.namedtuple("Anchor", "label margin matching extent")
+
+
+def _pyautogui():
+    """
+    Return the PyAutoGUI module, failing clearly when it could not be imported.
+    """
+    if pyautogui is None:
+        raise RuntimeError(
+            "PyAutoGUI is not available: mouse and keyboard input needs a display."
+        )
+    return pyautogui
+
+
+def _win32gui():
+    """
+    Return the win32gui module, failing clearly when it could not be imported.
+    """
+    if win32gui is None:
+        raise RuntimeError("win32gui is not available: it requires pywin32 on Windows.")
+    return win32gui
+
 
 class DesktopBot(BaseBot):
     """
@@ -39,13 +80,27 @@ class DesktopBot(BaseBot):
     Attributes:
         state (State): The internal state of this bot.
         maestro (BotMaestroSDK): an instance to interact with the BotMaestro server.
+        exact_match (bool): Whether or not the image searches look first for an occurrence
+            matching pixel for pixel, which is much cheaper than the correlation when it
+            hits but adds to its cost on a miss.
+        prefilter (bool): Whether or not `find_all` prunes the positions by the
+            discriminative pixels of the image before the correlation.
 
     """
 
+    # Maximum number of raw hits ranked by find_all before removing overlaps.
+    FIND_ALL_LIMIT = 1000
+
     def __init__(self):
         super().__init__()
         self._app = None
         self.state = State()
+        self.capture = capture.create()
+        self.exact_match = config.EXACT_MATCH
+        self.prefilter = config.MATCH_PREFILTER
+        self._anchors = {}
+        self._anchored = {}
+        self._anchor_boxes = {}
         self._interval = 0.005 if platform.system() == "Darwin" else 0.0
         # For parity with Java
         self.addImage = self.add_image
@@ -135,6 +190,288 @@ class DesktopBot(BaseBot):
         img = Image.open(path)
         return img
 
+    def preload_images(self, labels=None):
+        """
+        Decode the images from the state image map into the template store.
+
+        Args:
+            labels (list, optional): The image identifiers to preload. Defaults to all
+                images in the state image map.
+
+        Returns:
+            count (int): Number of templates available in the store.
+        """
+        if labels is None:
+            labels = list(self.state.map_images)
+        paths = [self.state.map_images[la] for la in labels]
+        return templates.store.preload(paths)
+
+    def screen_state(self, names=None):
+        """
+        Classify the current screen among the screens known by `fingerprint.screens`.
+
+        Args:
+            names (list, optional): The screen names to consider. Defaults to all.
+
+        Returns:
+            name (str): The name of the screen showing. None if it is not a known screen.
+        """
+        name, _ = fingerprint.screens.classify(self._screenshot_array(), names)
+        return name
+
+    def is_screen(self, name, label=None, matching=0.9):
+        """
+        Whether the screen showing is the given known screen.
+
+        The fingerprint tolerates small changes, so it cannot tell apart controls
+        that differ only by a short text, like a combobox showing "SPED ECF" or
+        "SPED Fiscal". For those the screen is confirmed by matching the image of
+        the expected content inside the fingerprint region on the same frame.
+
+        Args:
+            name (str): The screen name.
+            label (str, optional): The image identifier that must also be found inside
+                the region of the screen. Defaults to None (fingerprint only).
+            matching (float, optional): The matching index for the label ranging from 0 to 1.
+                Defaults to 0.9.
+
+        Returns:
+            bool: True if the current frame matches a fingerprint of the screen.
+        """
+        if name not in fingerprint.screens:
+            return False
+        haystack = self._screenshot_array()
+        if not fingerprint.screens.matches(name, haystack):
+            return False
+        if label is None:
+            return True
+        needle = self._template_image(self._search_image_file(label))
+        ele = cv2find.locate_opencv(
+            needle,
+            haystack,
+            region=fingerprint.screens.region(name),
+            confidence=matching,
+            exact=self.exact_match,
+        )
+        return ele is not None
+
+    def register_screen(self, name, x=None, y=None, width=None, height=None):
+        """
+        Register the current frame as a known screen.
+
+        Args:
+            name (str): The screen name.
+            x (int, optional): Identifying region start position x. Defaults to 0.
+            y (int, optional): Identifying region start position y. Defaults to 0.
+            width (int, optional): Identifying region width. Defaults to screen width.
+            height (int, optional): Identifying region height. Defaults to screen height.
+        """
+        region = None
+        if width and height:
+            region = (x or 0, y or 0, width, height)
+        fingerprint.screens.register(name, self._screenshot_array(), region)
+
+    def add_anchor(
+        self,
+        name,
+        label,
+        labels=(),
+        margin=config.ANCHOR_MARGIN,
+        matching=0.8,
+        extent=None,
+    ):
+        """
+        Declare a named anchor, such as an application window or a dialog, and the
+        labels that show up inside it.
+
+        Searches for those labels without an explicit region cover only the
+        anchor rectangle plus the margin. The anchor is located on first use and
+        located again when it is no longer where it was last seen.
+
+        Args:
+            name (str): The anchor name.
+            label (str): The image identifier of the anchor.
+            labels (list, optional): The image identifiers searched relative to the anchor.
+            margin (int, optional): Pixels added around the anchor rectangle.
+                Defaults to `config.ANCHOR_MARGIN`.
+            matching (float, optional): The matching index of the anchor image. Defaults to 0.8.
+            extent (tuple, optional): Area (left, top, width, height) covered by the anchor,
+                relative to the top left corner of the anchor image, such as the whole
+                window around a small logo. Defaults to the anchor image itself.
+        """
+        self._anchors[name] = Anchor(label, margin, matching, extent)
+        self._anchor_boxes.pop(name, None)
+        for la in labels:
+            self._anchored[la] = name
+
+    def locate_anchor(self, name):
+        """
+        Locate an anchor on the whole screen in the current frame.
+
+        Args:
+            name (str): The anchor name.
+
+        Returns:
+            element (NamedTuple): The anchor coordinates. None if it is not showing.
+        """
+        anchor = self._anchors[name]
+        path = self._search_image_file(anchor.label)
+        screen_w, screen_h = self._fix_display_size()
+        region = (0, 0, screen_w, screen_h)
+        box = self._locate_with_prior(
+            self._template_image(path),
+            self._screenshot_array(region=region),
+            path,
+            region,
+            confidence=anchor.matching,
+        )
+        if box is None:
+            self._anchor_boxes.pop(name, None)
+        else:
+            self._anchor_boxes[name] = box
+        return box
+
+    def _anchor_region(self, name, relocate=False):
+        """
+        Return the search region of the labels of an anchor.
+
+        Args:
+            name (str): The anchor name.
+            relocate (bool, optional): Whether or not to locate the anchor again instead of
+                using its last known location. Defaults to False.
+
+        Returns:
+            region (tuple): The anchor area (its extent, or the anchor image rectangle) plus
+                the margin, clipped to the screen. None if the anchor is not showing.
+        """
+        box = None if relocate else self._anchor_boxes.get(name)
+        if box is None:
+            box = self.locate_anchor(name)
+        if box is None:
+            return None
+        anchor = self._anchors[name]
+        if anchor.extent is not None:
+            left, top, width, height = anchor.extent
+            box = cv2find.Box(box.left + left, box.top + top, width, height)
+        margin = anchor.margin
+        screen_w, screen_h = self._fix_display_size()
+        left, top = max(0, box.left - margin), max(0, box.top - margin)
+        right = min(screen_w, box.left + box.width + margin)
+        bottom = min(screen_h, box.top + box.height + margin)
+        return left, top, right - left, bottom - top
+
+    def _anchor_in_place(self, name, haystack, region):
+        """
+        Whether an anchor is still at its last known location.
+
+        Args:
+            name (str): The anchor name.
+            haystack (numpy.ndarray): The capture of the anchor region.
+            region (tuple): Bounding box (left, top, width, height) captured in the haystack.
+
+        Returns:
+            bool: True if the anchor image matches at its last known location.
+        """
+        anchor = self._anchors[name]
+        box = self._anchor_boxes.get(name)
+        if box is None:
+            return False
+        left, top = box.left - region[0], box.top - region[1]
+        window = haystack[top: top + box.height, left: left + box.width]
+        needle = self._template_image(
+            self._search_image_file(anchor.label), grayscale=haystack.ndim == 2
+        )
+        if window.shape[:2] != needle.shape[:2]:
+            return False
+        if self.exact_match and cv2.norm(window, needle, cv2.NORM_INF) == 0:
+            return True
+        return cv2find.locate_opencv(needle, window, confidence=anchor.matching) is not None
+
+    def _template_image(self, path, grayscale=False):
+        """
+        Return the decoded template for the image at the given path.
+
+        Args:
+            path (str): Path for the image on disk.
+            grayscale (bool, optional): Whether or not to return the grayscale version.
+                Defaults to False.
+
+        Returns:
+            numpy.ndarray | None: The template ready to be matched or None when path is invalid.
+        """
+        if not path:
+            return None
+        template = templates.store.load(path)
+        return template.gray if grayscale else template.bgr
+
+    def _screenshot_array(self, grayscale=False, region=None):
+        """
+        Capture a region of the screen already converted to be matched.
+
+        Args:
+            grayscale (bool, optional): Whether or not to convert to grayscale.
+                Defaults to False.
+            region (tuple, optional): Bounding box (left, top, width, height) to capture.
+                Defaults to the whole screen.
+
+        Returns:
+            numpy.ndarray: The captured region as a BGR or grayscale array. Its top left
+                pixel is the top left corner of the region.
+        """
+        return cv2find._load_cv2(self.capture.grab(region), grayscale)
+
+    def _locate_with_prior(self, needle, haystack, key, region, matcher=None, **kwargs):
+        """
+        Locate the best hit of a needle, searching first around its last known location.
+
+        A hit around the last location is taken as is only when it scores like the
+        best hit seen there (`LocationPrior.trusts`); otherwise the whole region is
+        searched as well and the better of the two hits wins, so a weaker look-alike
+        left at the remembered spot does not hide a better match elsewhere.
+
+        Args:
+            needle (numpy.ndarray): The template to search for.
+            haystack (numpy.ndarray): The capture of the region in which to search.
+            key (str): The image identifier used to store its location.
+            region (tuple): Bounding box (left, top, width, height) captured in the haystack.
+            matcher (frames.IncrementalMatcher, optional): Matcher kept across the frames of
+                a wait loop, used for the search of the whole region.
+            **kwargs: Extra arguments for `cv2find.locate_best_opencv`.
+
+        Returns:
+            element (NamedTuple): The element coordinates. None if not found.
+        """
+        screen_w, screen_h = self._fix_display_size()
+        resolution = "{}x{}".format(screen_w, screen_h)
+        left, top = region[0], region[1]
+        bounds = (left, top, haystack.shape[1], haystack.shape[0])
+        prior = locations.priors.region(resolution, key, bounds)
+        kwargs.setdefault("exact", self.exact_match)
+        match = None
+        if prior is not None:
+            match = cv2find.locate_best_opencv(
+                {None: needle},
+                haystack,
+                region=(prior[0] - left, prior[1] - top, prior[2], prior[3]),
+                **kwargs,
+            )
+        if match is None or not locations.priors.trusts(resolution, key, match.score):
+            if matcher is None:
+                full = cv2find.locate_best_opencv({None: needle}, haystack, **kwargs)
+            else:
+                full = None
+                hit = matcher.best(haystack, kwargs["confidence"])
+                if hit is not None:
+                    box = cv2find.Box(hit[0], hit[1], needle.shape[1], needle.shape[0])
+                    full = cv2find.Match(None, box, hit[2])
+            if full is not None and (match is None or full.score > match.score):
+                match = full
+        if match is None:
+            return None
+        ele = match.box._replace(left=match.box.left + left, top=match.box.top + top)
+        locations.priors.record(resolution, key, ele, match.score)
+        return ele
+
     def find_multiple(
         self,
         labels,
@@ -152,6 +489,9 @@ class DesktopBot(BaseBot):
         """
         Find multiple elements defined by label on screen until a timeout happens.
 
+        The images are matched in parallel on each frame by the backend set in
+        `config.MATCHING_BACKEND`.
+
         Args:
             labels (list): A list of image identifiers
             x (int, optional): Search region start position x. Defaults to 0.
@@ -187,7 +527,6 @@ class DesktopBot(BaseBot):
 
         results = [None] * len(labels)
         paths = [self._search_image_file(la) for la in labels]
-        paths = [self._image_path_as_image(la) for la in paths]
 
         if threshold:
             # TODO: Figure out how we should do threshold
@@ -199,24 +538,34 @@ class DesktopBot(BaseBot):
                 "Warning: Ignoring best=False for now. It will be supported in the future."
             )
 
+        gate_key = ("multiple", tuple(paths), region, matching, grayscale)
+        poll = polling.scheduler.loop()
         start_time = time.time()
-        n_cpus = multiprocessing.cpu_count() - 1
+        deadline = start_time + waiting_time / 1000
 
         while True:
             elapsed_time = (time.time() - start_time) * 1000
             if elapsed_time > waiting_time:
                 return _to_dict(labels, results)
 
-            haystack = pyautogui.screenshot()
-            helper = functools.partial(
-                self._find_multiple_helper, haystack, region, matching, grayscale
-            )
-
-            with multiprocessing.Pool(processes=n_cpus) as pool:
-                results = pool.map(helper, paths)
+            haystack = self._screenshot_array(grayscale, region)
+            frame_signature = frames.signature(haystack)
+            if frames.gate.unchanged(gate_key, frame_signature):
+                poll.wait(changed=False, deadline=deadline)
+                continue
 
-            results = [self._fix_retina_element(r) for r in results]
+            results = workers.locate(
+                haystack, paths, matching, grayscale, exact=self.exact_match
+            )
+            results = [
+                None
+                if r is None
+                else self._fix_retina_element(r._replace(left=r.left + x, top=r.top + y))
+                for r in results
+            ]
             if None in results:
+                frames.gate.miss(gate_key, frame_signature)
+                poll.wait(deadline=deadline)
                 continue
             else:
                 return _to_dict(labels, results)
@@ -235,24 +584,272 @@ class DesktopBot(BaseBot):
                 )
             return ele
 
+    def _on_input(self):
+        """
+        Called after every input action to make the polling loops poll fast again
+        and to drop the cached hits, which the action may have moved or hidden.
+        The cache is process-wide, so an action of any bot invalidates the hits of
+        all of them.
+        """
+        polling.scheduler.notify_input()
+        frames.matches.clear()
+
     def _fix_display_size(self):
-        width, height = pyautogui.size()
+        width, height = self.capture.size()
 
         if not is_retina():
             return width, height
 
         return int(width * 2), int(height * 2)
 
-    def _find_multiple_helper(self, haystack, region, confidence, grayscale, needle):
-        ele = cv2find.locate_all_opencv(
-            needle, haystack, region=region, confidence=confidence, grayscale=grayscale
+    def find_best(
+        self,
+        labels,
+        x=None,
+        y=None,
+        width=None,
+        height=None,
+        *,
+        matching=0.9,
+        waiting_time=10000,
+        grayscale=False,
+        pyramid=0,
+    ):
+        """
+        Find the best match among several images until a timeout happens.
+
+        Each iteration takes a single screenshot and matches every image against it.
+
+        Args:
+            labels (list): A list of image identifiers or image file paths.
+            x (int, optional): Search region start position x. Defaults to 0.
+            y (int, optional): Search region start position y. Defaults to 0.
+            width (int, optional): Search region width. Defaults to screen width.
+            height (int, optional): Search region height. Defaults to screen height.
+            matching (float | dict, optional): The matching index ranging from 0 to 1, or a
+                dictionary with the matching index of each label. Defaults to 0.9.
+            waiting_time (int, optional): Maximum wait time (ms) to search for a hit.
+                Defaults to 10000ms (10s).
+            grayscale (bool, optional): Whether or not to convert to grayscale before searching.
+                Defaults to False.
+            pyramid (int, optional): Number of half resolution levels for a coarse-to-fine search
+                of the whole region. Defaults to 0 (full resolution search).
+
+        Returns:
+            match (Match): A NamedTuple with the label, the element coordinates and the score
+                of the best hit. None if not found.
+        """
+        self.state.element = None
+        screen_w, screen_h = self._fix_display_size()
+        x = x or 0
+        y = y or 0
+        w = width or screen_w
+        h = height or screen_h
+
+        region = (x, y, w, h)
+
+        resolution = "{}x{}".format(screen_w, screen_h)
+        paths = {}
+        needles = {}
+        confidences = {}
+        for label in labels:
+            path = label if os.path.isfile(label) else self._search_image_file(label)
+            paths[label] = path
+            needles[label] = self._template_image(path, grayscale)
+            confidences[label] = (
+                matching[label] if isinstance(matching, dict) else matching
+            )
+
+        gate_key = (
+            "best",
+            tuple(paths.values()),
+            region,
+            tuple(confidences.values()),
+            grayscale,
+            pyramid,
+        )
+        # Between polls only the changed parts of the screen are matched again.
+        matchers = {
+            label: frames.IncrementalMatcher(needle, exact=self.exact_match)
+            for label, needle in needles.items()
+        }
+        previous = None
+        poll = polling.scheduler.loop()
+        start_time = time.time()
+        deadline = start_time + waiting_time / 1000
+
+        while True:
+            elapsed_time = (time.time() - start_time) * 1000
+            if elapsed_time > waiting_time:
+                return None
+
+            haystack = self._screenshot_array(grayscale, region)
+            frame_signature = frames.signature(haystack)
+            if frames.gate.unchanged(gate_key, frame_signature):
+                poll.wait(changed=False, deadline=deadline)
+                continue
+
+            bounds = (x, y, haystack.shape[1], haystack.shape[0])
+            match = None
+            # Hits around the last locations that score below the best seen there
+            # only compete with the search of the whole region.
+            weak = None
+            for label, needle in needles.items():
+                prior = locations.priors.region(resolution, paths[label], bounds)
+                if prior is None:
+                    continue
+                hit = cv2find.locate_best_opencv(
+                    {label: needle},
+                    haystack,
+                    region=(prior[0] - x, prior[1] - y, prior[2], prior[3]),
+                    confidence=confidences[label],
+                    exact=self.exact_match,
+                )
+                if hit is None:
+                    continue
+                if not locations.priors.trusts(resolution, paths[label], hit.score):
+                    if weak is None or hit.score > weak.score:
+                        weak = hit
+                elif match is None or hit.score > match.score:
+                    match = hit
+            if match is None and pyramid:
+                hits = workers.threads.map(
+                    lambda label: cv2find.locate_best_opencv(
+                        {label: needles[label]},
+                        haystack,
+                        confidence=confidences[label],
+                        exact=self.exact_match,
+                        pyramid=pyramid,
+                    ),
+                    needles,
+                )
+                for hit in hits:
+                    if hit is not None and (match is None or hit.score > match.score):
+                        match = hit
+            elif match is None:
+                changed = None
+                if previous is not None and previous.shape == haystack.shape:
+                    changed = frames.changed_regions(previous, haystack)
+                previous = haystack
+                index = None
+                if self.exact_match and changed is None:
+                    # Every matcher searches the whole frame; hash it only once.
+                    index = cv2find.RollingHashIndex(haystack)
+                hits = workers.threads.map(
+                    lambda label: matchers[label].best(
+                        haystack, confidences[label], changed, index
+                    ),
+                    matchers,
+                )
+                for label, hit in zip(matchers, hits):
+                    if hit is not None and (match is None or hit[2] > match.score):
+                        needle = needles[label]
+                        box = cv2find.Box(hit[0], hit[1], needle.shape[1], needle.shape[0])
+                        match = cv2find.Match(label, box, hit[2])
+            if weak is not None and (match is None or weak.score > match.score):
+                match = weak
+            if match is not None:
+                box = match.box
+                match = match._replace(box=box._replace(left=box.left + x, top=box.top + y))
+                locations.priors.record(
+                    resolution, paths[match.label], match.box, match.score
+                )
+                ele = self._fix_retina_element(match.box)
+                self.state.element = ele
+                return match._replace(box=ele)
+            frames.gate.miss(gate_key, frame_signature)
+            poll.wait(deadline=deadline)
+
+    def wait_any(
+        self,
+        labels,
+        timeout=10,
+        x=None,
+        y=None,
+        width=None,
+        height=None,
+        *,
+        matching=0.9,
+        grayscale=False,
+        pyramid=0,
+    ):
+        """
+        Wait until any of several elements shows up on screen.
+
+        All the candidates are matched against each captured frame, so the worst case
+        is a single timeout instead of one per candidate.
+
+        Args:
+            labels (list | dict): The image identifiers or image file paths, or a dictionary
+                with the matching index of each one.
+            timeout (int, optional): Maximum wait time (s) for any of the elements.
+                Defaults to 10s.
+            x (int, optional): Search region start position x. Defaults to 0.
+            y (int, optional): Search region start position y. Defaults to 0.
+            width (int, optional): Search region width. Defaults to screen width.
+            height (int, optional): Search region height. Defaults to screen height.
+            matching (float, optional): The matching index ranging from 0 to 1 for the labels
+                without their own. Defaults to 0.9.
+            grayscale (bool, optional): Whether or not to convert to grayscale before searching.
+                Defaults to False.
+            pyramid (int, optional): Number of half resolution levels for a coarse-to-fine search.
+                Defaults to 0 (full resolution search).
+
+        Returns:
+            result (Tuple): The label that showed up and its element coordinates.
+                (None, None) on timeout.
+        """
+        if isinstance(labels, dict):
+            matching = {label: labels[label] or matching for label in labels}
+        match = self.find_best(
+            list(labels),
+            x,
+            y,
+            width,
+            height,
+            matching=matching,
+            waiting_time=timeout * 1000,
+            grayscale=grayscale,
+            pyramid=pyramid,
+        )
+        if match is None:
+            return None, None
+        return match.label, match.box
+
+    def find_list_image(self, path, matching=0.9, waiting_time=10000, grayscale=False):
+        """
+        Find the best match among all the image variants inside a directory.
+
+        Args:
+            path (str): The directory holding the image variants.
+            matching (float, optional): The matching index ranging from 0 to 1.
+                Defaults to 0.9.
+            waiting_time (int, optional): Maximum wait time (ms) to search for a hit.
+                Defaults to 10000ms (10s).
+            grayscale (bool, optional): Whether or not to convert to grayscale before searching.
+                Defaults to False.
+
+        Returns:
+            match (Match): A NamedTuple with the variant path, the element coordinates and the
+                score of the best hit. None if not found.
+        """
+        variants = [
+            os.path.join(root, file)
+            for root, dirs, files in os.walk(path)
+            for file in sorted(files)
+        ]
+        if not variants:
+            return None
+        return self.find_best(
+            variants,
+            matching=matching,
+            waiting_time=waiting_time,
+            grayscale=grayscale,
         )
-        return ele
 
     def find_click_image(self, identifier, match):
+        # wait_find_image leaves the hit in state.element.
         self.wait_find_image(identifier, match)
-        if not self.find(identifier, matching=match):
-            self.not_found(identifier)
         self.click()
 
     """def find_click_list_image(self, path, match):
@@ -273,14 +870,18 @@ class DesktopBot(BaseBot):
             raise Exception('Fail click element {} not found'.format(path))"""
 
     def wait_find_image(self, identifier, match=0.90, tempo=120):
+        poll = polling.scheduler.loop()
         start_time = time.time()
+        deadline = start_time + tempo
         while (time.time() - start_time) < tempo:
             try:
-                if self.find(identifier, matching=match):
+                # find already paces its captures with the poll scheduler.
+                remaining = deadline - time.time()
+                if self.find(identifier, matching=match, waiting_time=remaining * 1000):
                     logging.info(f"Imagem {identifier} encontrada.")
                     return True
-                time.sleep(1)  # Aguarde um pequeno intervalo antes de tentar novamente
             except FileNotFoundError:
+                poll.wait(deadline=deadline)
                 continue  # Continue tentando até que o tempo acabe
             except Exception as e:
                 logging.error(f"Erro ao procurar elemento: {e}")
@@ -294,48 +895,23 @@ class DesktopBot(BaseBot):
         )
 
     def find_click_list_image(self, path, match=0.90, max_attempts=4):
-        tentativas = 0
-        while tentativas < max_attempts:
-            try:
-                for root, dirs, files in os.walk(path):
-                    for file in files:
-                        image = os.path.join(path, file)
-                        self.add_image("image", image)
-                        if self.find("image", matching=match):
-                            logging.info("Success click element {} found".format(path))
-                            self.click()
-                            return True
-                raise FileNotFoundError
-            except FileNotFoundError:
-                tentativas += 1
-                if tentativas == max_attempts:
-                    raise FileNotFoundError(
-                        "Fail click element {} not found".format(path)
-                    )
-            except Exception as e:
-                logging.error("Unexpected error: {}".format(e))
-                raise Exception("Fail click element {} not found".format(path))
+        try:
+            for _ in range(max_attempts):
+                if self.find_list_image(path, matching=match):
+                    logging.info("Success click element {} found".format(path))
+                    self.click()
+                    return True
+        except Exception as e:
+            logging.error("Unexpected error: {}".format(e))
+            raise Exception("Fail click element {} not found".format(path))
+        raise FileNotFoundError("Fail click element {} not found".format(path))
 
     def wait_find_list_image(self, path, match=0.90, tempo=120):
-        start_time = time.time()
-        while (time.time() - start_time) < tempo:
-            try:
-                found = False
-                for root, dirs, files in os.walk(path):
-                    for file in files:
-                        if found:
-                            break
-                        image = os.path.join(root, file)
-                        self.add_image("image", image)
-                        if self.find("image", matching=match):
-                            return True
-                if not found:
-                    raise FileNotFoundError
-                time.sleep(1)  # Aguarde um pequeno intervalo antes de tentar novamente
-            except FileNotFoundError:
-                continue  # Continue tentando até que o tempo acabe
-            except Exception as e:
-                raise Exception(f"Erro ao procurar elemento: {e}")
+        try:
+            if self.find_list_image(path, matching=match, waiting_time=tempo * 1000):
+                return True
+        except Exception as e:
+            raise Exception(f"Erro ao procurar elemento: {e}")
         raise FileNotFoundError(
             f"Falha ao encontrar a imagem, {path} não encontrado após {tempo} segundos."
         )
@@ -347,18 +923,13 @@ class DesktopBot(BaseBot):
             raise Exception("Fail click element {} not found".format(identifier))
 
     def validate_exists(self, identifier, match=0.90):
-        if self.find(identifier, matching=match):
+        # A presence check must look at the screen, not at a recent hit.
+        if self.find(identifier, matching=match, cached=False):
             return True
         return False
 
     def validate_list_exists(self, path, match=0.90):
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                image = path + "\\" + file
-                self.add_image("image", image)
-                if self.find("image", matching=match):
-                    return True
-        return False
+        return self.find_list_image(path, matching=match) is not None
 
     def not_found(self, element):
         raise ValueError("Could not find element: {}".format(element))
@@ -376,6 +947,8 @@ class DesktopBot(BaseBot):
         waiting_time=10000,
         best=True,
         grayscale=False,
+        pyramid=0,
+        cached=True,
     ):
         """
         Find an element defined by label on screen until a timeout happens.
@@ -396,6 +969,11 @@ class DesktopBot(BaseBot):
                 Defaults to True.
             grayscale (bool, optional): Whether or not to convert to grayscale before searching.
                 Defaults to False.
+            pyramid (int, optional): Number of half resolution levels for a coarse-to-fine search.
+                Defaults to 0 (full resolution search).
+            cached (bool, optional): Whether or not a recent hit of the same search may be
+                returned without looking at the screen. Presence checks pass False, since
+                the application may have changed the screen by itself. Defaults to True.
 
         Returns:
             element (NamedTuple): The element coordinates. None if not found.
@@ -411,6 +989,8 @@ class DesktopBot(BaseBot):
             waiting_time=waiting_time,
             best=best,
             grayscale=grayscale,
+            pyramid=pyramid,
+            cached=cached,
         )
 
     def find_until(
@@ -426,10 +1006,18 @@ class DesktopBot(BaseBot):
         waiting_time=10000,
         best=True,
         grayscale=False,
+        pyramid=0,
+        cached=True,
     ):
         """
         Find an element defined by label on screen until a timeout happens.
 
+        Labels declared with `add_anchor` are searched only around their anchor
+        when no region is given, falling back to the whole screen when the
+        anchor is not showing. A hit is reused by the following searches of the
+        same label and region until an input action or `config.MATCH_CACHE_MAX_AGE`
+        invalidates it, unless `cached` is False.
+
         Args:
             label (str): The image identifier
             x (int, optional): Search region start position x. Defaults to 0.
@@ -446,21 +1034,45 @@ class DesktopBot(BaseBot):
                 Defaults to True.
             grayscale (bool, optional): Whether or not to convert to grayscale before searching.
                 Defaults to False.
+            pyramid (int, optional): Number of half resolution levels for a coarse-to-fine search.
+                Defaults to 0 (full resolution search).
+            cached (bool, optional): Whether or not a recent hit of the same search may be
+                returned without looking at the screen. Presence checks pass False, since
+                the application may have changed the screen by itself. Defaults to True.
 
         Returns:
             element (NamedTuple): The element coordinates. None if not found.
         """
         self.state.element = None
+        element_path = self._search_image_file(label)
+        cache_key = ("find", element_path, (x, y, width, height), threshold, grayscale)
+        if cached:
+            ele = frames.matches.get(cache_key, matching)
+            if ele is not None:
+                self.state.element = ele
+                return ele
+        else:
+            # The hit found now, if any, replaces the cached one.
+            frames.matches.discard(cache_key)
+
         screen_w, screen_h = self._fix_display_size()
+        anchor = None
+        if x is None and y is None and width is None and height is None:
+            anchor = self._anchored.get(label)
         x = x or 0
         y = y or 0
         w = width or screen_w
         h = height or screen_h
 
         region = (x, y, w, h)
+        if anchor is not None:
+            anchor_region = self._anchor_region(anchor)
+            if anchor_region is None:
+                anchor = None
+            else:
+                region = anchor_region
 
-        element_path = self._search_image_file(label)
-        element_path = self._image_path_as_image(element_path)
+        needle = self._template_image(element_path, grayscale)
 
         if threshold:
             # TODO: Figure out how we should do threshold
@@ -472,30 +1084,212 @@ class DesktopBot(BaseBot):
                 "Warning: Ignoring best=False for now. It will be supported in the future."
             )
 
+        # Between polls only the changed parts of the screen are matched again.
+        matcher = (
+            None if pyramid else frames.IncrementalMatcher(needle, exact=self.exact_match)
+        )
+        poll = polling.scheduler.loop()
         start_time = time.time()
+        deadline = start_time + waiting_time / 1000
 
         while True:
             elapsed_time = (time.time() - start_time) * 1000
             if elapsed_time > waiting_time:
                 return None
 
-            haystack = self.get_screenshot()
-            it = cv2find.locate_all_opencv(
+            gate_key = ("find", element_path, region, matching, grayscale, pyramid)
+            haystack = self._screenshot_array(grayscale, region)
+            if anchor is not None and not self._anchor_in_place(anchor, haystack, region):
+                # The anchor moved or closed: follow it or search the whole screen.
+                region = self._anchor_region(anchor, relocate=True)
+                if region is None:
+                    anchor = None
+                    region = (x, y, w, h)
+                poll.wait(deadline=deadline)
+                continue
+            frame_signature = frames.signature(haystack)
+            if frames.gate.unchanged(gate_key, frame_signature):
+                poll.wait(changed=False, deadline=deadline)
+                continue
+
+            ele = self._locate_with_prior(
+                needle,
+                haystack,
                 element_path,
-                haystack_image=haystack,
-                region=region,
+                region,
+                matcher=matcher,
                 confidence=matching,
                 grayscale=grayscale,
+                pyramid=pyramid,
             )
-            try:
-                ele = next(it)
-            except StopIteration:
-                ele = None
 
             if ele is not None:
                 ele = self._fix_retina_element(ele)
                 self.state.element = ele
+                frames.matches.put(cache_key, matching, ele)
                 return ele
+            frames.gate.miss(gate_key, frame_signature)
+            poll.wait(deadline=deadline)
+
+    def wait_until_vanished(
+        self,
+        label,
+        timeout=600,
+        x=None,
+        y=None,
+        width=None,
+        height=None,
+        *,
+        matching=0.9,
+        grayscale=False,
+        appear_timeout=0,
+        margin=20,
+    ):
+        """
+        Wait until an element defined by label is no longer on screen.
+
+        Once the element is found the search is narrowed to its box plus a margin,
+        clipped to the screen and to the given region, and captures are paced by
+        `polling.scheduler`, backing off while the captured area does not change.
+        A miss in the narrowed area is confirmed on the whole region before
+        returning.
+
+        Args:
+            label (str): The image identifier
+            timeout (int, optional): Maximum wait time (s) for the element to vanish.
+                Defaults to 600s.
+            x (int, optional): Search region start position x. Defaults to 0.
+            y (int, optional): Search region start position y. Defaults to 0.
+            width (int, optional): Search region width. Defaults to screen width.
+            height (int, optional): Search region height. Defaults to screen height.
+            matching (float, optional): The matching index ranging from 0 to 1.
+                Defaults to 0.9.
+            grayscale (bool, optional): Whether or not to convert to grayscale before searching.
+                Defaults to False.
+            appear_timeout (int, optional): Time (s) the element may take to show up before
+                being considered gone. Defaults to 0.
+            margin (int, optional): Pixels around the element kept in the narrowed search.
+                Defaults to 20.
+
+        Returns:
+            elapsed (float): Seconds waited until the element vanished. None on timeout.
+        """
+        screen_w, screen_h = self._fix_display_size()
+        x = x or 0
+        y = y or 0
+        w = width or screen_w
+        h = height or screen_h
+
+        full_region = (x, y, w, h)
+        region = full_region
+
+        element_path = self._search_image_file(label)
+        needle = self._template_image(element_path, grayscale)
+
+        poll = polling.scheduler.loop()
+        last_signature = None
+        seen = False
+        start_time = time.time()
+        deadline = start_time + timeout
+
+        while True:
+            elapsed_time = time.time() - start_time
+            if elapsed_time > timeout:
+                return None
+
+            haystack = self._screenshot_array(grayscale, region)
+            frame_signature = frames.signature(haystack)
+            if frame_signature == last_signature:
+                if not seen and elapsed_time >= appear_timeout:
+                    # The element was missing from this same frame and had its
+                    # time to show up.
+                    return time.time() - start_time
+                poll.wait(changed=False, deadline=deadline)
+                continue
+            last_signature = frame_signature
+
+            ele = cv2find.locate_opencv(
+                needle, haystack, confidence=matching, exact=self.exact_match
+            )
+            if ele is None and region != full_region:
+                # The element may have moved out of the narrowed area.
+                region = full_region
+                last_signature = None
+                continue
+            if ele is None:
+                if seen or elapsed_time >= appear_timeout:
+                    return time.time() - start_time
+            else:
+                seen = True
+                # The box plus the margin, kept inside the screen and the caller's
+                # region.
+                left = max(0, x, region[0] + ele.left - margin)
+                top = max(0, y, region[1] + ele.top - margin)
+                right = min(screen_w, x + w, region[0] + ele.left + ele.width + margin)
+                bottom = min(screen_h, y + h, region[1] + ele.top + ele.height + margin)
+                narrowed = (left, top, right - left, bottom - top)
+                if narrowed != region:
+                    region = narrowed
+                    last_signature = None
+            poll.wait(deadline=deadline)
+
+    def wait_until_stable(
+        self,
+        x=None,
+        y=None,
+        width=None,
+        height=None,
+        *,
+        quiet_ms=200,
+        timeout=5,
+        replaces=None,
+    ):
+        """
+        Wait until a region of the screen stops repainting.
+
+        Args:
+            x (int, optional): Region start position x. Defaults to 0.
+            y (int, optional): Region start position y. Defaults to 0.
+            width (int, optional): Region width. Defaults to screen width.
+            height (int, optional): Region height. Defaults to screen height.
+            quiet_ms (int, optional): Time (ms) the region must stay unchanged. Defaults to 200ms.
+            timeout (float, optional): Maximum wait time (s). Defaults to 5s.
+            replaces (float, optional): Duration (s) of the fixed sleep this wait replaces. The
+                time saved is added to `polling.savings`.
+
+        Returns:
+            elapsed (float): Seconds waited until the region was stable. None on timeout.
+        """
+        screen_w, screen_h = self._fix_display_size()
+        region = (x or 0, y or 0, width or screen_w, height or screen_h)
+
+        poll = polling.scheduler.loop()
+        last_signature = None
+        stable_since = None
+        start_time = time.time()
+        deadline = start_time + timeout
+
+        while True:
+            frame_signature = frames.signature(self._screenshot_array(region=region))
+            now = time.time()
+            changed = frame_signature != last_signature
+            if changed:
+                last_signature = frame_signature
+                stable_since = now
+            elif (now - stable_since) * 1000 >= quiet_ms:
+                elapsed = now - start_time
+                if replaces is not None:
+                    polling.savings.add(max(0.0, replaces - elapsed))
+                return elapsed
+
+            if now >= deadline:
+                if replaces is not None:
+                    polling.savings.add(max(0.0, replaces - (now - start_time)))
+                return None
+            poll.wait(
+                changed=changed,
+                deadline=min(deadline, stable_since + quiet_ms / 1000),
+            )
 
     def find_all(
         self,
@@ -509,6 +1303,7 @@ class DesktopBot(BaseBot):
         matching=0.9,
         waiting_time=10000,
         grayscale=False,
+        pyramid=0,
     ):
         """
         Find all elements defined by label on screen until a timeout happens.
@@ -527,40 +1322,13 @@ class DesktopBot(BaseBot):
                 Defaults to 10000ms (10s).
             grayscale (bool, optional): Whether or not to convert to grayscale before searching.
                 Defaults to False.
+            pyramid (int, optional): Number of half resolution levels for a coarse-to-fine search.
+                Defaults to 0 (full resolution search).
 
         Returns:
             elements (collections.Iterable[NamedTuple]): A generator with all element coordinates fount.
                 None if not found.
         """
-
-        def deduplicate(elems):
-            def find_same(item, items):
-                x_start = item.left
-                x_end = item.left + item.width
-                y_start = item.top
-                y_end = item.top + item.height
-                similars = []
-                for itm in items:
-                    if itm == item:
-                        continue
-                    if (itm.left >= x_start and itm.left < x_end) and (
-                        itm.top >= y_start and itm.top < y_end
-                    ):
-                        similars.append(itm)
-                        continue
-                return similars
-
-            index = 0
-            while True:
-                try:
-                    dups = find_same(elems[index], elems[index:])
-                    for d in dups:
-                        elems.remove(d)
-                    index += 1
-                except IndexError:
-                    break
-            return elems
-
         self.state.element = None
         screen_w, screen_h = self._fix_display_size()
         x = x or 0
@@ -571,32 +1339,46 @@ class DesktopBot(BaseBot):
         region = (x, y, w, h)
 
         element_path = self._search_image_file(label)
-        element_path = self._image_path_as_image(element_path)
+        needle = self._template_image(element_path, grayscale)
+        probes = templates.store.load(element_path).probes if self.prefilter else None
 
         if threshold:
             # TODO: Figure out how we should do threshold
             print("Threshold not yet supported")
 
+        gate_key = ("all", element_path, region, matching, grayscale, pyramid)
+        poll = polling.scheduler.loop()
         start_time = time.time()
+        deadline = start_time + waiting_time / 1000
 
         while True:
             elapsed_time = (time.time() - start_time) * 1000
             if elapsed_time > waiting_time:
                 return None
 
-            haystack = self.get_screenshot()
+            haystack = self._screenshot_array(grayscale, region)
+            frame_signature = frames.signature(haystack)
+            if frames.gate.unchanged(gate_key, frame_signature):
+                poll.wait(changed=False, deadline=deadline)
+                continue
+
             eles = cv2find.locate_all_opencv(
-                element_path,
+                needle,
                 haystack_image=haystack,
-                region=region,
+                limit=self.FIND_ALL_LIMIT,
                 confidence=matching,
                 grayscale=grayscale,
+                pyramid=pyramid,
+                prefilter=probes,
             )
+            eles = cv2find.suppress_overlaps(list(eles))
             if not eles:
+                frames.gate.miss(gate_key, frame_signature)
+                poll.wait(deadline=deadline)
                 continue
-            eles = deduplicate(list(eles))
             for ele in eles:
                 if ele is not None:
+                    ele = ele._replace(left=ele.left + x, top=ele.top + y)
                     ele = self._fix_retina_element(ele)
                     self.state.element = ele
                     yield ele
@@ -679,7 +1461,10 @@ class DesktopBot(BaseBot):
         Returns:
             Image: The screenshot Image object
         """
-        img = pyautogui.screenshot(filepath, region)
+        frame = self.capture.grab(region)
+        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if filepath:
+            img.save(filepath)
         return img
 
     def get_screenshot(self, filepath=None, region=None):
@@ -713,8 +1498,7 @@ class DesktopBot(BaseBot):
         y = y or 0
         width = width or screen_w
         height = height or screen_h
-        img = pyautogui.screenshot(region=(x, y, width, height))
-        return img
+        return self.screenshot(region=(x, y, width, height))
 
     def save_screenshot(self, path):
         """
@@ -724,7 +1508,7 @@ class DesktopBot(BaseBot):
             path (str): The filepath in which to save the screenshot
 
         """
-        pyautogui.screenshot(path)
+        self.screenshot(path)
 
     def get_element_coords(
         self, label, x=None, y=None, width=None, height=None, matching=0.9, best=True
@@ -760,20 +1544,18 @@ class DesktopBot(BaseBot):
             )
 
         element_path = self._search_image_file(label)
-        element_path = self._image_path_as_image(element_path)
-
-        haystack = self.get_screenshot()
-        it = cv2find.locate_all_opencv(
-            element_path,
-            haystack_image=haystack,
-            region=region,
-            confidence=matching,
-            grayscale=False,
-        )
-        try:
-            ele = next(it)
-        except StopIteration:
-            ele = None
+        needle = self._template_image(element_path)
+
+        gate_key = ("find", element_path, region, matching, False, 0)
+        haystack = self._screenshot_array(region=region)
+        frame_signature = frames.signature(haystack)
+        ele = None
+        if not frames.gate.unchanged(gate_key, frame_signature):
+            ele = self._locate_with_prior(
+                needle, haystack, element_path, region, confidence=matching
+            )
+            if ele is None:
+                frames.gate.miss(gate_key, frame_signature)
 
         if ele is None:
             return None, None
@@ -829,6 +1611,7 @@ class DesktopBot(BaseBot):
     # Mouse
     #######
 
+    @input_action
     def click_on(self, label):
         """
         Click on the element.
@@ -848,7 +1631,7 @@ class DesktopBot(BaseBot):
         Returns:
             x (int): The last x position for the mouse.
         """
-        return pyautogui.position().x
+        return _pyautogui().position().x
 
     def get_last_y(self):
         """
@@ -857,7 +1640,7 @@ class DesktopBot(BaseBot):
         Returns:
             y (int): The last y position for the mouse.
         """
-        return pyautogui.position().y
+        return _pyautogui().position().y
 
     def mouse_move(self, x, y):
         """
@@ -868,8 +1651,9 @@ class DesktopBot(BaseBot):
             y (int): The Y coordinate
 
         """
-        pyautogui.moveTo(x, y)
+        _pyautogui().moveTo(x, y)
 
+    @input_action
     def click_at(self, x, y):
         """
         Click at the coordinate defined by x and y
@@ -880,6 +1664,7 @@ class DesktopBot(BaseBot):
         """
         os_compat.click(x, y)
 
+    @input_action
     @only_if_element
     def click(
         self,
@@ -908,6 +1693,7 @@ class DesktopBot(BaseBot):
         )
         self.sleep(wait_after)
 
+    @input_action
     @only_if_element
     def click_relative(
         self,
@@ -1013,6 +1799,7 @@ class DesktopBot(BaseBot):
             interval_between_clicks=interval_between_clicks,
         )
 
+    @input_action
     def mouse_down(
         self, wait_after=config.DEFAULT_SLEEP_AFTER_ACTION, *, button="left"
     ):
@@ -1023,9 +1810,10 @@ class DesktopBot(BaseBot):
             wait_after (int, optional): Interval to wait after clicking on the element.
             button (str, optional): One of 'left', 'right', 'middle'. Defaults to 'left'
         """
-        pyautogui.mouseDown(button=button)
+        _pyautogui().mouseDown(button=button)
         self.sleep(wait_after)
 
+    @input_action
     def mouse_up(self, wait_after=config.DEFAULT_SLEEP_AFTER_ACTION, *, button="left"):
         """
         Releases the requested mouse button.
@@ -1034,9 +1822,10 @@ class DesktopBot(BaseBot):
             wait_after (int, optional): Interval to wait after clicking on the element.
             button (str, optional): One of 'left', 'right', 'middle'. Defaults to 'left'
         """
-        pyautogui.mouseUp(button=button)
+        _pyautogui().mouseUp(button=button)
         self.sleep(wait_after)
 
+    @input_action
     def scroll_down(self, clicks):
         """
         Scroll Down n clicks
@@ -1044,8 +1833,9 @@ class DesktopBot(BaseBot):
         Args:
             clicks (int): Number of times to scroll down.
         """
-        pyautogui.scroll(-1 * clicks)
+        _pyautogui().scroll(-1 * clicks)
 
+    @input_action
     def scroll_up(self, clicks):
         """
         Scroll Up n clicks
@@ -1053,7 +1843,7 @@ class DesktopBot(BaseBot):
         Args:
             clicks (int): Number of times to scroll up.
         """
-        pyautogui.scroll(clicks)
+        _pyautogui().scroll(clicks)
 
     @only_if_element
     def move(self):
@@ -1061,7 +1851,7 @@ class DesktopBot(BaseBot):
         Move to the center position of last found item.
         """
         x, y = self.state.center()
-        pyautogui.moveTo(x, y)
+        _pyautogui().moveTo(x, y)
 
     def move_relative(self, x, y):
         """
@@ -1074,7 +1864,7 @@ class DesktopBot(BaseBot):
         """
         x = self.get_last_x() + x
         y = self.get_last_y() + y
-        pyautogui.moveTo(x, y)
+        _pyautogui().moveTo(x, y)
 
     def move_random(self, range_x, range_y):
         """
@@ -1087,8 +1877,9 @@ class DesktopBot(BaseBot):
         """
         x = int(random.random() * range_x)
         y = int(random.random() * range_y)
-        pyautogui.moveTo(x, y)
+        _pyautogui().moveTo(x, y)
 
+    @input_action
     @only_if_element
     def right_click(
         self,
@@ -1115,6 +1906,7 @@ class DesktopBot(BaseBot):
         )
         self.sleep(wait_after)
 
+    @input_action
     def right_click_at(self, x, y):
         """
         Right click at the coordinate defined by x and y
@@ -1166,6 +1958,7 @@ class DesktopBot(BaseBot):
         """
         self.kb_type(text=text, interval=interval / 1000.0)
 
+    @input_action
     def kb_type(self, text, interval=0):
         """
         Type a text char by char (individual key events).
@@ -1176,10 +1969,11 @@ class DesktopBot(BaseBot):
 
         """
         self.control_a()
-        pyautogui.press("backspace")
-        pyautogui.write(text, interval=interval / 1000.0)
+        _pyautogui().press("backspace")
+        _pyautogui().write(text, interval=interval / 1000.0)
         self.sleep(config.DEFAULT_SLEEP_AFTER_ACTION)
 
+    @input_action
     def paste(self, text=None, wait=0):
         """
         Paste content from the clipboard.
@@ -1204,6 +1998,7 @@ class DesktopBot(BaseBot):
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def tab(self, wait=0):
         """
         Press key Tab
@@ -1212,10 +2007,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("tab")
+        _pyautogui().press("tab")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def enter(self, wait=0):
         """
         Press key Enter
@@ -1224,10 +2020,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("enter")
+        _pyautogui().press("enter")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def key_right(self, wait=0):
         """
         Press key Right
@@ -1236,7 +2033,7 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("right")
+        _pyautogui().press("right")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
@@ -1250,6 +2047,7 @@ class DesktopBot(BaseBot):
         """
         self.enter(wait)
 
+    @input_action
     def key_end(self, wait=0):
         """
         Press key End
@@ -1258,10 +2056,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("end")
+        _pyautogui().press("end")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def key_esc(self, wait=0):
         """
         Press key Esc
@@ -1270,10 +2069,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("esc")
+        _pyautogui().press("esc")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def _key_fx(self, idx, wait=0):
         """
         Press key F[idx] where idx is a value from 1 to 12
@@ -1283,7 +2083,7 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press(f"f{idx}")
+        _pyautogui().press(f"f{idx}")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
@@ -1323,6 +2123,7 @@ class DesktopBot(BaseBot):
     def key_f12(self, wait=0):
         self._key_fx(12, wait=wait)
 
+    @input_action
     def hold_shift(self, wait=0):
         """
         Hold key Shift
@@ -1331,16 +2132,18 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.keyDown("shift")
+        _pyautogui().keyDown("shift")
         self.sleep(wait)
 
+    @input_action
     def release_shift(self):
         """
         Release key Shift.
         This method needs to be invoked after holding Shift or similar.
         """
-        pyautogui.keyUp("shift")
+        _pyautogui().keyUp("shift")
 
+    @input_action
     def alt_space(self, wait=0):
         """
         Press keys Alt+Space
@@ -1349,18 +2152,20 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.hotkey("alt", "space", interval=self._interval)
+        _pyautogui().hotkey("alt", "space", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def maximize_window(self):
         """
         Shortcut to maximize window on Windows OS.
         """
         self.alt_space()
         self.sleep(1000)
-        pyautogui.press("x")
+        _pyautogui().press("x")
 
+    @input_action
     def type_keys_with_interval(self, interval, keys):
         """
         Press a sequence of keys. Hold the keys in the specific order and releases them.
@@ -1369,7 +2174,7 @@ class DesktopBot(BaseBot):
             interval (int): Interval (ms) in which to press and release keys
             keys (list): List of keys to be pressed
         """
-        pyautogui.hotkey(*keys, interval=interval / 1000.0)
+        _pyautogui().hotkey(*keys, interval=interval / 1000.0)
 
     def type_keys(self, keys):
         """
@@ -1380,6 +2185,7 @@ class DesktopBot(BaseBot):
         """
         self.type_keys_with_interval(100, keys)
 
+    @input_action
     def alt_e(self, wait=0):
         """
         Press keys Alt+E
@@ -1388,10 +2194,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.hotkey("alt", "e", interval=self._interval)
+        _pyautogui().hotkey("alt", "e", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def alt_r(self, wait=0):
         """
         Press keys Alt+R
@@ -1400,10 +2207,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.hotkey("alt", "r", interval=self._interval)
+        _pyautogui().hotkey("alt", "r", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def alt_f(self, wait=0):
         """
         Press keys Alt+F
@@ -1412,10 +2220,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.hotkey("alt", "f", interval=self._interval)
+        _pyautogui().hotkey("alt", "f", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def alt_u(self, wait=0):
         """
         Press keys Alt+U
@@ -1424,10 +2233,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.hotkey("alt", "u", interval=self._interval)
+        _pyautogui().hotkey("alt", "u", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def alt_f4(self, wait=0):
         """
         Press keys Alt+F4
@@ -1436,10 +2246,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.hotkey("alt", "f4", interval=self._interval)
+        _pyautogui().hotkey("alt", "f4", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_c(self, wait=0):
         """
         Press keys CTRL+C
@@ -1451,11 +2262,12 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "c", interval=self._interval)
+        _pyautogui().hotkey(key, "c", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
         return self.get_clipboard()
 
+    @input_action
     def control_v(self, wait=0):
         """
         Press keys CTRL+V
@@ -1467,10 +2279,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "v", interval=self._interval)
+        _pyautogui().hotkey(key, "v", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_a(self, wait=0):
         """
         Press keys CTRL+A
@@ -1482,10 +2295,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "a", interval=self._interval)
+        _pyautogui().hotkey(key, "a", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_f(self, wait=0):
         """
         Press keys CTRL+F
@@ -1497,10 +2311,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "f", interval=self._interval)
+        _pyautogui().hotkey(key, "f", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_p(self, wait=0):
         """
         Press keys CTRL+P
@@ -1512,10 +2327,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "p", interval=self._interval)
+        _pyautogui().hotkey(key, "p", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_u(self, wait=0):
         """
         Press keys CTRL+U
@@ -1527,10 +2343,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "u", interval=self._interval)
+        _pyautogui().hotkey(key, "u", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_r(self, wait=0):
         """
         Press keys CTRL+R
@@ -1542,10 +2359,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "r", interval=self._interval)
+        _pyautogui().hotkey(key, "r", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_t(self, wait=0):
         """
         Press keys CTRL+T
@@ -1557,10 +2375,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "t", interval=self._interval)
+        _pyautogui().hotkey(key, "t", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_end(self, wait=0):
         """
         Press keys CTRL+End
@@ -1572,10 +2391,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "end", interval=self._interval)
+        _pyautogui().hotkey(key, "end", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_home(self, wait=0):
         """
         Press keys CTRL+Home
@@ -1587,10 +2407,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "home", interval=self._interval)
+        _pyautogui().hotkey(key, "home", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_w(self, wait=0):
         """
         Press keys CTRL+W
@@ -1602,10 +2423,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "w", interval=self._interval)
+        _pyautogui().hotkey(key, "w", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_shift_p(self, wait=0):
         """
         Press keys CTRL+Shift+P
@@ -1617,10 +2439,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "shift", "p", interval=self._interval)
+        _pyautogui().hotkey(key, "shift", "p", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def control_shift_j(self, wait=0):
         """
         Press keys CTRL+Shift+J
@@ -1632,10 +2455,11 @@ class DesktopBot(BaseBot):
         key = "ctrl"
         if platform.system() == "Darwin":
             key = "command"
-        pyautogui.hotkey(key, "shift", "j", interval=self._interval)
+        _pyautogui().hotkey(key, "shift", "j", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def shift_tab(self, wait=0):
         """
         Press keys Shift+Tab
@@ -1644,7 +2468,7 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.hotkey("shift", "tab", interval=self._interval)
+        _pyautogui().hotkey("shift", "tab", interval=self._interval)
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
@@ -1657,6 +2481,7 @@ class DesktopBot(BaseBot):
         """
         return pyperclip.paste()
 
+    @input_action
     def type_left(self, wait=0):
         """
         Press Left key
@@ -1665,10 +2490,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("left")
+        _pyautogui().press("left")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def type_right(self, wait=0):
         """
         Press Right key
@@ -1677,10 +2503,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("right")
+        _pyautogui().press("right")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def type_down(self, wait=0):
         """
         Press Down key
@@ -1689,10 +2516,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("down")
+        _pyautogui().press("down")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def type_up(self, wait=0):
         """
         Press Up key
@@ -1701,10 +2529,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("up")
+        _pyautogui().press("up")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def type_windows(self, wait=0):
         """
         Press Win logo key
@@ -1713,10 +2542,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("win")
+        _pyautogui().press("win")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def page_up(self, wait=0):
         """
         Press Page Up key
@@ -1725,10 +2555,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("pageup")
+        _pyautogui().press("pageup")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def page_down(self, wait=0):
         """
         Press Page Down key
@@ -1737,10 +2568,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("pagedown")
+        _pyautogui().press("pagedown")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def space(self, wait=0):
         """
         Press Space key
@@ -1749,10 +2581,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("space")
+        _pyautogui().press("space")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def backspace(self, wait=0):
         """
         Press Backspace key
@@ -1761,10 +2594,11 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("backspace")
+        _pyautogui().press("backspace")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
+    @input_action
     def delete(self, wait=0):
         """
         Press Delete key
@@ -1773,7 +2607,7 @@ class DesktopBot(BaseBot):
             wait (int, optional): Wait interval (ms) after task
 
         """
-        pyautogui.press("delete")
+        _pyautogui().press("delete")
         delay = max(0, wait or config.DEFAULT_SLEEP_AFTER_ACTION)
         self.sleep(delay)
 
@@ -1829,9 +2663,10 @@ class DesktopBot(BaseBot):
     def focus_window_app(self, app):
         timeout = 60  # 1 minute
         counter = 0
+        gui = _win32gui()
         while True:
             try:
-                window = win32gui.FindWindow(None, app)
+                window = gui.FindWindow(None, app)
                 if window:
                     ctypes.windll.user32.SwitchToThisWindow(window, True)
                     return True
@@ -1882,16 +2717,17 @@ class DesktopBot(BaseBot):
     #############
 
     def enum_windows_callback(self, hwnd, window_list):
-        window_list.append((hwnd, win32gui.GetWindowText(hwnd)))
+        window_list.append((hwnd, _win32gui().GetWindowText(hwnd)))
 
+    @input_action
     def focus_app_windows(self, window_title):
         windows = []
-        win32gui.EnumWindows(self.enum_windows_callback, windows)
+        _win32gui().EnumWindows(self.enum_windows_callback, windows)
         for window in windows:
             if window[1] == window_title:
                 print(window[1])
                 window_handle = window[0]
-                win32gui.SetForegroundWindow(window_handle)
+                _win32gui().SetForegroundWindow(window_handle)
                 break
 
     @if_windows_os
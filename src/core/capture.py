@@ -0,0 +1,212 @@
+"""
+Screen capture backends used by DesktopBot.
+
+A backend grabs a region of the screen straight into a BGR `numpy` array, so
+the image search methods match the pixels without a round trip through PIL
+and only pay for the area they search. `ReplayCapture` serves recorded frames
+from disk instead of the screen, which allows running the `find*` family on
+machines without a display.
+"""
+
+import glob
+import os
+import threading
+
+import cv2
+import numpy
+
+from . import config, cv2find
+
+
+class CaptureBackend:
+    """
+    Base class of the capture backends.
+
+    Subclasses implement `size` and `_grab`. Regions are given in screen pixels
+    as (left, top, width, height) and are clipped to the screen size, so the
+    captured array may be smaller than requested.
+    """
+
+    def size(self):
+        """
+        Return the screen size.
+
+        Returns:
+            size (Tuple): The screen width and height in pixels.
+        """
+        raise NotImplementedError
+
+    def grab(self, region=None):
+        """
+        Capture a region of the screen.
+
+        Args:
+            region (tuple, optional): Bounding box (left, top, width, height) to capture.
+                Defaults to the whole screen.
+
+        Returns:
+            numpy.ndarray: The captured pixels as a BGR array.
+        """
+        return self._grab(self._clip(region))
+
+    def _grab(self, region):
+        raise NotImplementedError
+
+    def _clip(self, region):
+        width, height = self.size()
+        if region is None:
+            return 0, 0, width, height
+        left, top, w, h = (int(v) for v in region)
+        return left, top, max(0, min(w, width - left)), max(0, min(h, height - top))
+
+
+class PyAutoGUICapture(CaptureBackend):
+    """
+    Capture through `pyautogui.screenshot`, available wherever PyAutoGUI works.
+    """
+
+    def size(self):
+        import pyautogui
+
+        width, height = pyautogui.size()
+        return width, height
+
+    def _grab(self, region):
+        import pyautogui
+
+        return cv2find._load_cv2(pyautogui.screenshot(region=region))
+
+
+class MSSCapture(CaptureBackend):
+    """
+    Capture through the `mss` package, which reads the region directly from the
+    display without building a full screen image.
+
+    The `mss` handles are not thread safe, so one is kept per thread.
+    """
+
+    def __init__(self):
+        import mss  # noqa: F401 - fail early when the package is missing
+
+        self._local = threading.local()
+
+    def _handle(self):
+        handle = getattr(self._local, "handle", None)
+        if handle is None:
+            import mss
+
+            handle = self._local.handle = mss.mss()
+        return handle
+
+    def size(self):
+        monitor = self._handle().monitors[1]
+        return monitor["width"], monitor["height"]
+
+    def _grab(self, region):
+        monitor = self._handle().monitors[1]
+        left, top, width, height = region
+        shot = self._handle().grab(
+            {
+                "left": monitor["left"] + left,
+                "top": monitor["top"] + top,
+                "width": width,
+                "height": height,
+            }
+        )
+        # mss returns BGRA pixels.
+        return numpy.ascontiguousarray(numpy.asarray(shot)[:, :, :3])
+
+
+class ReplayCapture(CaptureBackend):
+    """
+    Serve recorded frames from a directory instead of the screen.
+
+    The frames are the image files of the directory in name order. Each capture
+    returns the current frame and moves to the next one; the last frame is
+    kept once the recording ends unless `loop` is set.
+
+    Args:
+        path (str): The directory holding the recorded frames.
+        loop (bool, optional): Whether or not to restart from the first frame after the last.
+            Defaults to False.
+        repeat (int, optional): Number of captures served by each frame. Defaults to 1.
+    """
+
+    EXTENSIONS = (".png", ".bmp", ".jpg", ".jpeg")
+
+    def __init__(self, path, loop=False, repeat=1):
+        self.path = path
+        self.loop = loop
+        self.repeat = max(1, repeat)
+        self.files = sorted(
+            f
+            for f in glob.glob(os.path.join(path, "*"))
+            if f.lower().endswith(self.EXTENSIONS)
+        )
+        if not self.files:
+            raise FileNotFoundError(f"No frames found in {path}")
+        self._frames = {}
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def _frame(self, index):
+        frame = self._frames.get(index)
+        if frame is None:
+            frame = cv2.imread(self.files[index], cv2.IMREAD_COLOR)
+            if frame is None:
+                raise IOError(f"Failed to read frame {self.files[index]}")
+            self._frames[index] = frame
+        return frame
+
+    @property
+    def index(self):
+        """
+        Index of the frame served by the next capture.
+        """
+        return min(self._position // self.repeat, len(self.files) - 1)
+
+    def rewind(self):
+        """
+        Restart the recording from the first frame.
+        """
+        with self._lock:
+            self._position = 0
+
+    def size(self):
+        height, width = self._frame(self.index).shape[:2]
+        return width, height
+
+    def _grab(self, region):
+        with self._lock:
+            frame = self._frame(self.index)
+            self._position += 1
+            if self.loop and self._position >= len(self.files) * self.repeat:
+                self._position = 0
+        left, top, width, height = region
+        return frame[top: top + height, left: left + width]
+
+
+def create(name=None):
+    """
+    Create a capture backend by name.
+
+    Args:
+        name (str, optional): `pyautogui`, `mss`, `replay:<directory>` or `auto`, which picks
+            `mss` when installed and `pyautogui` otherwise. Defaults to `config.CAPTURE_BACKEND`.
+
+    Returns:
+        backend (CaptureBackend): The capture backend.
+    """
+    name = name or config.CAPTURE_BACKEND
+    if name.startswith("replay:"):
+        return ReplayCapture(name[len("replay:"):])
+    if name == "pyautogui":
+        return PyAutoGUICapture()
+    if name == "mss":
+        return MSSCapture()
+    if name == "auto":
+        try:
+            return MSSCapture()
+        except ImportError:
+            return PyAutoGUICapture()
+    raise ValueError(f"Unknown capture backend: {name}")
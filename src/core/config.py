@@ -1 +1,47 @@
+import os
+
 DEFAULT_SLEEP_AFTER_ACTION = 300
+
+# Last known location of each image, persisted across runs per screen resolution.
+LOCATION_PRIOR_PATH = os.getenv(
+    "RECEITANET_LOCATION_PRIOR",
+    os.path.join(os.path.expanduser("~"), ".receitanet-bx", "locations.json"),
+)
+LOCATION_PRIOR_PADDING = 40
+# A hit around the last location is taken without searching the whole region only when
+# its score is at most this much below the best score seen at that location.
+LOCATION_PRIOR_TOLERANCE = 0.02
+
+# Pixels searched around an anchor (application window, dialog) for the labels
+# declared relative to it.
+ANCHOR_MARGIN = 20
+
+# Seconds a hit of find stays valid for the next searches of the same image and region.
+# Any input action drops the hits earlier. 0 disables the cache.
+MATCH_CACHE_MAX_AGE = float(os.getenv("RECEITANET_MATCH_CACHE_MAX_AGE", "1.0"))
+
+# Screen capture backend: auto, mss, pyautogui or replay:<directory with frames>.
+CAPTURE_BACKEND = os.getenv("RECEITANET_CAPTURE", "auto")
+
+# Whether the image searches look first for a pixel for pixel occurrence of the image,
+# falling back to the normalized correlation only when there is none. Off by default:
+# a miss pays for the hashing on top of the correlation.
+EXACT_MATCH = os.getenv("RECEITANET_EXACT_MATCH", "0") == "1"
+
+# Whether find_all rejects most positions by a few discriminative pixels of the image
+# before running the normalized correlation on the survivors.
+MATCH_PREFILTER = os.getenv("RECEITANET_PREFILTER", "0") == "1"
+
+# Backend used to match many images against one frame: serial, thread or process.
+MATCHING_BACKEND = os.getenv("RECEITANET_MATCHING", "thread")
+# Threads shared by all bots for matching. 0 uses one thread per CPU.
+MATCHING_THREADS = int(os.getenv("RECEITANET_MATCHING_THREADS", "0"))
+
+# Polling of the find/wait loops, in seconds: interval right after an input action or a
+# screen change, longest interval while the screen is static and how long an input
+# action keeps the loops polling fast.
+POLL_FAST_INTERVAL = float(os.getenv("RECEITANET_POLL_FAST", "0.05"))
+POLL_SLOW_INTERVAL = float(os.getenv("RECEITANET_POLL_SLOW", "1.0"))
+POLL_INPUT_WINDOW = float(os.getenv("RECEITANET_POLL_INPUT_WINDOW", "2.0"))
+# Fraction of one CPU core the polling loops of this host may keep busy (0 < budget <= 1).
+POLL_CPU_BUDGET = float(os.getenv("RECEITANET_POLL_CPU_BUDGET", "0.5"))
@@ -33,12 +33,44 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
 import collections
+import math
+
 import cv2
 import numpy
 
 RUNNING_CV_2 = cv2.__version__[0] < "3"
 
 Box = collections.namedtuple("Box", "left top width height")
+Match = collections.namedtuple("Match", "label box score")
+Probes = collections.namedtuple("Probes", "ys xs signs margins")
+
+# Coarse-to-fine search: needles smaller than this (in pixels, after scaling)
+# are matched at full resolution, coarse scores may be this much lower than
+# the requested confidence and at most this many coarse peaks are verified.
+PYRAMID_MIN_NEEDLE_SIZE = 8
+PYRAMID_CONFIDENCE_MARGIN = 0.2
+PYRAMID_MAX_CANDIDATES = 100
+
+# Exact search: pixels are packed into integers and each row window is hashed
+# with a polynomial rolling hash modulo 2**64 (the uint64 wraparound of numpy).
+# The base must be odd so its powers never vanish modulo 2**64.
+EXACT_HASH_BASE = 1000003
+
+# Prefilter: a probe is a needle pixel much brighter or darker than the mean of
+# the PREFILTER_KERNEL sized box around it. A haystack position survives while
+# few of its pixels under the probes disagree, i.e. are not at least a quarter
+# as much brighter (or darker) than their own surroundings. Lower confidences
+# accept less similar hits, so each 1% below 1.0 lets PREFILTER_MISS_RATE of
+# the probes disagree, up to half of them. When more than
+# PREFILTER_MAX_SURVIVORS of the positions survive, the whole haystack is
+# matched.
+PREFILTER_KERNEL = 5
+PREFILTER_PROBES = 16
+PREFILTER_MIN_PROBES = 4
+PREFILTER_MIN_CONTRAST = 24
+PREFILTER_MISS_RATE = 0.04
+PREFILTER_MAX_SURVIVORS = 0.2
+PREFILTER_CELL = 16
 
 if RUNNING_CV_2:
     LOAD_COLOR = cv2.CV_LOAD_IMAGE_COLOR
@@ -90,6 +122,303 @@ def _load_cv2(img, grayscale=False):
     return img_cv
 
 
+def _pack_pixels(image):
+    """
+    Pack the channels of each pixel into a single uint64 value.
+    """
+    if image.ndim == 2:
+        return image.astype(numpy.uint64)
+    if not image.size:
+        return numpy.zeros(image.shape[:2], dtype=numpy.uint64)
+    if image.shape[2] == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    packed = numpy.ascontiguousarray(image).view(numpy.uint32)[:, :, 0]
+    return packed.astype(numpy.uint64)
+
+
+class RollingHashIndex:
+    """
+    Row rolling hashes of a haystack for exact (pixel for pixel) searches.
+
+    The prefix sums of the packed pixels weighted by the powers of
+    `EXACT_HASH_BASE` are computed once, so the hash of every window of any
+    width along the rows costs a single subtraction. Many needles can be
+    searched in the same haystack sharing the index.
+
+    Args:
+        haystack_image (numpy.ndarray): The image in which to search, already converted
+            like the needles.
+    """
+
+    def __init__(self, haystack_image):
+        self.haystack = haystack_image
+        packed = _pack_pixels(haystack_image)
+        height, width = packed.shape
+        self._powers = numpy.full(width + 1, EXACT_HASH_BASE, dtype=numpy.uint64)
+        self._powers[0] = 1
+        numpy.cumprod(self._powers, out=self._powers)
+        self._prefix = numpy.zeros((height, width + 1), dtype=numpy.uint64)
+        numpy.cumsum(packed * self._powers[:width], axis=1, out=self._prefix[:, 1:])
+
+    def find(self, needle_image, limit=10000, region=None):
+        """
+        Find the exact occurrences of a needle.
+
+        The window hash of a row at x is the needle row hash times base**x, so
+        the most varied needle row is compared against every position at once
+        and the surviving candidates are filtered by the hashes of the other
+        rows. Candidates are verified pixel by pixel, which rules out hash
+        collisions.
+
+        Args:
+            needle_image (numpy.ndarray): The image to search for.
+            limit (int, optional): Maximum number of occurrences. Defaults to 10000.
+            region (tuple, optional): Bounding box (left, top, width, height) of the
+                haystack to search. Defaults to the whole haystack.
+
+        Returns:
+            list: Tuples (x, y) of the occurrences in reading order, in haystack
+                coordinates.
+        """
+        needle_height, needle_width = needle_image.shape[:2]
+        haystack_height, haystack_width = self.haystack.shape[:2]
+        left, top, width, height = region or (0, 0, haystack_width, haystack_height)
+        left, top = max(0, left), max(0, top)
+        width = min(width, haystack_width - left)
+        height = min(height, haystack_height - top)
+        if needle_height > height or needle_width > width:
+            return []
+        max_y = height - needle_height
+        count = width - needle_width + 1
+        positions = self._powers[left: left + count]
+
+        packed = _pack_pixels(needle_image)
+        row_hashes = (packed * self._powers[:needle_width]).sum(
+            axis=1, dtype=numpy.uint64
+        )
+        prefix = self._prefix[top: top + height]
+        windows = prefix[:, left + needle_width: left + width + 1] - prefix[
+            :, left: left + count
+        ]
+        # Rows with more distinct pixels leave fewer candidates behind.
+        order = sorted(
+            range(needle_height), key=lambda j: -len(numpy.unique(packed[j]))
+        )
+
+        first = order[0]
+        ys, xs = numpy.nonzero(
+            windows[first: first + max_y + 1] == positions * row_hashes[first]
+        )
+        for j in order[1:]:
+            if not len(xs):
+                return []
+            keep = windows[ys + j, xs] == positions[xs] * row_hashes[j]
+            ys, xs = ys[keep], xs[keep]
+
+        found = []
+        for x, y in zip(xs + left, ys + top):
+            window = self.haystack[y: y + needle_height, x: x + needle_width]
+            if numpy.array_equal(window, needle_image):
+                found.append((int(x), int(y)))
+                if len(found) >= limit:
+                    break
+        return found
+
+
+def locate_exact(
+    needle_image,
+    haystack_image,
+    grayscale=False,
+    limit=10000,
+    region=None,
+):
+    """
+    Locate the occurrences of the needle that match the haystack pixel for pixel.
+
+    Much cheaper than the normalized cross-correlation of `locate_all_opencv`,
+    but only finds the needle when it is rendered exactly as captured.
+
+    Args:
+        needle_image: The image to search for.
+        haystack_image: The image in which to search.
+        grayscale (bool, optional): Whether or not to match in grayscale.
+        limit (int, optional): Maximum number of occurrences.
+        region (tuple, optional): Bounding box (left, top, width, height) to search.
+
+    Returns:
+        Generator of Box: The occurrences in reading order.
+    """
+    needle_image = _load_cv2(needle_image, grayscale)
+    needle_height, needle_width = needle_image.shape[:2]
+    haystack_image = _load_cv2(haystack_image, grayscale)
+    if region:
+        haystack_image = haystack_image[
+            region[1]: region[1] + region[3], region[0]: region[0] + region[2]
+        ]
+    else:
+        region = (0, 0)
+
+    for x, y in RollingHashIndex(haystack_image).find(needle_image, limit):
+        yield Box(x + region[0], y + region[1], needle_width, needle_height)
+
+
+def _exact_hits(index, haystack_image, needle_image, origin, limit):
+    """
+    Exact occurrences of the needle in a cropped haystack, relative to the crop.
+
+    `index` covers the image the haystack was cropped from at `origin`.
+    """
+    height, width = haystack_image.shape[:2]
+    hits = index.find(needle_image, limit, (origin[0], origin[1], width, height))
+    return [(x - origin[0], y - origin[1]) for x, y in hits]
+
+
+def _detail(gray_image):
+    """
+    Difference between each pixel and the mean of the box around it.
+    """
+    kernel = (PREFILTER_KERNEL, PREFILTER_KERNEL)
+    mean = cv2.blur(gray_image, kernel, borderType=cv2.BORDER_REPLICATE)
+    return gray_image.astype(numpy.int16) - mean.astype(numpy.int16)
+
+
+def discriminative_pixels(needle_image, count=PREFILTER_PROBES):
+    """
+    Select the needle pixels that best tell its positions apart from the rest.
+
+    The probes are the pixels with the highest contrast against their own
+    surroundings in each tile of a grid over the needle, so they spread over
+    all of it. Only
+    the sign and a fraction of that contrast are checked on the haystack, so
+    the test tolerates the brightness and contrast changes that the
+    normalized correlation tolerates.
+
+    Args:
+        needle_image (numpy.ndarray): The needle, BGR or grayscale.
+        count (int, optional): Maximum number of probes. Defaults to `PREFILTER_PROBES`.
+
+    Returns:
+        probes (Probes): The probe offsets, signs and minimum contrasts. None when the
+            needle is too flat to be prefiltered.
+    """
+    gray = _load_cv2(needle_image, grayscale=True)
+    detail = _detail(gray)
+    height, width = detail.shape
+    # Probes near the border would be compared against surroundings that fall
+    # outside the needle.
+    radius = PREFILTER_KERNEL // 2
+    contrast = numpy.zeros(detail.shape, dtype=numpy.int16)
+    contrast[radius: height - radius, radius: width - radius] = numpy.abs(
+        detail[radius: height - radius, radius: width - radius]
+    )
+    # One probe per tile of a grid shaped like the needle, so occluding part of
+    # the needle only takes a few probes with it.
+    tiles_x = max(1, min(count, int(round((count * width / height) ** 0.5))))
+    tiles_y = max(1, count // tiles_x)
+    ys, xs = [], []
+    for rows in numpy.array_split(numpy.arange(height), tiles_y):
+        for cols in numpy.array_split(numpy.arange(width), tiles_x):
+            if not len(rows) or not len(cols):
+                continue
+            tile = contrast[rows[0]: rows[-1] + 1, cols[0]: cols[-1] + 1]
+            y, x = numpy.unravel_index(numpy.argmax(tile), tile.shape)
+            if tile[y, x] >= PREFILTER_MIN_CONTRAST:
+                ys.append(rows[0] + int(y))
+                xs.append(cols[0] + int(x))
+    if len(ys) < PREFILTER_MIN_PROBES:
+        return None
+
+    ys, xs = numpy.array(ys), numpy.array(xs)
+    # The strongest probes go first, they reject the most positions.
+    order = numpy.argsort(-contrast[ys, xs], kind="stable")
+    ys, xs = ys[order], xs[order]
+    values = detail[ys, xs]
+    return Probes(
+        ys, xs, numpy.sign(values).astype(numpy.int16), numpy.abs(values) // 4
+    )
+
+
+def prefilter_misses(probes, confidence):
+    """
+    Number of probes allowed to disagree at a given confidence.
+
+    Args:
+        probes (Probes): The needle probes.
+        confidence (float): Minimum score of the correlation.
+
+    Returns:
+        int: The number of probes that may disagree.
+    """
+    count = len(probes.ys)
+    misses = math.ceil(count * PREFILTER_MISS_RATE * 100 * (1 - confidence) - 1e-9)
+    return max(0, min(count // 2, misses))
+
+
+def prefilter_positions(probes, haystack_image, needle_shape, max_misses=0):
+    """
+    Find the haystack positions that pass the probes of a needle.
+
+    The first probes are compared over every position at once; the remaining
+    ones only gather the pixels of the positions still alive.
+
+    Args:
+        probes (Probes): The needle probes from `discriminative_pixels`.
+        haystack_image (numpy.ndarray): The image in which to search, BGR or grayscale.
+        needle_shape (tuple): The needle height and width.
+        max_misses (int, optional): Number of probes that may disagree. Defaults to 0.
+
+    Returns:
+        positions (Tuple): Arrays with the y and x of the surviving positions.
+    """
+    detail = _detail(_load_cv2(haystack_image, grayscale=True))
+    rows = detail.shape[0] - needle_shape[0] + 1
+    cols = detail.shape[1] - needle_shape[1] + 1
+
+    first = max_misses + 1
+    misses = numpy.zeros((rows, cols), dtype=numpy.uint8)
+    for y, x, sign, margin in list(zip(*probes))[:first]:
+        misses += detail[y: y + rows, x: x + cols] * sign < margin
+    ys, xs = numpy.nonzero(misses <= max_misses)
+    misses = misses[ys, xs]
+    for y, x, sign, margin in list(zip(*probes))[first:]:
+        misses += detail[ys + y, xs + x] * sign < margin
+        keep = misses <= max_misses
+        ys, xs, misses = ys[keep], xs[keep], misses[keep]
+    return ys, xs
+
+
+def _match_survivors(haystack_image, needle_image, ys, xs):
+    """
+    Score map of the needle computed only around the surviving positions.
+
+    The survivors are grouped in `PREFILTER_CELL` sized blocks and each group
+    of connected blocks is matched as one window. Positions outside the
+    windows keep the lowest score.
+    """
+    needle_height, needle_width = needle_image.shape[:2]
+    rows = haystack_image.shape[0] - needle_height + 1
+    cols = haystack_image.shape[1] - needle_width + 1
+    result = numpy.full((rows, cols), -1.0, dtype=numpy.float32)
+    if not len(ys):
+        return result
+
+    cell = PREFILTER_CELL
+    blocks = numpy.zeros((-(-rows // cell), -(-cols // cell)), dtype=numpy.uint8)
+    blocks[ys // cell, xs // cell] = 1
+    count, _, stats, _ = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+    for block_x, block_y, block_w, block_h in stats[1:count, :4]:
+        left, top = int(block_x) * cell, int(block_y) * cell
+        right = min(cols, int(block_x + block_w) * cell)
+        bottom = min(rows, int(block_y + block_h) * cell)
+        window = haystack_image[
+            top: bottom + needle_height - 1, left: right + needle_width - 1
+        ]
+        result[top:bottom, left:right] = cv2.matchTemplate(
+            window, needle_image, cv2.TM_CCOEFF_NORMED
+        )
+    return result
+
+
 def locate_all_opencv(
     needle_image,
     haystack_image,
@@ -98,6 +427,11 @@ def locate_all_opencv(
     region=None,
     step=1,
     confidence=0.999,
+    pyramid=0,
+    exact=False,
+    prefilter=None,
+    stats=None,
+    index=None,
 ):
     """
     TODO - rewrite this
@@ -105,6 +439,20 @@ def locate_all_opencv(
         step 2 skips every other row and column = ~3x faster but prone to miss;
             to compensate, the algorithm automatically reduces the confidence
             threshold by 5% (which helps but will not avoid all misses).
+        pyramid N matches the needle against the haystack downscaled N times
+            by half and verifies each candidate at full resolution in a small
+            window around it, so the scores are the exact full resolution ones.
+            Takes precedence over step.
+        exact searches first for pixel for pixel occurrences with
+            `locate_exact` and only runs the correlation when there are none.
+            An `index` (RollingHashIndex) of the whole haystack, before the
+            region crop, is shared by the searches of several needles on the
+            same frame instead of hashing the haystack again.
+        prefilter (the needle Probes, or True to select them here) rejects
+            the positions whose discriminative pixels disagree with the needle
+            and matches only around the survivors. Ignored with step or
+            pyramid. The number of positions and of pruned positions are
+            stored in the `stats` dictionary when given.
         limitations:
           - OpenCV 3.x & python 3.x not tested
           - RGBA images are treated as RBG (ignores alpha channel)
@@ -131,6 +479,23 @@ def locate_all_opencv(
             "needle dimension(s) exceed the haystack image or region dimensions"
         )
 
+    if exact:
+        origin = region[:2]
+        if index is None:
+            index, origin = RollingHashIndex(haystack_image), (0, 0)
+        hits = _exact_hits(index, haystack_image, needle_image, origin, limit)
+        for x, y in hits:
+            yield Box(x + region[0], y + region[1], needle_width, needle_height)
+        if hits:
+            return
+
+    if pyramid:
+        for x, y, _ in _locate_pyramid(
+            needle_image, haystack_image, confidence, int(pyramid), limit
+        ):
+            yield Box(x + region[0], y + region[1], needle_width, needle_height)
+        return
+
     if step == 2:
         confidence *= 0.95
         needle_image = needle_image[::step, ::step]
@@ -138,22 +503,284 @@ def locate_all_opencv(
     else:
         step = 1
 
+    if prefilter is True:
+        prefilter = discriminative_pixels(needle_image)
+    result = None
+    if prefilter is not None and step == 1:
+        ys, xs = prefilter_positions(
+            prefilter,
+            haystack_image,
+            needle_image.shape[:2],
+            prefilter_misses(prefilter, confidence),
+        )
+        positions = (haystack_image.shape[0] - needle_height + 1) * (
+            haystack_image.shape[1] - needle_width + 1
+        )
+        if stats is not None:
+            stats["positions"] = positions
+            stats["pruned"] = positions - len(ys)
+        if len(ys) <= PREFILTER_MAX_SURVIVORS * positions:
+            result = _match_survivors(haystack_image, needle_image, ys, xs)
+
     # get all matches at once, credit:
     # https://stackoverflow.com/questions/7670112/finding-a-subimage-inside-a-numpy-image/9253805#9253805
-    result = cv2.matchTemplate(haystack_image, needle_image, cv2.TM_CCOEFF_NORMED)
-    match_indices = numpy.arange(result.size)[(result > confidence).flatten()]
-    matches = numpy.unravel_index(match_indices[:limit], result.shape)
-
-    if len(matches[0]) == 0:
-        return
+    if result is None:
+        result = cv2.matchTemplate(haystack_image, needle_image, cv2.TM_CCOEFF_NORMED)
 
     # use a generator for API consistency:
-    matchx = matches[1] * step + region[0]  # vectorized
-    matchy = matches[0] * step + region[1]
+    for x, y, _ in _top_matches(result, confidence, limit):
+        yield Box(
+            x * step + region[0], y * step + region[1], needle_width, needle_height
+        )
 
-    # Order results before sending back
-    ordered = sorted(
-        zip(matchx, matchy), key=lambda p: result[p[1]][p[0]], reverse=True
+
+def _top_matches(result, confidence, limit):
+    """
+    Select the best scored positions of a score map above the confidence.
+
+    Uses `numpy.argpartition` so only the `limit` best positions are sorted,
+    no matter how many positions pass the threshold.
+
+    Returns:
+        list: Tuples (x, y, score) sorted by score, best first.
+    """
+    scores = result.ravel()
+    indices = numpy.flatnonzero(scores > confidence)
+    if len(indices) > limit:
+        indices = indices[numpy.argpartition(-scores[indices], limit - 1)[:limit]]
+    indices = indices[numpy.argsort(-scores[indices], kind="stable")]
+    ys, xs = numpy.unravel_index(indices, result.shape)
+    return [
+        (int(x), int(y), float(score))
+        for x, y, score in zip(xs, ys, scores[indices])
+    ]
+
+
+def locate_opencv(
+    needle_image,
+    haystack_image,
+    grayscale=False,
+    region=None,
+    confidence=0.999,
+    pyramid=0,
+    exact=False,
+    index=None,
+):
+    """
+    Locate the best hit of the needle inside the haystack.
+
+    Only the best position is needed, so the score map is reduced with
+    `cv2.minMaxLoc` instead of thresholding and sorting every position.
+
+    Args:
+        needle_image: The image to search for.
+        haystack_image: The image in which to search.
+        grayscale (bool, optional): Whether or not to match in grayscale.
+        region (tuple, optional): Bounding box (left, top, width, height) to search.
+        confidence (float, optional): Minimum score to consider a match.
+        pyramid (int, optional): Number of levels for a coarse-to-fine search.
+        exact (bool, optional): Whether or not to search first for an exact occurrence.
+        index (RollingHashIndex, optional): Index of the whole haystack shared by the
+            exact searches on the same frame. Built here when not informed.
+
+    Returns:
+        box (Box): The best hit. None if not found.
+    """
+    if pyramid:
+        return next(
+            locate_all_opencv(
+                needle_image,
+                haystack_image,
+                grayscale=grayscale,
+                limit=1,
+                region=region,
+                confidence=confidence,
+                pyramid=pyramid,
+                exact=exact,
+                index=index,
+            ),
+            None,
+        )
+
+    match = locate_best_opencv(
+        {None: needle_image},
+        haystack_image,
+        grayscale=grayscale,
+        region=region,
+        confidence=confidence,
+        exact=exact,
+        index=index,
     )
-    for x, y in ordered:
-        yield Box(x, y, needle_width, needle_height)
+    return match.box if match is not None else None
+
+
+def suppress_overlaps(boxes):
+    """
+    Drop the boxes overlapping a better scored box (non-maximum suppression).
+
+    Args:
+        boxes (list): Boxes of the same needle ordered by score, best first.
+
+    Returns:
+        list: The boxes kept, in the same order.
+    """
+    if not boxes:
+        return []
+    coords = numpy.array([(b.left, b.top, b.width, b.height) for b in boxes])
+    keep = numpy.ones(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if not keep[i]:
+            continue
+        rest = coords[i + 1:]
+        overlap = (numpy.abs(rest[:, 0] - coords[i, 0]) < coords[i, 2]) & (
+            numpy.abs(rest[:, 1] - coords[i, 1]) < coords[i, 3]
+        )
+        keep[i + 1:] &= ~overlap
+    return [boxes[i] for i in numpy.flatnonzero(keep)]
+
+
+def _locate_pyramid(needle_image, haystack_image, confidence, levels, limit):
+    """
+    Coarse-to-fine template matching.
+
+    Candidates are the local maxima of the score map computed over the
+    haystack and needle reduced `levels` times with `cv2.pyrDown`. Each candidate is then
+    verified at full resolution in a window covering the positions that map
+    to it, which gives the exact TM_CCOEFF_NORMED score.
+
+    Returns:
+        list: Tuples (x, y, score) sorted by score, best first.
+    """
+    needle_height, needle_width = needle_image.shape[:2]
+    # Use as many levels as the needle size allows.
+    while levels and min(needle_height, needle_width) >> levels < PYRAMID_MIN_NEEDLE_SIZE:
+        levels -= 1
+    scale = 0.5 ** levels
+    if not levels:
+        result = cv2.matchTemplate(haystack_image, needle_image, cv2.TM_CCOEFF_NORMED)
+        return _top_matches(result, confidence, limit)
+
+    small_needle = needle_image
+    small_haystack = haystack_image
+    for _ in range(levels):
+        small_needle = cv2.pyrDown(small_needle)
+        small_haystack = cv2.pyrDown(small_haystack)
+    coarse = cv2.matchTemplate(small_haystack, small_needle, cv2.TM_CCOEFF_NORMED)
+
+    # Keep only local maxima above the relaxed threshold as candidates.
+    peaks = coarse == cv2.dilate(coarse, numpy.ones((3, 3), numpy.uint8))
+    peaks &= coarse > confidence - PYRAMID_CONFIDENCE_MARGIN * levels
+    cys, cxs = numpy.nonzero(peaks)
+    if len(cxs) > PYRAMID_MAX_CANDIDATES:
+        keep = numpy.argpartition(-coarse[cys, cxs], PYRAMID_MAX_CANDIDATES)
+        keep = keep[:PYRAMID_MAX_CANDIDATES]
+        cys, cxs = cys[keep], cxs[keep]
+
+    haystack_height, haystack_width = haystack_image.shape[:2]
+    max_x = haystack_width - needle_width
+    max_y = haystack_height - needle_height
+    pad = int(round(1 / scale)) + 1
+
+    found = {}
+    for cx, cy in zip(cxs, cys):
+        x0 = int(round(cx / scale))
+        y0 = int(round(cy / scale))
+        left, right = max(0, x0 - pad), min(max_x, x0 + pad)
+        top, bottom = max(0, y0 - pad), min(max_y, y0 + pad)
+        if left > right or top > bottom:
+            continue
+        window = haystack_image[
+            top: bottom + needle_height, left: right + needle_width
+        ]
+        result = cv2.matchTemplate(window, needle_image, cv2.TM_CCOEFF_NORMED)
+        ys, xs = numpy.nonzero(result > confidence)
+        for x, y in zip(xs, ys):
+            found[(int(x) + left, int(y) + top)] = float(result[y, x])
+
+    ordered = sorted(found.items(), key=lambda item: item[1], reverse=True)
+    return [(x, y, score) for (x, y), score in ordered[:limit]]
+
+
+def locate_best_opencv(
+    needle_images,
+    haystack_image,
+    grayscale=False,
+    region=None,
+    confidence=0.999,
+    exact=False,
+    index=None,
+    pyramid=0,
+):
+    """
+    Match several needles against a single haystack and return the best hit.
+
+    The haystack is converted (and cropped to the region) only once and shared
+    by all the needles. Needles larger than the searched area are skipped.
+    With `exact`, a needle found pixel for pixel is returned with score 1.0,
+    the highest possible, and the correlation only runs when no needle is found
+    exactly. Ties between needles, exact or not, go to the first in
+    `needle_images` order.
+
+    Args:
+        needle_images (dict): Mapping of label to needle image.
+        haystack_image: The image in which to search.
+        grayscale (bool, optional): Whether or not to match in grayscale.
+        region (tuple, optional): Bounding box (left, top, width, height) to search.
+        confidence (float, optional): Minimum score to consider a match.
+        exact (bool, optional): Whether or not to search first for exact occurrences.
+        index (RollingHashIndex, optional): Index of the whole haystack shared by the
+            exact searches on the same frame. Built here when not informed.
+        pyramid (int, optional): Number of levels for a coarse-to-fine search.
+
+    Returns:
+        match (Match): The label, box and score of the best hit. None if not found.
+    """
+    confidence = float(confidence)
+
+    haystack_image = _load_cv2(haystack_image, grayscale)
+    if region:
+        haystack_image = haystack_image[
+            region[1]: region[1] + region[3], region[0]: region[0] + region[2]
+        ]
+    else:
+        region = (0, 0)
+    haystack_height, haystack_width = haystack_image.shape[:2]
+    needle_images = {
+        label: _load_cv2(needle_image, grayscale)
+        for label, needle_image in needle_images.items()
+    }
+
+    if exact:
+        origin = region[:2]
+        if index is None:
+            index, origin = RollingHashIndex(haystack_image), (0, 0)
+        for label, needle_image in needle_images.items():
+            hits = _exact_hits(index, haystack_image, needle_image, origin, limit=1)
+            if hits:
+                x, y = hits[0]
+                needle_height, needle_width = needle_image.shape[:2]
+                box = Box(x + region[0], y + region[1], needle_width, needle_height)
+                return Match(label, box, 1.0)
+
+    best = None
+    for label, needle_image in needle_images.items():
+        needle_height, needle_width = needle_image.shape[:2]
+        if needle_height > haystack_height or needle_width > haystack_width:
+            continue
+
+        if pyramid:
+            hits = _locate_pyramid(
+                needle_image, haystack_image, confidence, int(pyramid), limit=1
+            )
+            if not hits:
+                continue
+            x, y, score = hits[0]
+        else:
+            result = cv2.matchTemplate(
+                haystack_image, needle_image, cv2.TM_CCOEFF_NORMED
+            )
+            _, score, _, (x, y) = cv2.minMaxLoc(result)
+        if score > confidence and (best is None or score > best.score):
+            box = Box(x + region[0], y + region[1], needle_width, needle_height)
+            best = Match(label, box, float(score))
+    return best
@@ -0,0 +1,206 @@
+"""
+Perceptual fingerprints of known application screens.
+
+Knowing which screen (or form state) is showing usually takes several
+template searches. A fingerprint is a difference hash of a downscaled region
+of the frame, so classifying the current frame against every known screen
+costs one resize per region and a few integer comparisons. Screens come from
+reference captures on disk or are registered at runtime once the bot reaches
+them.
+"""
+
+import collections
+import glob
+import os
+import threading
+
+import cv2
+import numpy
+
+Fingerprint = collections.namedtuple("Fingerprint", "name region hash")
+
+REFERENCE_EXTENSIONS = (".png", ".bmp", ".jpg", ".jpeg")
+
+
+def dhash(frame, region=None, size=16):
+    """
+    Compute the difference hash of a region of the frame.
+
+    Args:
+        frame (numpy.ndarray): A BGR or grayscale frame.
+        region (tuple, optional): Bounding box (left, top, width, height). Defaults to the
+            whole frame.
+        size (int, optional): Side of the hash grid; the hash has size * size bits.
+            Defaults to 16.
+
+    Returns:
+        int: The hash bits. None if the region is outside the frame.
+    """
+    if region:
+        left, top, width, height = region
+        frame = frame[top: top + height, left: left + width]
+        if frame.shape[0] != height or frame.shape[1] != width:
+            return None
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(numpy.packbits(bits).tobytes(), "big")
+
+
+def distance(a, b):
+    """
+    Number of different bits between two hashes.
+    """
+    return bin(a ^ b).count("1")
+
+
+class ScreenIndex:
+    """
+    Fingerprints of known screens, each one computed over its own region.
+
+    Args:
+        size (int, optional): Side of the hash grid. Defaults to 16.
+        max_distance (int, optional): Largest number of different bits for a frame to match
+            a screen. Defaults to 8% of the hash bits.
+        variants (int, optional): Fingerprints kept per screen name. Defaults to 4.
+    """
+
+    def __init__(self, size=16, max_distance=None, variants=4):
+        self.size = size
+        self.max_distance = (
+            max_distance if max_distance is not None else int(0.08 * size * size)
+        )
+        self.variants = variants
+        self._screens = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._screens
+
+    def __len__(self):
+        return len(self._screens)
+
+    def register(self, name, frame, region=None):
+        """
+        Add a fingerprint of a screen.
+
+        Args:
+            name (str): The screen name.
+            frame (numpy.ndarray): A capture of the screen.
+            region (tuple, optional): Bounding box (left, top, width, height) that identifies
+                the screen. Defaults to the whole frame.
+        """
+        region = tuple(int(v) for v in region) if region else None
+        screen_hash = dhash(frame, region, self.size)
+        if screen_hash is None:
+            return
+        fingerprint = Fingerprint(name, region, screen_hash)
+        with self._lock:
+            entries = self._screens.setdefault(name, [])
+            if fingerprint in entries:
+                return
+            entries.append(fingerprint)
+            del entries[: -self.variants]
+
+    def load_directory(self, path):
+        """
+        Register the reference captures of a directory.
+
+        Each image file is a screen named after the file; the images inside a
+        subdirectory are variants of the screen named after the subdirectory.
+
+        Args:
+            path (str): The directory holding the reference captures.
+
+        Returns:
+            count (int): Number of screens known after loading.
+        """
+        if not os.path.isdir(path):
+            return len(self)
+        for file in sorted(glob.glob(os.path.join(path, "**", "*"), recursive=True)):
+            if not file.lower().endswith(REFERENCE_EXTENSIONS):
+                continue
+            parent = os.path.dirname(file)
+            if os.path.samefile(parent, path):
+                name = os.path.splitext(os.path.basename(file))[0]
+            else:
+                name = os.path.relpath(parent, path).replace(os.sep, "/")
+            frame = cv2.imread(file, cv2.IMREAD_COLOR)
+            if frame is not None:
+                self.register(name, frame)
+        return len(self)
+
+    def region(self, name):
+        """
+        Region of the latest fingerprint of a screen.
+
+        Args:
+            name (str): The screen name.
+
+        Returns:
+            region (tuple): Bounding box (left, top, width, height). None if the screen is
+                unknown or identified by the whole frame.
+        """
+        with self._lock:
+            entries = self._screens.get(name)
+            return entries[-1].region if entries else None
+
+    def forget(self, name):
+        """
+        Remove all the fingerprints of a screen.
+
+        Args:
+            name (str): The screen name.
+        """
+        with self._lock:
+            self._screens.pop(name, None)
+
+    def classify(self, frame, names=None):
+        """
+        Find the known screen closest to the frame.
+
+        Args:
+            frame (numpy.ndarray): The current frame.
+            names (Iterable[str], optional): Screens to consider. Defaults to all.
+
+        Returns:
+            result (Tuple): The screen name and the distance of its fingerprint. (None, None)
+                if no screen is within `max_distance`.
+        """
+        with self._lock:
+            entries = [
+                entry
+                for name, fingerprints in self._screens.items()
+                if names is None or name in names
+                for entry in fingerprints
+            ]
+
+        hashes = {}
+        best = (None, None)
+        for entry in entries:
+            if entry.region not in hashes:
+                hashes[entry.region] = dhash(frame, entry.region, self.size)
+            frame_hash = hashes[entry.region]
+            if frame_hash is None:
+                continue
+            dist = distance(frame_hash, entry.hash)
+            if dist <= self.max_distance and (best[1] is None or dist < best[1]):
+                best = (entry.name, dist)
+        return best
+
+    def matches(self, name, frame):
+        """
+        Whether the frame shows the given screen.
+
+        Args:
+            name (str): The screen name.
+            frame (numpy.ndarray): The current frame.
+
+        Returns:
+            bool: True if the frame is within `max_distance` of a fingerprint of the screen.
+        """
+        return self.classify(frame, (name,))[0] == name
+
+
+screens = ScreenIndex()
@@ -0,0 +1,359 @@
+"""
+Change detection between consecutive screen captures.
+
+Wait loops keep capturing the screen while the application is busy, and most
+of those frames are identical to the previous one. Matching a template against
+an identical frame can only repeat the previous result, so the loops compare a
+cheap signature of the frame before running `cv2.matchTemplate` again. When
+only part of the frame changed, `IncrementalMatcher` re-matches just the
+changed rectangles and reuses the scores of the untouched area.
+"""
+
+import collections
+import threading
+import time
+import zlib
+
+import cv2
+import numpy
+
+from . import config, cv2find
+
+
+def signature(frame, region=None):
+    """
+    Compute a signature of the pixels inside a region of the frame.
+
+    Args:
+        frame (numpy.ndarray): The captured frame.
+        region (tuple, optional): Bounding box (left, top, width, height). Defaults to
+            the whole frame.
+
+    Returns:
+        int: CRC32 of the region pixels.
+    """
+    if region:
+        frame = frame[region[1]: region[1] + region[3], region[0]: region[0] + region[2]]
+    return zlib.crc32(numpy.ascontiguousarray(frame))
+
+
+class FrameGate:
+    """
+    Remembers the frames in which a search already failed.
+
+    A search is identified by a hashable key holding everything that affects
+    its result (template, region, confidence, etc.). When the frame signature
+    is the same as the one of the last miss for that key, the search would
+    fail again and can be skipped.
+
+    Args:
+        size (int, optional): Maximum number of searches remembered. Defaults to 256.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self._misses = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def unchanged(self, key, frame_signature):
+        """
+        Whether the search already failed on a frame with this signature.
+
+        Args:
+            key (Hashable): The search identifier.
+            frame_signature (int): The signature of the current frame.
+
+        Returns:
+            bool: True if the search can be skipped.
+        """
+        with self._lock:
+            return self._misses.get(key) == frame_signature
+
+    def miss(self, key, frame_signature):
+        """
+        Record that the search failed on a frame with this signature.
+
+        Args:
+            key (Hashable): The search identifier.
+            frame_signature (int): The signature of the current frame.
+        """
+        with self._lock:
+            self._misses[key] = frame_signature
+            self._misses.move_to_end(key)
+            while len(self._misses) > self.size:
+                self._misses.popitem(last=False)
+
+    def clear(self):
+        """
+        Forget all the recorded misses.
+        """
+        with self._lock:
+            self._misses.clear()
+
+
+class MatchCache:
+    """
+    Remembers the recent hits of the searches.
+
+    The cache is shared by every bot of the process, since they all see the same
+    screen, and any input action of any of them clears it. Between actions the
+    application can still change the screen on its own, for example opening a
+    popup, so a hit is also dropped after `max_age` seconds, and presence checks
+    such as `DesktopBot.validate_exists` look at the screen instead of the cache.
+    A hit found with a given confidence also serves the searches asking for less.
+
+    Args:
+        max_age (float, optional): Seconds a hit stays valid. 0 disables the cache.
+            Defaults to `config.MATCH_CACHE_MAX_AGE`.
+        size (int, optional): Maximum number of hits remembered. Defaults to 256.
+    """
+
+    def __init__(self, max_age=config.MATCH_CACHE_MAX_AGE, size=256):
+        self.max_age = max_age
+        self.size = size
+        self._hits = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, confidence):
+        """
+        Return the cached hit of a search.
+
+        Args:
+            key (Hashable): The search identifier.
+            confidence (float): Minimum score of the search.
+
+        Returns:
+            element (Box): The cached hit. None if there is no valid hit.
+        """
+        if self.max_age <= 0:
+            return None
+        with self._lock:
+            entry = self._hits.get(key)
+            if entry is None:
+                return None
+            found, score, element = entry
+            if time.monotonic() - found > self.max_age:
+                del self._hits[key]
+                return None
+            return element if score >= confidence else None
+
+    def put(self, key, confidence, element):
+        """
+        Record the hit of a search.
+
+        Args:
+            key (Hashable): The search identifier.
+            confidence (float): Minimum score the hit was searched with.
+            element (Box): The hit.
+        """
+        if self.max_age <= 0:
+            return
+        with self._lock:
+            self._hits[key] = (time.monotonic(), confidence, element)
+            self._hits.move_to_end(key)
+            while len(self._hits) > self.size:
+                self._hits.popitem(last=False)
+
+    def discard(self, key):
+        """
+        Forget the hit of a search.
+
+        Args:
+            key (Hashable): The search identifier.
+        """
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def clear(self):
+        """
+        Forget all the recorded hits.
+        """
+        with self._lock:
+            self._hits.clear()
+
+
+def changed_regions(previous, current, cell=16, max_regions=8):
+    """
+    Compute the bounding rectangles of the areas that differ between two frames.
+
+    The difference mask is reduced to a grid of `cell` sized blocks and the
+    connected groups of changed blocks become the rectangles. When there are
+    more than `max_regions` groups they are merged into a single rectangle.
+
+    Args:
+        previous (numpy.ndarray): The previous frame.
+        current (numpy.ndarray): The current frame, with the same shape.
+        cell (int, optional): Block size in pixels. Defaults to 16.
+        max_regions (int, optional): Maximum number of rectangles. Defaults to 8.
+
+    Returns:
+        list: Rectangles as (left, top, width, height). Empty when the frames are equal.
+    """
+    diff = cv2.absdiff(previous, current)
+    height, width = diff.shape[:2]
+    channels = diff.shape[2] if diff.ndim == 3 else 1
+    rows, cols = -(-height // cell), -(-width // cell)
+    if rows * cell != height or cols * cell != width:
+        diff = cv2.copyMakeBorder(
+            diff, 0, rows * cell - height, 0, cols * cell - width, cv2.BORDER_CONSTANT, value=0
+        )
+    # Channels are folded into the columns so a block spans cell * channels values.
+    blocks = diff.reshape(rows, cell, cols, cell * channels).max(axis=(1, 3))
+    if not blocks.any():
+        return []
+    blocks = (blocks > 0).astype(numpy.uint8)
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+    boxes = stats[1:count, :4]
+    if len(boxes) > max_regions:
+        left, top = boxes[:, 0].min(), boxes[:, 1].min()
+        right = (boxes[:, 0] + boxes[:, 2]).max()
+        bottom = (boxes[:, 1] + boxes[:, 3]).max()
+        boxes = [(left, top, right - left, bottom - top)]
+
+    regions = []
+    for left, top, w, h in boxes:
+        x, y = int(left) * cell, int(top) * cell
+        right, bottom = min(width, int(left + w) * cell), min(height, int(top + h) * cell)
+        regions.append((x, y, right - x, bottom - y))
+    return regions
+
+
+class IncrementalMatcher:
+    """
+    Score map of one template kept up to date over consecutive frames.
+
+    Only the positions whose window overlaps a changed rectangle are matched
+    again; the scores of the untouched area are reused from the previous frame.
+    TM_CCOEFF_NORMED only depends on the pixels under the window, so the
+    result matches the whole-frame search up to floating point error.
+
+    Args:
+        needle (numpy.ndarray): The template, already converted like the frames.
+        full_refresh (float, optional): Fraction of changed area above which the whole
+            frame is matched again. Defaults to 0.5.
+        exact (bool, optional): Whether or not `best` searches the refreshed area for an
+            exact occurrence before the correlation. Defaults to False.
+    """
+
+    def __init__(self, needle, full_refresh=0.5, exact=False):
+        self.needle = needle
+        self.full_refresh = full_refresh
+        self.exact = exact
+        self._frame = None
+        self._scores = None
+
+    def _windows(self, frame, changed):
+        """
+        Return the frame areas to match again, as (left, top, right, bottom) ranges of
+        window positions. None when the whole frame must be matched again.
+        """
+        needle_height, needle_width = self.needle.shape[:2]
+        frame_height, frame_width = frame.shape[:2]
+        if self._frame is None or self._frame.shape != frame.shape:
+            return None
+        if changed is None:
+            changed = changed_regions(self._frame, frame)
+
+        area = sum(w * h for _, _, w, h in changed)
+        if self._scores is None or area > self.full_refresh * frame_width * frame_height:
+            return None
+        max_x = frame_width - needle_width
+        max_y = frame_height - needle_height
+        windows = []
+        for x, y, w, h in changed:
+            # Every window position overlapping the rectangle.
+            left, right = max(0, x - needle_width + 1), min(max_x, x + w - 1)
+            top, bottom = max(0, y - needle_height + 1), min(max_y, y + h - 1)
+            if left <= right and top <= bottom:
+                windows.append((left, top, right, bottom))
+        return windows
+
+    def _update(self, frame, windows):
+        needle_height, needle_width = self.needle.shape[:2]
+        if windows is None:
+            self._scores = cv2.matchTemplate(frame, self.needle, cv2.TM_CCOEFF_NORMED)
+        else:
+            for left, top, right, bottom in windows:
+                window = frame[top: bottom + needle_height, left: right + needle_width]
+                self._scores[top: bottom + 1, left: right + 1] = cv2.matchTemplate(
+                    window, self.needle, cv2.TM_CCOEFF_NORMED
+                )
+        self._frame = frame
+        return self._scores
+
+    def _fits(self, frame):
+        needle_height, needle_width = self.needle.shape[:2]
+        return needle_height <= frame.shape[0] and needle_width <= frame.shape[1]
+
+    def scores(self, frame, changed=None):
+        """
+        Return the score map of the template over the frame.
+
+        Args:
+            frame (numpy.ndarray): The current frame.
+            changed (list, optional): Rectangles that changed since the previous frame
+                given to this matcher. Computed when not informed.
+
+        Returns:
+            numpy.ndarray: The TM_CCOEFF_NORMED score map. None if the needle is larger
+                than the frame.
+        """
+        if not self._fits(frame):
+            return None
+        return self._update(frame, self._windows(frame, changed))
+
+    def best(self, frame, confidence, changed=None, index=None):
+        """
+        Return the best hit of the template over the frame.
+
+        With `exact`, an occurrence matching pixel for pixel inside the area to
+        refresh is returned with score 1.0 without running the correlation. The
+        untouched area cannot hold one, or the previous frame would have hit.
+
+        Args:
+            frame (numpy.ndarray): The current frame.
+            confidence (float): Minimum score to consider a match.
+            changed (list, optional): Rectangles that changed since the previous frame.
+            index (cv2find.RollingHashIndex, optional): Index of the frame shared by the
+                matchers of the other templates. Without it the area to refresh is
+                hashed here, which is cheaper when only small rectangles changed.
+
+        Returns:
+            tuple: (x, y, score) of the best hit. None if not found.
+        """
+        if not self._fits(frame):
+            return None
+        windows = self._windows(frame, changed)
+        if self.exact:
+            hit = self._exact(frame, windows, index)
+            if hit is not None:
+                # The score map was not brought up to date with this frame.
+                self._frame = None
+                return hit[0], hit[1], 1.0
+
+        result = self._update(frame, windows)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        if score > confidence:
+            return x, y, float(score)
+        return None
+
+    def _exact(self, frame, windows, index=None):
+        height, width = self.needle.shape[:2]
+        if windows is None:
+            windows = [(0, 0, frame.shape[1] - width, frame.shape[0] - height)]
+        for left, top, right, bottom in windows:
+            if index is None:
+                window = frame[top: bottom + height, left: right + width]
+                hits = cv2find.RollingHashIndex(window).find(self.needle, limit=1)
+                hits = [(x + left, y + top) for x, y in hits]
+            else:
+                area = (left, top, right - left + width, bottom - top + height)
+                hits = index.find(self.needle, 1, area)
+            if hits:
+                return hits[0]
+        return None
+
+
+gate = FrameGate()
+matches = MatchCache()
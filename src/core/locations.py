@@ -0,0 +1,173 @@
+"""
+Last known location of each image on screen, used as a search prior.
+
+Stable UIs such as the maximized Receitanet BX window show most controls at
+the same coordinates on every run, so searching a small padded region around
+the last hit first avoids matching against the whole screen. The best score
+seen at each location is kept too: a hit around the last location that scores
+clearly below it may be a weaker look-alike, and the whole screen is searched.
+"""
+
+import json
+import logging
+import os
+import threading
+
+from . import config
+from .cv2find import Box
+
+
+class LocationPrior:
+    """
+    Last known location of each image, keyed by screen resolution.
+
+    The locations are loaded lazily from a JSON file and written back only
+    when a location changes.
+
+    Args:
+        path (str, optional): The JSON file in which locations are persisted.
+            Defaults to `config.LOCATION_PRIOR_PATH`. Use None to keep them in memory only.
+    """
+
+    def __init__(self, path=config.LOCATION_PRIOR_PATH):
+        self.path = os.path.expanduser(path) if path else None
+        self._locations = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._locations is not None:
+            return self._locations
+        self._locations = {}
+        if self.path and os.path.isfile(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._locations = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning("Ignorando cache de posições inválido %s: %s", self.path, e)
+        return self._locations
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._locations, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning("Falha ao salvar cache de posições %s: %s", self.path, e)
+
+    def get(self, resolution, key):
+        """
+        Return the last known location of an image.
+
+        Args:
+            resolution (str): The screen resolution, e.g. `1920x1080`.
+            key (str): The image identifier.
+
+        Returns:
+            box (Box): The last known location. None if unknown.
+        """
+        with self._lock:
+            location = self._load().get(resolution, {}).get(key)
+        return Box(*location[:4]) if location else None
+
+    def score(self, resolution, key):
+        """
+        Return the best score seen at the last known location of an image.
+
+        Args:
+            resolution (str): The screen resolution, e.g. `1920x1080`.
+            key (str): The image identifier.
+
+        Returns:
+            score (float): The best score. None if unknown.
+        """
+        with self._lock:
+            location = self._load().get(resolution, {}).get(key)
+        return location[4] if location and len(location) > 4 else None
+
+    def trusts(
+        self, resolution, key, score, tolerance=config.LOCATION_PRIOR_TOLERANCE
+    ):
+        """
+        Whether a hit around the last known location scores like the best seen there.
+
+        Args:
+            resolution (str): The screen resolution, e.g. `1920x1080`.
+            key (str): The image identifier.
+            score (float): The score of the hit.
+            tolerance (float, optional): How far below the best score the hit may be.
+
+        Returns:
+            bool: True if the hit can be taken without searching the whole region.
+        """
+        best = self.score(resolution, key)
+        return best is None or score >= best - tolerance
+
+    def region(self, resolution, key, bounds, padding=config.LOCATION_PRIOR_PADDING):
+        """
+        Return the padded region around the last known location of an image.
+
+        Args:
+            resolution (str): The screen resolution, e.g. `1920x1080`.
+            key (str): The image identifier.
+            bounds (tuple): The region (left, top, width, height) the result must be kept in.
+            padding (int, optional): Pixels added to each side of the last location.
+
+        Returns:
+            region (tuple): Region as (left, top, width, height). None if unknown or
+                outside the bounds.
+        """
+        box = self.get(resolution, key)
+        if box is None:
+            return None
+        left = max(bounds[0], box.left - padding)
+        top = max(bounds[1], box.top - padding)
+        right = min(bounds[0] + bounds[2], box.left + box.width + padding)
+        bottom = min(bounds[1] + bounds[3], box.top + box.height + padding)
+        if right - left < box.width or bottom - top < box.height:
+            return None
+        return left, top, right - left, bottom - top
+
+    def record(self, resolution, key, box, score=None):
+        """
+        Store the location in which an image was found.
+
+        The score is kept as the best one seen at the location; it is reset when
+        the location changes.
+
+        Args:
+            resolution (str): The screen resolution, e.g. `1920x1080`.
+            key (str): The image identifier.
+            box (Box): The location found.
+            score (float, optional): The score of the hit.
+        """
+        location = [int(v) for v in box]
+        with self._lock:
+            locations = self._load().setdefault(resolution, {})
+            current = locations.get(key)
+            if current and current[:4] == location:
+                best = current[4] if len(current) > 4 else None
+                if score is None or (best is not None and score <= best + 0.005):
+                    return
+            if score is not None:
+                location.append(round(float(score), 4))
+            locations[key] = location
+            self._save()
+
+    def forget(self, resolution, key):
+        """
+        Remove the stored location of an image.
+
+        Args:
+            resolution (str): The screen resolution, e.g. `1920x1080`.
+            key (str): The image identifier.
+        """
+        with self._lock:
+            if self._load().get(resolution, {}).pop(key, None) is not None:
+                self._save()
+
+
+priors = LocationPrior()
@@ -1,7 +1,10 @@
 # Module for OS Compatibility issues and PyAutoGui
 import platform
 
-import pyautogui
+try:
+    import pyautogui
+except Exception:  # No display available, e.g. replaying captured frames on Linux.
+    pyautogui = None
 
 if platform.system() == "Darwin":
     import pyautogui._pyautogui_osx as osx
@@ -0,0 +1,155 @@
+"""
+Pacing of the polling loops of DesktopBot.
+
+The find/wait loops capture and match the screen until an element shows up
+or goes away. `PollScheduler` decides how long they sleep between captures:
+the loops poll fast right after an input action or a screen change, back off
+exponentially while the screen is static and never keep more than the CPU
+budget of the host busy. `SleepSavings` accounts for the time saved by waits
+that replaced fixed sleeps.
+"""
+
+import threading
+import time
+
+from . import config
+
+
+class PollScheduler:
+    """
+    Shared pacing policy of the polling loops.
+
+    Args:
+        fast (float, optional): Interval (s) right after an input action or a screen change.
+            Defaults to `config.POLL_FAST_INTERVAL`.
+        slow (float, optional): Longest interval (s) while the screen is static.
+            Defaults to `config.POLL_SLOW_INTERVAL`.
+        input_window (float, optional): Time (s) an input action keeps the loops fast.
+            Defaults to `config.POLL_INPUT_WINDOW`.
+        budget (float, optional): Fraction of one CPU core the loops may keep busy.
+            Defaults to `config.POLL_CPU_BUDGET`.
+    """
+
+    def __init__(
+        self,
+        fast=config.POLL_FAST_INTERVAL,
+        slow=config.POLL_SLOW_INTERVAL,
+        input_window=config.POLL_INPUT_WINDOW,
+        budget=config.POLL_CPU_BUDGET,
+    ):
+        self.fast = fast
+        self.slow = slow
+        self.input_window = input_window
+        self.budget = min(1.0, max(0.01, budget))
+        self._last_input = None
+        self._lock = threading.Lock()
+
+    def notify_input(self):
+        """
+        Record that an input action was just performed.
+        """
+        with self._lock:
+            self._last_input = time.monotonic()
+
+    def after_input(self):
+        """
+        Whether an input action was performed within the input window.
+
+        Returns:
+            bool: True if the loops should poll fast.
+        """
+        with self._lock:
+            last_input = self._last_input
+        return last_input is not None and time.monotonic() - last_input < self.input_window
+
+    def loop(self):
+        """
+        Start pacing a new polling loop.
+
+        Returns:
+            poll (Poll): The pacing state of the loop.
+        """
+        return Poll(self)
+
+
+class Poll:
+    """
+    Pacing state of a single polling loop.
+
+    Args:
+        scheduler (PollScheduler): The policy followed by the loop.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.interval = scheduler.fast
+        self._resumed = time.monotonic()
+
+    def wait(self, changed=True, deadline=None):
+        """
+        Sleep until the next capture.
+
+        The time spent since the loop last woke up counts as work, and the sleep
+        is stretched so work / (work + sleep) stays within the CPU budget.
+
+        Args:
+            changed (bool, optional): Whether the last capture differed from the previous one.
+                Defaults to True.
+            deadline (float, optional): `time.time()` after which the loop gives up. The sleep
+                never goes past it.
+
+        Returns:
+            delay (float): Seconds slept.
+        """
+        scheduler = self.scheduler
+        work = time.monotonic() - self._resumed
+        if changed or scheduler.after_input():
+            self.interval = scheduler.fast
+        else:
+            self.interval = min(self.interval * 2, scheduler.slow)
+
+        delay = max(self.interval, work * (1 / scheduler.budget - 1))
+        if deadline is not None:
+            delay = min(delay, max(0.0, deadline - time.time()))
+        time.sleep(delay)
+        self._resumed = time.monotonic()
+        return delay
+
+
+class SleepSavings:
+    """
+    Time saved by waits that replaced fixed sleeps, accumulated per job.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.waits = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        """
+        Account for a wait that finished before the sleep it replaced.
+
+        Args:
+            seconds (float): Seconds saved by the wait.
+        """
+        with self._lock:
+            self.total += seconds
+            self.waits += 1
+
+    def reset(self):
+        """
+        Start accounting for a new job.
+
+        Returns:
+            total (float): Seconds saved since the last reset.
+        """
+        with self._lock:
+            total = self.total
+            self.total = 0.0
+            self.waits = 0
+        return total
+
+
+scheduler = PollScheduler()
+savings = SleepSavings()
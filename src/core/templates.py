@@ -0,0 +1,109 @@
+"""
+Store of decoded templates shared by the image search methods of DesktopBot.
+
+Each image under `src/images` is decoded once per process and kept as
+ready-to-match BGR and grayscale `numpy` arrays, so the polling loops of the
+`find*` family no longer re-open and re-convert the PNG on every iteration.
+An image replaced on disk is decoded again on its next use.
+The discriminative pixels used by the matching prefilter are selected at the
+same time.
+"""
+
+import collections
+import os
+import threading
+
+import cv2
+from PIL import Image
+
+from . import cv2find
+
+Template = collections.namedtuple(
+    "Template", "path bgr gray width height probes mtime"
+)
+
+
+class TemplateStore:
+    """
+    Process-wide cache of decoded templates keyed by absolute file path.
+
+    The store is safe to use from multiple threads. Templates are decoded
+    lazily on first use or eagerly through `preload`.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._templates
+
+    def __len__(self):
+        return len(self._templates)
+
+    def load(self, path):
+        """
+        Return the decoded template for the image at the given path.
+
+        The template is decoded again when the file was modified since it was
+        decoded.
+
+        Args:
+            path (str): Path for the image on disk.
+
+        Returns:
+            template (Template): The decoded template.
+        """
+        key = os.path.abspath(path)
+        mtime = os.path.getmtime(key)
+        template = self._templates.get(key)
+        if template is not None and template.mtime == mtime:
+            return template
+
+        with Image.open(key) as img:
+            bgr = cv2find._load_cv2(img)
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        height, width = bgr.shape[:2]
+        probes = cv2find.discriminative_pixels(gray)
+        template = Template(key, bgr, gray, width, height, probes, mtime)
+
+        with self._lock:
+            current = self._templates.get(key)
+            if current is not None and current.mtime == mtime:
+                return current
+            self._templates[key] = template
+            return template
+
+    def preload(self, paths):
+        """
+        Decode all the given images ahead of time.
+
+        Args:
+            paths (Iterable[str]): Paths for the images on disk.
+
+        Returns:
+            count (int): Number of templates available in the store.
+        """
+        for path in paths:
+            self.load(path)
+        return len(self)
+
+    def discard(self, path):
+        """
+        Drop a template from the store, forcing it to be decoded again.
+
+        Args:
+            path (str): Path for the image on disk.
+        """
+        with self._lock:
+            self._templates.pop(os.path.abspath(path), None)
+
+    def clear(self):
+        """
+        Drop all templates from the store.
+        """
+        with self._lock:
+            self._templates.clear()
+
+
+store = TemplateStore()
@@ -0,0 +1,247 @@
+"""
+Matching backends for searching many images on the same frame.
+
+`cv2.matchTemplate` releases the GIL, so the default backend fans the needles
+out to a thread pool shared by all bots, with no pickling or process startup.
+The process pool is kept for setups where threads do not scale: it is started
+once per process, each frame is copied into a shared memory block that the
+workers map instead of receiving a pickled screenshot, and every worker keeps
+the decoded templates in its own `templates.store`.
+
+With exact matching, the serial and thread backends hash the frame once
+(`cv2find.RollingHashIndex`) and share the index among the needles. The
+process workers cannot share it and each hashes the frame per needle.
+"""
+
+import atexit
+import concurrent.futures
+import multiprocessing
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import cv2
+import numpy
+
+from . import config, cv2find, templates
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # The block belongs to the parent process; before Python 3.13 attaching
+    # also registers it with the resource tracker, which would unlink it when
+    # the worker exits.
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _init_worker():
+    # Parallelism comes from the processes; OpenCV threads would oversubscribe the CPUs.
+    cv2.setNumThreads(1)
+
+
+def _locate(name, shape, dtype, path, confidence, grayscale, exact):
+    """
+    Locate the best hit of an image in the frame published in shared memory.
+
+    Runs inside the workers, so it must stay a module level function.
+    """
+    shm = _attach(name)
+    try:
+        frame = numpy.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        template = templates.store.load(path)
+        needle = template.gray if grayscale else template.bgr
+        box = cv2find.locate_opencv(needle, frame, confidence=confidence, exact=exact)
+        del frame
+    finally:
+        shm.close()
+    return None if box is None else cv2find.Box(*(int(v) for v in box))
+
+
+class MatchingPool:
+    """
+    Process pool matching many templates against the same frame.
+
+    The pool and its shared memory block are created on first use and reused
+    for the following frames while they fit in the block.
+
+    Args:
+        processes (int, optional): Number of worker processes. Defaults to the number of
+            CPUs minus one.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or max(1, multiprocessing.cpu_count() - 1)
+        self._pool = None
+        self._shm = None
+        self._lock = threading.Lock()
+
+    def _publish(self, frame):
+        if self._shm is None or self._shm.size < frame.nbytes:
+            self._release()
+            self._shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+        buffer = numpy.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shm.buf)
+        buffer[...] = frame
+        del buffer
+        return self._shm.name
+
+    def _release(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def locate(self, frame, paths, confidence=0.9, grayscale=False, exact=False):
+        """
+        Locate the best hit of each image in the frame.
+
+        Args:
+            frame (numpy.ndarray): The frame in which to search, already converted to
+                grayscale when `grayscale` is set.
+            paths (list): Paths for the images to search for.
+            confidence (float, optional): Minimum score to consider a match. Defaults to 0.9.
+            grayscale (bool, optional): Whether or not to match the grayscale templates.
+                Defaults to False.
+            exact (bool, optional): Whether or not to search first for exact occurrences.
+                Defaults to False.
+
+        Returns:
+            boxes (list): The best hit of each image, in the same order as `paths`. None for
+                the images not found.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(
+                    processes=self.processes, initializer=_init_worker
+                )
+            frame = numpy.ascontiguousarray(frame)
+            name = self._publish(frame)
+            args = [
+                (name, frame.shape, frame.dtype.str, path, confidence, grayscale, exact)
+                for path in paths
+            ]
+            return self._pool.starmap(_locate, args)
+
+    def shutdown(self):
+        """
+        Stop the workers and free the shared memory.
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+            self._release()
+
+
+class MatchingThreads:
+    """
+    Thread pool matching many needles against the same frame.
+
+    Args:
+        threads (int, optional): Number of threads. Defaults to the number of CPUs.
+    """
+
+    def __init__(self, threads=None):
+        self.threads = threads or multiprocessing.cpu_count()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def map(self, fn, *iterables):
+        """
+        Apply a function to every item in the pool threads.
+
+        Args:
+            fn (callable): The function to apply. It must be safe to call from many threads.
+            *iterables: The arguments, as in the builtin `map`.
+
+        Returns:
+            results (list): The results in the same order as the arguments.
+        """
+        if self.threads <= 1:
+            return list(map(fn, *iterables))
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.threads, thread_name_prefix="matching"
+                )
+        return list(self._executor.map(fn, *iterables))
+
+    def locate(self, frame, needles, confidence=0.9, exact=False):
+        """
+        Locate the best hit of each needle in the frame.
+
+        Args:
+            frame (numpy.ndarray): The frame in which to search.
+            needles (list): The templates to search for, converted like the frame.
+            confidence (float, optional): Minimum score to consider a match. Defaults to 0.9.
+            exact (bool, optional): Whether or not to search first for exact occurrences.
+                Defaults to False.
+
+        Returns:
+            boxes (list): The best hit of each needle, in the same order as `needles`. None
+                for the needles not found.
+        """
+        index = cv2find.RollingHashIndex(frame) if exact else None
+        return self.map(
+            lambda needle: cv2find.locate_opencv(
+                needle, frame, confidence=confidence, exact=exact, index=index
+            ),
+            needles,
+        )
+
+    def shutdown(self):
+        """
+        Stop the threads.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def locate(frame, paths, confidence=0.9, grayscale=False, backend=None, exact=False):
+    """
+    Locate the best hit of each image in the frame with the configured backend.
+
+    Args:
+        frame (numpy.ndarray): The frame in which to search, already converted to
+            grayscale when `grayscale` is set.
+        paths (list): Paths for the images to search for.
+        confidence (float, optional): Minimum score to consider a match. Defaults to 0.9.
+        grayscale (bool, optional): Whether or not to match the grayscale templates.
+            Defaults to False.
+        backend (str, optional): `serial`, `thread` or `process`. Defaults to
+            `config.MATCHING_BACKEND`.
+        exact (bool, optional): Whether or not to search first for exact occurrences.
+            Defaults to False.
+
+    Returns:
+        boxes (list): The best hit of each image, in the same order as `paths`. None for
+            the images not found.
+    """
+    backend = backend or config.MATCHING_BACKEND
+    if backend == "process":
+        return pool.locate(frame, paths, confidence, grayscale, exact)
+
+    loaded = [templates.store.load(path) for path in paths]
+    needles = [t.gray if grayscale else t.bgr for t in loaded]
+    if backend == "thread":
+        return threads.locate(frame, needles, confidence, exact)
+    if backend == "serial":
+        index = cv2find.RollingHashIndex(frame) if exact else None
+        return [
+            cv2find.locate_opencv(
+                n, frame, confidence=confidence, exact=exact, index=index
+            )
+            for n in needles
+        ]
+    raise ValueError(f"Unknown matching backend: {backend}")
+
+
+pool = MatchingPool()
+threads = MatchingThreads(config.MATCHING_THREADS)
+atexit.register(pool.shutdown)
+atexit.register(threads.shutdown)
@@ -0,0 +1,210 @@
+"""Execução em lote de payloads JSONL em uma única sessão do aplicativo.
+
+Cada linha da entrada é um payload no mesmo formato aceito via stdin. Todas as
+linhas são validadas antes de abrir o aplicativo, e um payload com uma lista
+de sistemas vira um job por sistema. Os jobs válidos são agrupados por CNPJ (o
+login é feito por contribuinte) e cada job gera um registro de resultado JSONL
+na saída.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, TextIO, Tuple
+
+from src.modules.data import Data
+from src.modules.exceptions import ValidationError
+from src.modules.types import SpedType
+from src.modules.validate import Validar
+
+STATUS_OK = "ok"
+STATUS_ERRO = "erro"
+STATUS_INVALIDO = "invalido"
+
+
+class Job(NamedTuple):
+    """Download de um sistema pedido por uma linha da entrada, já validado."""
+
+    linha: int
+    cnpj: str
+    sped_type: SpedType
+    data_inicial: str
+    data_final: str
+    id: Optional[str] = None
+
+
+def _campo(mensagem: Dict[str, Any], nome: str) -> Any:
+    """Lê um campo aceitando tanto `PascalCase` quanto `lowercase`."""
+    return mensagem.get(nome) or mensagem.get(nome.lower())
+
+
+def validar_payload(mensagem: Any, linha: int) -> List[Job]:
+    """
+    Valida um payload e o converte em jobs, um por sistema.
+
+    Args:
+        mensagem (Any): Payload decodificado da linha.
+        linha (int): Número da linha na entrada, a partir de 1.
+
+    Returns:
+        List[Job]: Jobs com CNPJ somente com dígitos e datas no formato DD/MM/AAAA, na
+            ordem de `ORDEM_SISTEMAS`.
+
+    Raises:
+        ValidationError: Quando algum campo está ausente ou é inválido.
+    """
+    if not isinstance(mensagem, dict):
+        raise ValidationError("Payload não é um objeto JSON")
+
+    cnpj = Validar.validar_cnpj(_campo(mensagem, "Cnpj"))
+    if not cnpj:
+        raise ValidationError(f"CNPJ inválido: {_campo(mensagem, 'Cnpj')!r}")
+
+    sistema = _campo(mensagem, "Sistema")
+    if not sistema:
+        raise ValidationError("Sistema não fornecido")
+    try:
+        sped_types = SpedType.from_names(sistema)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Sistema não suportado: {sistema!r}")
+
+    datas = []
+    for nome in ("DataInicial", "DataFinal"):
+        valor = _campo(mensagem, nome)
+        try:
+            data = Data.formatar_data(valor) if isinstance(valor, str) else False
+        except ValueError:
+            data = False
+        if not data:
+            raise ValidationError(f"{nome} inválida: {valor!r}")
+        datas.append(data)
+    data_inicial, data_final = datas
+    if not Validar.is_start_date_greater_than_end_date(data_inicial, data_final):
+        raise ValidationError(f"Período inválido: {data_inicial} > {data_final}")
+
+    identificador = _campo(mensagem, "Id")
+    return [
+        Job(
+            linha=linha,
+            cnpj=cnpj,
+            sped_type=sped_type,
+            data_inicial=data_inicial,
+            data_final=data_final,
+            id=None if identificador is None else str(identificador),
+        )
+        for sped_type in sped_types
+    ]
+
+
+def ler_jobs(linhas: Iterable[str]) -> Tuple[List[Job], List[Dict[str, Any]]]:
+    """
+    Lê e valida todas as linhas da entrada.
+
+    Linhas em branco são ignoradas. Uma linha inválida não interrompe a
+    leitura: ela vira um registro de resultado com status `invalido`.
+
+    Args:
+        linhas (Iterable[str]): Linhas JSONL da entrada.
+
+    Returns:
+        Tuple[List[Job], List[Dict[str, Any]]]: Jobs válidos, na ordem da entrada, e os
+            registros de resultado das linhas inválidas.
+    """
+    jobs: List[Job] = []
+    invalidos: List[Dict[str, Any]] = []
+    for linha, texto in enumerate(linhas, start=1):
+        if not texto.strip():
+            continue
+        try:
+            jobs.extend(validar_payload(json.loads(texto), linha))
+        except (json.JSONDecodeError, ValidationError) as exc:
+            logging.warning("Linha %d inválida: %s", linha, exc)
+            invalidos.append(
+                {"linha": linha, "status": STATUS_INVALIDO, "erro": str(exc)}
+            )
+    return jobs, invalidos
+
+
+def agrupar_por_contribuinte(jobs: Iterable[Job]) -> Dict[str, List[Job]]:
+    """
+    Agrupa os jobs por CNPJ, preservando a ordem de chegada.
+
+    Os grupos seguem a ordem do primeiro job de cada CNPJ e, dentro de um grupo,
+    os jobs mantêm a ordem da entrada. Assim cada contribuinte exige um único
+    login.
+
+    Args:
+        jobs (Iterable[Job]): Jobs validados.
+
+    Returns:
+        Dict[str, List[Job]]: Jobs de cada CNPJ.
+    """
+    grupos: Dict[str, List[Job]] = {}
+    for job in jobs:
+        grupos.setdefault(job.cnpj, []).append(job)
+    return grupos
+
+
+def resultado(
+    job: Job,
+    status: str,
+    erro: Optional[BaseException] = None,
+    duracao: Optional[float] = None,
+    economia: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Monta o registro de resultado de um job.
+
+    Args:
+        job (Job): Job executado.
+        status (str): `ok` ou `erro`.
+        erro (Optional[BaseException]): Exceção que encerrou o job, quando houver.
+        duracao (Optional[float]): Tempo de execução em segundos.
+        economia (Optional[float]): Segundos economizados pelas esperas que
+            substituíram pausas fixas.
+
+    Returns:
+        Dict[str, Any]: Registro serializável em JSON.
+    """
+    registro: Dict[str, Any] = {
+        "linha": job.linha,
+        "id": job.id,
+        "cnpj": job.cnpj,
+        "sistema": job.sped_type.label,
+        "data_inicial": job.data_inicial,
+        "data_final": job.data_final,
+        "status": status,
+    }
+    if erro is not None:
+        registro["erro"] = f"{type(erro).__name__}: {erro}"
+    if duracao is not None:
+        registro["duracao"] = round(duracao, 1)
+    if economia is not None:
+        registro["economia"] = round(economia, 1)
+    return registro
+
+
+class ResultWriter:
+    """Grava os registros de resultado em JSONL, um por linha."""
+
+    def __init__(self, saida: TextIO) -> None:
+        """
+        Args:
+            saida (TextIO): Arquivo ou stream de saída.
+        """
+        self.saida = saida
+        self.contagem: Dict[str, int] = {}
+
+    def write(self, registro: Dict[str, Any]) -> None:
+        """
+        Grava um registro e descarrega o buffer, para que os resultados já
+        gravados sobrevivam a uma interrupção do lote.
+
+        Args:
+            registro (Dict[str, Any]): Registro de resultado.
+        """
+        registro = {**registro, "finalizado_em": datetime.now().isoformat()}
+        self.saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.saida.flush()
+        status = registro["status"]
+        self.contagem[status] = self.contagem.get(status, 0) + 1
@@ -0,0 +1,267 @@
+"""Servidor de jobs de longa duração.
+
+Mantém o interpretador, o OpenCV, os templates carregados e, enquanto chegam
+jobs, a sessão logada do aplicativo. Os clientes conectam via TCP (apenas
+localhost por padrão) e trocam uma mensagem JSON por linha:
+
+    {"acao": "enviar", "payload": {...}}  -> {"ok": true, "jobs": [1], "posicao": 0}
+    {"acao": "status", "job": 1}          -> {"ok": true, "job": {...}}
+    {"acao": "status"}                    -> {"ok": true, "fila": 0, ...}
+    {"acao": "encerrar"}                  -> {"ok": true}
+
+A fila é limitada: quando está cheia o envio é recusado com `"erro": "fila
+cheia"` e o cliente deve tentar de novo mais tarde. Um payload com uma lista de
+sistemas vira um job por sistema, todos aceitos ou recusados juntos.
+"""
+
+import collections
+import json
+import logging
+import queue
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.modules import batch
+from src.modules.exceptions import ValidationError
+
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Atende uma conexão, respondendo cada linha recebida com uma linha JSON."""
+
+    def handle(self) -> None:
+        for linha in self.rfile:
+            if not linha.strip():
+                continue
+            try:
+                resposta = self.server.daemon.atender(json.loads(linha))
+            except json.JSONDecodeError as exc:
+                resposta = {"ok": False, "erro": f"JSON inválido: {exc}"}
+            self.wfile.write((json.dumps(resposta, ensure_ascii=False) + "\n").encode())
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class JobDaemon:
+    """
+    Fila de jobs atendida por um único worker, alimentada por um socket local.
+
+    A automação usa a tela e o mouse, então os jobs rodam um de cada vez, na
+    ordem de chegada, na thread do worker.
+    """
+
+    def __init__(
+        self,
+        executar: Callable[[batch.Job], Dict[str, Any]],
+        ocioso: Optional[Callable[[], None]] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        capacidade: int = 100,
+        tempo_ocioso: float = 600,
+        historico: int = 1000,
+    ) -> None:
+        """
+        Args:
+            executar (Callable[[batch.Job], Dict[str, Any]]): Executa um job e devolve
+                seu registro de resultado.
+            ocioso (Optional[Callable[[], None]]): Chamado uma vez quando a fila fica
+                vazia por `tempo_ocioso` segundos, por exemplo para fechar o aplicativo.
+            host (str): Endereço de escuta. Padrão: "127.0.0.1".
+            port (int): Porta de escuta; 0 escolhe uma porta livre. Padrão: 8765.
+            capacidade (int): Jobs aguardando na fila antes de recusar envios.
+                Padrão: 100.
+            tempo_ocioso (float): Segundos sem jobs antes de chamar `ocioso`.
+                Padrão: 600.
+            historico (int): Jobs finalizados mantidos para consulta. Padrão: 1000.
+        """
+        self.executar = executar
+        self.ocioso = ocioso
+        self.tempo_ocioso = tempo_ocioso
+        self.historico = historico
+        self._fila: "queue.Queue[Tuple[int, batch.Job]]" = queue.Queue(capacidade)
+        self._jobs: "collections.OrderedDict[int, Dict[str, Any]]" = (
+            collections.OrderedDict()
+        )
+        self._sequencia = 0
+        self._contagem: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._server = _Server((host, port), _Handler)
+        self._server.daemon = self
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def endereco(self) -> Tuple[str, int]:
+        """Endereço (host, porta) em que o servidor escuta."""
+        return self._server.server_address[:2]
+
+    def enviar(self, payload: Any) -> Dict[str, Any]:
+        """
+        Valida um payload e coloca seus jobs na fila.
+
+        Args:
+            payload (Any): Payload no formato aceito via stdin.
+
+        Returns:
+            Dict[str, Any]: Resposta com os números dos jobs, um por sistema, e a
+                posição do primeiro na fila, ou o motivo da recusa.
+        """
+        with self._lock:
+            try:
+                jobs = batch.validar_payload(payload, linha=self._sequencia + 1)
+            except ValidationError as exc:
+                return {"ok": False, "erro": str(exc)}
+            # Só o worker retira da fila: o espaço livre não diminui até o put.
+            capacidade = self._fila.maxsize
+            if capacidade and self._fila.qsize() + len(jobs) > capacidade:
+                return {"ok": False, "erro": "fila cheia", "capacidade": capacidade}
+            posicao = self._fila.qsize()
+            sequencias = []
+            for job in jobs:
+                self._sequencia += 1
+                self._jobs[self._sequencia] = {
+                    **batch.resultado(job, STATUS_PENDENTE),
+                    "job": self._sequencia,
+                }
+                self._fila.put_nowait((self._sequencia, job))
+                sequencias.append(self._sequencia)
+                logging.info(
+                    "Job %d recebido: %s %s",
+                    self._sequencia,
+                    job.cnpj,
+                    job.sped_type.label,
+                )
+        return {"ok": True, "jobs": sequencias, "posicao": posicao}
+
+    def status(self, sequencia: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Consulta um job ou o estado geral do servidor.
+
+        Args:
+            sequencia (Optional[int]): Número do job. Quando omitido, retorna o estado
+                geral.
+
+        Returns:
+            Dict[str, Any]: Registro do job ou tamanho da fila, capacidade e contagem
+                dos jobs finalizados por status.
+        """
+        with self._lock:
+            if sequencia is None:
+                executando = [
+                    numero
+                    for numero, registro in self._jobs.items()
+                    if registro["status"] == STATUS_EXECUTANDO
+                ]
+                return {
+                    "ok": True,
+                    "fila": self._fila.qsize(),
+                    "capacidade": self._fila.maxsize,
+                    "executando": executando[0] if executando else None,
+                    "finalizados": dict(self._contagem),
+                }
+            registro = self._jobs.get(sequencia)
+        if registro is None:
+            return {"ok": False, "erro": f"Job desconhecido: {sequencia}"}
+        return {"ok": True, "job": registro}
+
+    def atender(self, mensagem: Any) -> Dict[str, Any]:
+        """
+        Responde uma mensagem recebida pelo socket.
+
+        Args:
+            mensagem (Any): Mensagem decodificada.
+
+        Returns:
+            Dict[str, Any]: Resposta a enviar ao cliente.
+        """
+        acao = mensagem.get("acao") if isinstance(mensagem, dict) else None
+        if acao == "enviar":
+            return self.enviar(mensagem.get("payload"))
+        if acao == "status":
+            return self.status(mensagem.get("job"))
+        if acao == "encerrar":
+            # shutdown espera serve_forever terminar; não pode rodar nesta thread.
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        return {"ok": False, "erro": f"Ação desconhecida: {acao!r}"}
+
+    def _atualizar(self, sequencia: int, registro: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[sequencia] = {**registro, "job": sequencia}
+            status = registro["status"]
+            if status == STATUS_EXECUTANDO:
+                return
+            self._contagem[status] = self._contagem.get(status, 0) + 1
+            finalizados = [
+                numero
+                for numero, item in self._jobs.items()
+                if item["status"] not in (STATUS_PENDENTE, STATUS_EXECUTANDO)
+            ]
+            for numero in finalizados[: max(0, len(finalizados) - self.historico)]:
+                del self._jobs[numero]
+
+    def _trabalhar(self) -> None:
+        ultimo_job = time.monotonic()
+        ocioso = True
+        while not self._parar.is_set():
+            try:
+                sequencia, job = self._fila.get(timeout=0.5)
+            except queue.Empty:
+                if not ocioso and time.monotonic() - ultimo_job >= self.tempo_ocioso:
+                    logging.info("Fila vazia há %.0f s", self.tempo_ocioso)
+                    ocioso = True
+                    if self.ocioso is not None:
+                        self.ocioso()
+                continue
+
+            ocioso = False
+            self._atualizar(sequencia, batch.resultado(job, STATUS_EXECUTANDO))
+            try:
+                registro = self.executar(job)
+            except Exception as exc:  # pylint: disable=broad-except
+                registro = batch.resultado(job, batch.STATUS_ERRO, exc)
+            self._atualizar(sequencia, registro)
+            logging.info("Job %d finalizado: %s", sequencia, registro["status"])
+            ultimo_job = time.monotonic()
+
+    def start(self) -> Tuple[str, int]:
+        """
+        Inicia o worker e o servidor em threads de fundo.
+
+        Returns:
+            Tuple[str, int]: Endereço em que o servidor escuta.
+        """
+        self._worker = threading.Thread(target=self._trabalhar, name="daemon-worker")
+        self._worker.start()
+        threading.Thread(
+            target=self._server.serve_forever, name="daemon-server", daemon=True
+        ).start()
+        logging.info("Servidor de jobs escutando em %s:%d", *self.endereco)
+        return self.endereco
+
+    def wait(self) -> None:
+        """Bloqueia até o servidor ser encerrado."""
+        while self._worker is not None and self._worker.is_alive():
+            self._worker.join(timeout=1)
+
+    def shutdown(self) -> None:
+        """
+        Para de aceitar conexões e encerra o worker após o job em execução.
+
+        Os jobs ainda na fila são descartados.
+        """
+        self._parar.set()
+        if self._worker is not None:
+            # Sem start, serve_forever não roda e shutdown ficaria esperando por ele.
+            self._server.shutdown()
+        self._server.server_close()
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join()
@@ -0,0 +1,288 @@
+"""Ordenação dos jobs de um lote pelo custo das transições da interface.
+
+O tempo de um job depende do estado em que a sessão anterior deixou o
+aplicativo: logar do zero, trocar o contribuinte ou só mudar de sistema na
+combobox custam muito diferente, e a mudança de sistema é barata quando o
+sistema de destino vem logo depois do atual na cadeia de `sistema_anterior`.
+`CustoTransicoes` estima esses custos a partir do log de tempos gravado pela
+sessão (`TimingLog`) e `ordenar` escolhe a sequência dos jobs que minimiza a
+soma estimada.
+
+O certificado é sempre o mesmo A1 e o tipo de arquivo e o período de cada
+sistema são fixos em `Sped.download_sped_*`, então o estado da interface entre
+jobs se resume ao contribuinte logado e ao sistema selecionado.
+"""
+
+import itertools
+import json
+import logging
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.modules.batch import Job, agrupar_por_contribuinte
+from src.modules.types import ORDEM_SISTEMAS, SpedType
+
+Transicao = Tuple[str, ...]
+
+
+class Estado(NamedTuple):
+    """Estado da interface depois de um job: contribuinte logado e sistema."""
+
+    cnpj: str
+    sped_type: SpedType
+
+    @classmethod
+    def de(cls, job: Job) -> "Estado":
+        """Estado em que o job deixa a interface."""
+        return cls(job.cnpj, job.sped_type)
+
+
+def transicao(anterior: Optional[Estado], atual: Estado) -> Transicao:
+    """
+    Classifica a passagem de um estado para o seguinte.
+
+    Args:
+        anterior (Optional[Estado]): Estado deixado pelo job anterior. None quando o
+            aplicativo precisa ser aberto e logado.
+        atual (Estado): Estado exigido pelo próximo job.
+
+    Returns:
+        Transicao: `("login", sistema)`, `("contribuinte", sistema)` ou
+            `("sistema", sistema_anterior, sistema)`.
+    """
+    if anterior is None:
+        return ("login", atual.sped_type.value)
+    if anterior.cnpj != atual.cnpj:
+        return ("contribuinte", atual.sped_type.value)
+    return ("sistema", anterior.sped_type.value, atual.sped_type.value)
+
+
+class CustoTransicoes:
+    """
+    Custo estimado, em segundos, de cada transição seguida do job.
+
+    A estimativa de uma transição é a mediana das últimas durações observadas
+    para ela; enquanto não há `minimo_amostras` observações, vale a estimativa
+    padrão da classe.
+    """
+
+    # Estimativas padrão (s), incluindo o próprio download.
+    LOGIN = 120.0
+    TROCA_CONTRIBUINTE = 60.0
+    MESMO_SISTEMA = 25.0
+    SISTEMA_SEGUINTE = 35.0
+    OUTRO_SISTEMA = 50.0
+
+    def __init__(self, minimo_amostras: int = 3, janela: int = 50) -> None:
+        """
+        Args:
+            minimo_amostras (int): Observações necessárias para substituir a
+                estimativa padrão. Padrão: 3.
+            janela (int): Observações mais recentes mantidas por transição.
+                Padrão: 50.
+        """
+        self.minimo_amostras = minimo_amostras
+        self.janela = janela
+        self._amostras: Dict[Transicao, List[float]] = {}
+
+    def padrao(self, chave: Transicao) -> float:
+        """
+        Estimativa padrão de uma transição.
+
+        Args:
+            chave (Transicao): Transição, como retornada por `transicao`.
+
+        Returns:
+            float: Custo estimado em segundos.
+        """
+        tipo = chave[0]
+        if tipo == "login":
+            return self.LOGIN
+        if tipo == "contribuinte":
+            return self.TROCA_CONTRIBUINTE
+        anterior, atual = SpedType(chave[1]), SpedType(chave[2])
+        if anterior is atual:
+            return self.MESMO_SISTEMA
+        if ORDEM_SISTEMAS.index(atual) == ORDEM_SISTEMAS.index(anterior) + 1:
+            return self.SISTEMA_SEGUINTE
+        return self.OUTRO_SISTEMA
+
+    def observar(self, chave: Transicao, duracao: float) -> None:
+        """
+        Registra a duração observada de uma transição seguida do job.
+
+        Args:
+            chave (Transicao): Transição, como retornada por `transicao`.
+            duracao (float): Segundos gastos.
+        """
+        amostras = self._amostras.setdefault(tuple(chave), [])
+        amostras.append(float(duracao))
+        del amostras[: -self.janela]
+
+    def aprender(self, observacoes: Iterable[Tuple[Transicao, float]]) -> int:
+        """
+        Registra várias observações, por exemplo as lidas de um `TimingLog`.
+
+        Args:
+            observacoes (Iterable[Tuple[Transicao, float]]): Pares (transição,
+                duração).
+
+        Returns:
+            int: Quantidade de observações registradas.
+        """
+        quantidade = 0
+        for chave, duracao in observacoes:
+            self.observar(chave, duracao)
+            quantidade += 1
+        return quantidade
+
+    def custo(self, anterior: Optional[Estado], atual: Estado) -> float:
+        """
+        Custo estimado de ir de um estado ao seguinte e executar o job.
+
+        Args:
+            anterior (Optional[Estado]): Estado deixado pelo job anterior.
+            atual (Estado): Estado exigido pelo próximo job.
+
+        Returns:
+            float: Custo estimado em segundos.
+        """
+        chave = transicao(anterior, atual)
+        amostras = self._amostras.get(chave)
+        if amostras and len(amostras) >= self.minimo_amostras:
+            return statistics.median(amostras)
+        return self.padrao(chave)
+
+
+def custo_total(
+    jobs: Iterable[Job],
+    modelo: CustoTransicoes,
+    inicial: Optional[Estado] = None,
+) -> float:
+    """
+    Custo estimado de executar os jobs na ordem dada.
+
+    Args:
+        jobs (Iterable[Job]): Jobs na ordem de execução.
+        modelo (CustoTransicoes): Modelo de custos.
+        inicial (Optional[Estado]): Estado da sessão antes do primeiro job.
+
+    Returns:
+        float: Soma dos custos estimados, em segundos.
+    """
+    total = 0.0
+    anterior = inicial
+    for job in jobs:
+        atual = Estado.de(job)
+        total += modelo.custo(anterior, atual)
+        anterior = atual
+    return total
+
+
+def ordenar(
+    jobs: Iterable[Job],
+    modelo: Optional[CustoTransicoes] = None,
+    inicial: Optional[Estado] = None,
+) -> List[Job]:
+    """
+    Ordena os jobs para minimizar o custo estimado das transições.
+
+    Os jobs de um mesmo contribuinte ficam juntos, começando pelo contribuinte
+    já logado em `inicial` e seguindo a ordem de chegada dos demais. Dentro de
+    cada contribuinte os sistemas seguem a permutação de menor custo (são no
+    máximo quatro, então todas são avaliadas), com empates resolvidos pela
+    ordem de `ORDEM_SISTEMAS`; os jobs de um mesmo sistema mantêm a ordem de
+    chegada.
+
+    Args:
+        jobs (Iterable[Job]): Jobs validados.
+        modelo (Optional[CustoTransicoes]): Modelo de custos. Padrão: estimativas
+            padrão.
+        inicial (Optional[Estado]): Estado da sessão antes do primeiro job.
+
+    Returns:
+        List[Job]: Os mesmos jobs na ordem de execução.
+    """
+    modelo = modelo or CustoTransicoes()
+    grupos = agrupar_por_contribuinte(jobs)
+    if inicial is not None and inicial.cnpj in grupos:
+        grupos = {inicial.cnpj: grupos.pop(inicial.cnpj), **grupos}
+
+    ordem: List[Job] = []
+    anterior = inicial
+    for cnpj, grupo in grupos.items():
+        por_sistema: Dict[SpedType, List[Job]] = {}
+        for sped_type in ORDEM_SISTEMAS:
+            selecionados = [job for job in grupo if job.sped_type is sped_type]
+            if selecionados:
+                por_sistema[sped_type] = selecionados
+
+        def _custo(sequencia: Tuple[SpedType, ...]) -> float:
+            return custo_total(
+                (job for sped_type in sequencia for job in por_sistema[sped_type]),
+                modelo,
+                anterior,
+            )
+
+        melhor = min(itertools.permutations(por_sistema), key=_custo)
+        for sped_type in melhor:
+            ordem.extend(por_sistema[sped_type])
+        anterior = Estado(cnpj, melhor[-1])
+    return ordem
+
+
+class TimingLog:
+    """
+    Log JSONL das durações dos jobs, com a transição que precedeu cada um.
+
+    Só a classificação da transição é gravada, sem o CNPJ dos contribuintes.
+    """
+
+    def __init__(self, caminho: str) -> None:
+        """
+        Args:
+            caminho (str): Arquivo do log, criado na primeira gravação.
+        """
+        self.caminho = Path(caminho)
+
+    def registrar(
+        self, anterior: Optional[Estado], atual: Estado, duracao: float
+    ) -> None:
+        """
+        Acrescenta a duração de um job ao log.
+
+        Args:
+            anterior (Optional[Estado]): Estado deixado pelo job anterior.
+            atual (Estado): Estado exigido pelo job.
+            duracao (float): Segundos gastos pelo job, incluindo a transição.
+        """
+        registro = {
+            "transicao": list(transicao(anterior, atual)),
+            "duracao": round(duracao, 2),
+            "registrado_em": datetime.now().isoformat(),
+        }
+        try:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            with self.caminho.open("a", encoding="utf-8") as arquivo:
+                arquivo.write(json.dumps(registro) + "\n")
+        except OSError as exc:
+            logging.warning("Falha ao gravar o log de tempos: %s", exc)
+
+    def ler(self) -> Iterator[Tuple[Transicao, float]]:
+        """
+        Lê as observações do log, ignorando linhas malformadas.
+
+        Returns:
+            Iterator[Tuple[Transicao, float]]: Pares (transição, duração).
+        """
+        if not self.caminho.exists():
+            return
+        with self.caminho.open(encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                try:
+                    registro = json.loads(linha)
+                    yield tuple(registro["transicao"]), float(registro["duracao"])
+                except (ValueError, KeyError, TypeError):
+                    continue
@@ -1,6 +1,8 @@
 """Tipos e constantes do domínio ReceitaNet BX."""
 
+import unicodedata
 from enum import Enum
+from typing import Iterable, List, Union
 
 
 class SpedType(str, Enum):
@@ -25,3 +27,56 @@ class SpedType(str, Enum):
             "sped ecf": "SPED ECF",
         }
         return _labels[self.value]
+
+    @classmethod
+    def from_name(cls, name: str) -> "SpedType":
+        """
+        Resolve o tipo a partir do nome informado no payload.
+
+        Acentos, caixa e espaços nas pontas são ignorados.
+
+        Args:
+            name (str): Nome do sistema, por exemplo "SPED Contribuições".
+
+        Returns:
+            SpedType: Enum correspondente.
+
+        Raises:
+            ValueError: Quando o nome não corresponde a nenhum tipo.
+        """
+        normalized = unicodedata.normalize("NFKD", name if isinstance(name, str) else "")
+        key = normalized.encode("ASCII", "ignore").decode("ASCII").strip().lower()
+        return cls(key)
+
+    @classmethod
+    def from_names(cls, names: Union[str, Iterable[str]]) -> List["SpedType"]:
+        """
+        Resolve um ou mais sistemas, na ordem de `ORDEM_SISTEMAS` e sem repetições.
+
+        Args:
+            names (Union[str, Iterable[str]]): Nome de um sistema ou lista de nomes.
+
+        Returns:
+            List[SpedType]: Tipos na ordem em que devem ser baixados.
+
+        Raises:
+            ValueError: Quando algum nome não corresponde a nenhum tipo ou a lista
+                é vazia.
+        """
+        if isinstance(names, str):
+            names = [names]
+        types = {cls.from_name(name) for name in names}
+        if not types:
+            raise ValueError("Nenhum sistema informado")
+        return [sped_type for sped_type in ORDEM_SISTEMAS if sped_type in types]
+
+
+# Ordem da cadeia de `sistema_anterior` em Sped.download_sped_*: cada sistema é
+# selecionado a partir do anterior, então baixar nesta ordem faz cada seleção
+# partir do sistema que já está na combobox.
+ORDEM_SISTEMAS = (
+    SpedType.CONTRIBUICOES,
+    SpedType.CONTABIL,
+    SpedType.ECF,
+    SpedType.FISCAL,
+)
@@ -0,0 +1,48 @@
+import cv2
+import numpy
+import pytest
+
+from src.core import capture, frames, locations
+from src.core.bot import DesktopBot
+
+
+def synthetic_screen(width=640, height=480, seed=0):
+    """
+    Frame parecido com uma tela do aplicativo: fundo texturizado com caixas e
+    rótulos distintos, para que cada recorte apareça em um único lugar.
+    """
+    rng = numpy.random.default_rng(seed)
+    noise = rng.integers(0, 256, (height, width, 3), dtype=numpy.uint8)
+    frame = cv2.GaussianBlur(noise, (0, 0), 3)
+    for i in range(12):
+        x = int(rng.integers(0, width - 120))
+        y = int(rng.integers(0, height - 40))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.rectangle(frame, (x, y), (x + 110, y + 32), color, -1)
+        cv2.putText(
+            frame, f"item {i}", (x + 6, y + 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 1
+        )
+    return frame
+
+
+def gravar(pasta, *telas):
+    """Grava os frames em `pasta` e devolve a captura que os reproduz."""
+    pasta.mkdir()
+    for i, tela in enumerate(telas):
+        cv2.imwrite(str(pasta / f"{i:03d}.png"), tela)
+    return capture.ReplayCapture(str(pasta))
+
+
+@pytest.fixture
+def screen():
+    return synthetic_screen()
+
+
+@pytest.fixture
+def desktop(monkeypatch):
+    """DesktopBot sem posições lembradas nem resultados de buscas anteriores."""
+    monkeypatch.setattr(locations, "priors", locations.LocationPrior(None))
+    frames.gate.clear()
+    frames.matches.clear()
+    yield DesktopBot()
+    frames.matches.clear()
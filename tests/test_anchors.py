@@ -0,0 +1,85 @@
+import cv2
+import pytest
+
+from src.core import frames
+from src.core.bot import DesktopBot
+from src.core.cv2find import Box
+
+from conftest import gravar, synthetic_screen
+
+JANELA = synthetic_screen(200, 120, seed=6)
+BOTAO = JANELA[40:70, 20:80]
+
+
+def _tela(janela=None, botao=None):
+    frame = synthetic_screen(seed=5)
+    if janela is not None:
+        left, top = janela
+        frame[top: top + 120, left: left + 200] = JANELA
+    if botao is not None:
+        left, top = botao
+        frame[top: top + 30, left: left + 60] = BOTAO
+    return frame
+
+
+@pytest.fixture
+def bot(desktop, tmp_path):
+    cv2.imwrite(str(tmp_path / "janela.png"), JANELA)
+    cv2.imwrite(str(tmp_path / "botao.png"), BOTAO)
+    desktop.add_image("janela", str(tmp_path / "janela.png"))
+    desktop.add_image("botao", str(tmp_path / "botao.png"))
+    desktop.add_anchor("login", "janela", labels=["botao"], margin=10)
+    return desktop
+
+
+def test_anchored_label_is_searched_around_the_anchor(bot, tmp_path):
+    bot.capture = gravar(tmp_path / "a", _tela(janela=(40, 30)))
+    assert bot.find("botao", waiting_time=1000) == Box(60, 70, 60, 30)
+    assert bot._anchor_boxes["login"] == Box(40, 30, 200, 120)
+    assert bot._anchor_region("login") == (30, 20, 220, 140)
+
+
+def test_anchor_is_followed_when_it_moves(bot, tmp_path):
+    bot.capture = gravar(tmp_path / "a", _tela(janela=(40, 30)))
+    bot.find("botao", waiting_time=1000)
+
+    frames.matches.clear()
+    bot.capture = gravar(tmp_path / "b", _tela(janela=(300, 200)))
+    assert bot.find("botao", waiting_time=1000) == Box(320, 240, 60, 30)
+    assert bot._anchor_boxes["login"] == Box(300, 200, 200, 120)
+
+
+def test_search_falls_back_to_the_whole_screen_without_the_anchor(bot, tmp_path):
+    bot.capture = gravar(tmp_path / "a", _tela(botao=(500, 400)))
+    assert bot.find("botao", waiting_time=1000) == Box(500, 400, 60, 30)
+    assert "login" not in bot._anchor_boxes
+
+
+def test_cached_hit_is_dropped_by_input(bot, tmp_path):
+    bot.capture = gravar(tmp_path / "a", _tela(janela=(40, 30)))
+    assert bot.find("botao", waiting_time=1000) == Box(60, 70, 60, 30)
+
+    # The screen changed without an input: the cached hit is still served.
+    bot.capture = gravar(tmp_path / "b", _tela(janela=(300, 200)))
+    assert bot.find("botao", waiting_time=1000) == Box(60, 70, 60, 30)
+    DesktopBot()._on_input()
+    assert bot.find("botao", waiting_time=1000) == Box(320, 240, 60, 30)
+
+
+def test_anchor_extent_covers_the_area_around_a_small_anchor(bot, tmp_path):
+    logo = JANELA[5:25, 150:190]
+    cv2.imwrite(str(tmp_path / "logo.png"), logo)
+    bot.add_image("logo", str(tmp_path / "logo.png"))
+    extent = (-150, -5, 200, 120)
+    bot.add_anchor("login", "logo", labels=["botao"], margin=0, extent=extent)
+
+    bot.capture = gravar(tmp_path / "a", _tela(janela=(300, 200)))
+    assert bot.find("botao", waiting_time=1000) == Box(320, 240, 60, 30)
+    assert bot._anchor_boxes["login"] == Box(450, 205, 40, 20)
+    assert bot._anchor_region("login") == (300, 200, 200, 120)
+
+
+def test_wait_any_with_pyramid(bot, tmp_path):
+    bot.capture = gravar(tmp_path / "a", _tela(botao=(500, 400)))
+    label, box = bot.wait_any(["janela", "botao"], timeout=1, pyramid=1)
+    assert (label, box) == ("botao", Box(500, 400, 60, 30))
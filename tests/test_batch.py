@@ -0,0 +1,130 @@
+import io
+import json
+
+import pytest
+
+from src.modules import batch
+from src.modules.exceptions import ValidationError
+from src.modules.types import SpedType
+
+
+def _linha(**campos):
+    payload = {
+        "Cnpj": "44.616.568/0001-07",
+        "Sistema": "SPED Fiscal",
+        "DataInicial": "2024-01-01",
+        "DataFinal": "31/12/2024",
+    }
+    payload.update(campos)
+    return json.dumps(payload)
+
+
+def test_sped_type_from_name_ignores_accents_and_case():
+    assert SpedType.from_name(" SPED Contribuições ") is SpedType.CONTRIBUICOES
+    assert SpedType.from_name("sped contábil") is SpedType.CONTABIL
+    with pytest.raises(ValueError):
+        SpedType.from_name("SPED Inexistente")
+
+
+def test_sped_type_from_names_orders_along_the_system_chain():
+    nomes = ["SPED Fiscal", "SPED ECF", "sped contabil", "SPED Contribuicoes"]
+    nomes.append("sped ecf")
+    assert SpedType.from_names(nomes) == [
+        SpedType.CONTRIBUICOES,
+        SpedType.CONTABIL,
+        SpedType.ECF,
+        SpedType.FISCAL,
+    ]
+    assert SpedType.from_names("SPED ECF") == [SpedType.ECF]
+    with pytest.raises(ValueError):
+        SpedType.from_names([])
+
+
+def test_validar_payload_normalizes_fields():
+    mensagem = {
+        "cnpj": "44.616.568/0001-07",
+        "sistema": "sped ecf",
+        "datainicial": "01-01-2024",
+        "datafinal": "2024/12/31",
+        "id": 7,
+    }
+    jobs = batch.validar_payload(mensagem, linha=3)
+    assert jobs == [
+        batch.Job(
+            linha=3,
+            cnpj="44616568000107",
+            sped_type=SpedType.ECF,
+            data_inicial="01/01/2024",
+            data_final="31/12/2024",
+            id="7",
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "campos",
+    [
+        {"Cnpj": "11.111.111/1111-11"},
+        {"Sistema": ""},
+        {"Sistema": "SPED Inexistente"},
+        {"Sistema": ["SPED Fiscal", "SPED Inexistente"]},
+        {"Sistema": [1]},
+        {"DataInicial": "2024.01.01"},
+        {"DataFinal": "31/02/2024"},
+        {"DataInicial": "31/12/2024", "DataFinal": "01/01/2024"},
+    ],
+)
+def test_validar_payload_rejects_invalid_fields(campos):
+    with pytest.raises(ValidationError):
+        batch.validar_payload(json.loads(_linha(**campos)), linha=1)
+
+
+def test_ler_jobs_reports_invalid_lines_and_skips_blank_ones():
+    linhas = [_linha(), "", "{nao e json", _linha(Cnpj="123"), _linha(Id="x")]
+    jobs, invalidos = batch.ler_jobs(linhas)
+    assert [job.linha for job in jobs] == [1, 5]
+    assert [registro["linha"] for registro in invalidos] == [3, 4]
+    assert all(r["status"] == batch.STATUS_INVALIDO for r in invalidos)
+
+
+def test_ler_jobs_expands_system_lists():
+    jobs, _ = batch.ler_jobs([_linha(Sistema=["SPED Fiscal", "SPED Contabil"])])
+    assert [(job.linha, job.sped_type) for job in jobs] == [
+        (1, SpedType.CONTABIL),
+        (1, SpedType.FISCAL),
+    ]
+
+
+def test_agrupar_por_contribuinte_keeps_arrival_order():
+    outro = "11.222.333/0001-81"
+    linhas = [
+        _linha(Sistema="SPED ECF"),
+        _linha(Cnpj=outro),
+        _linha(Sistema="SPED Contabil"),
+    ]
+    jobs, _ = batch.ler_jobs(linhas)
+    grupos = batch.agrupar_por_contribuinte(jobs)
+    assert list(grupos) == ["44616568000107", "11222333000181"]
+    assert [job.sped_type for job in grupos["44616568000107"]] == [
+        SpedType.ECF,
+        SpedType.CONTABIL,
+    ]
+
+
+def test_result_writer_writes_one_json_line_per_record():
+    saida = io.StringIO()
+    writer = batch.ResultWriter(saida)
+    jobs, _ = batch.ler_jobs([_linha(Id=1), _linha(Id=2)])
+    writer.write(
+        batch.resultado(jobs[0], batch.STATUS_OK, duracao=12.345, economia=3.21)
+    )
+    writer.write(batch.resultado(jobs[1], batch.STATUS_ERRO, RuntimeError("falhou")))
+
+    registros = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert registros[0]["status"] == "ok"
+    assert registros[0]["duracao"] == 12.3
+    assert registros[0]["economia"] == 3.2
+    assert "economia" not in registros[1]
+    assert registros[0]["sistema"] == "SPED Fiscal"
+    assert registros[1]["erro"] == "RuntimeError: falhou"
+    assert writer.contagem == {"ok": 1, "erro": 1}
@@ -0,0 +1,229 @@
+import time
+from pathlib import Path
+
+import cv2
+import numpy
+import pytest
+
+from src.core import bot as bot_module, capture, polling
+
+from conftest import gravar, synthetic_screen
+
+BOTAO = synthetic_screen(200, 120, seed=6)[40:70, 20:80]
+
+
+def _tela(*botoes):
+    frame = synthetic_screen(seed=5)
+    for left, top in botoes:
+        frame[top: top + 30, left: left + 60] = BOTAO
+    return frame
+
+
+@pytest.fixture
+def bot(desktop, tmp_path):
+    cv2.imwrite(str(tmp_path / "botao.png"), BOTAO)
+    desktop.add_image("botao", str(tmp_path / "botao.png"))
+    return desktop
+
+
+class _Gravacao(capture.ReplayCapture):
+    def __init__(self, path):
+        super().__init__(path)
+        self.regioes = []
+
+    def grab(self, region=None):
+        self.regioes.append(region)
+        return super().grab(region)
+
+
+def test_wait_until_vanished_gives_up_on_a_label_that_never_shows(bot, tmp_path):
+    bot.capture = gravar(tmp_path / "a", _tela())
+    inicio = time.monotonic()
+    vanished = bot.wait_until_vanished("botao", timeout=6, appear_timeout=0.3)
+    assert vanished is not None
+    assert 0.3 <= time.monotonic() - inicio < 2
+
+
+def test_wait_until_vanished_waits_for_the_label_to_show_and_go(bot, tmp_path):
+    pasta = tmp_path / "a"
+    gravar(pasta, _tela(), _tela(), _tela((300, 200)), _tela((300, 200)), _tela())
+    bot.capture = _Gravacao(str(pasta))
+
+    assert bot.wait_until_vanished("botao", timeout=5, appear_timeout=5) is not None
+    # The search was narrowed around the label once it showed up.
+    assert (280, 180, 100, 70) in bot.capture.regioes
+    assert len(bot.capture.regioes) == 6
+
+
+def test_wait_until_vanished_times_out_while_the_label_stays(bot, tmp_path):
+    bot.capture = gravar(tmp_path / "a", _tela((300, 200)))
+    assert bot.wait_until_vanished("botao", timeout=0.3) is None
+
+
+def test_wait_until_vanished_clips_the_narrowed_region(bot, tmp_path):
+    pasta = tmp_path / "a"
+    gravar(pasta, _tela((565, 445)), _tela((565, 445)), _tela())
+    bot.capture = _Gravacao(str(pasta))
+
+    vanished = bot.wait_until_vanished("botao", timeout=5, width=630, height=480)
+    assert vanished is not None
+    assert bot.capture.regioes[0] == (0, 0, 630, 480)
+    # The margin would pass the right edge of the region and the bottom of the screen.
+    assert bot.capture.regioes[1] == (545, 425, 85, 55)
+
+
+def _combobox(texto):
+    frame = synthetic_screen(seed=5)
+    cv2.rectangle(frame, (100, 100), (400, 126), (255, 255, 255), -1)
+    cv2.rectangle(frame, (100, 100), (400, 126), (120, 120, 120), 1)
+    cv2.putText(frame, texto, (106, 119), cv2.FONT_HERSHEY_SIMPLEX, 0.5, 0, 1)
+    return frame
+
+
+def test_is_screen_confirms_the_text_of_a_control(bot, tmp_path):
+    fiscal = _combobox("SPED Fiscal")
+    cv2.imwrite(str(tmp_path / "fiscal.png"), fiscal[103:124, 104:200])
+    bot.add_image("fiscal", str(tmp_path / "fiscal.png"))
+    bot.capture = gravar(tmp_path / "a", fiscal, fiscal, _combobox("SPED ECF"))
+    bot.register_screen("sistema:fiscal", 96, 96, 309, 35)
+
+    assert bot.is_screen("sistema:fiscal", "fiscal")
+    # The fingerprint alone takes "SPED ECF" for the registered "SPED Fiscal".
+    assert bot.is_screen("sistema:fiscal")
+    assert not bot.is_screen("sistema:fiscal", "fiscal")
+    assert not bot.is_screen("desconhecida", "fiscal")
+
+
+def _variantes(pasta):
+    pasta.mkdir()
+    ruido = numpy.random.default_rng(1).integers(-40, 40, BOTAO.shape)
+    borrado = numpy.clip(BOTAO + ruido, 0, 255).astype(numpy.uint8)
+    ausente = synthetic_screen(seed=7)[:30, :60]
+    for nome, imagem in (("1.png", borrado), ("2.png", BOTAO), ("3.png", ausente)):
+        cv2.imwrite(str(pasta / nome), imagem)
+    return [str(pasta / nome) for nome in ("1.png", "2.png", "3.png")]
+
+
+def test_find_best_picks_the_highest_score(bot, tmp_path):
+    borrado, exato, ausente = _variantes(tmp_path / "variantes")
+    bot.capture = gravar(tmp_path / "a", _tela((300, 200)))
+
+    match = bot.find_best([borrado, exato, ausente], matching=0.5, waiting_time=1000)
+    assert match.label == exato
+    assert match.box == (300, 200, 60, 30)
+    assert match.score == pytest.approx(1.0, abs=1e-3)
+    assert bot.state.element == match.box
+    # Each label may ask for its own matching index.
+    match = bot.find_best(
+        [borrado, ausente], matching={borrado: 0.5, ausente: 0.99}, waiting_time=1000
+    )
+    assert match.label == borrado
+
+
+def test_find_list_image_searches_every_variant_of_a_directory(bot, tmp_path):
+    _variantes(tmp_path / "variantes")
+    bot.capture = gravar(tmp_path / "a", _tela((300, 200)))
+
+    match = bot.find_list_image(str(tmp_path / "variantes"), matching=0.5)
+    assert match.label == str(tmp_path / "variantes" / "2.png")
+    assert bot.validate_list_exists(str(tmp_path / "variantes"))
+
+    (tmp_path / "vazia").mkdir()
+    assert bot.find_list_image(str(tmp_path / "vazia")) is None
+    bot.capture = gravar(tmp_path / "b", _tela())
+    assert bot.find_list_image(str(tmp_path / "variantes"), waiting_time=300) is None
+
+
+IMAGENS = Path(__file__).resolve().parents[1] / "src" / "images"
+# Request outcome popups, as mapped by ReceitaNetBx.load_images.
+POPUPS = {
+    "msg-erro-data": IMAGENS / "baixa" / "msg-erro-data.png",
+    "msg-falha-comunicacao": IMAGENS / "baixa" / "msg-falha-comunicacao-servidor.png",
+    "msg-nao-existe-procuracao": IMAGENS / "baixa" / "msg-nao-existe-procuracao.png",
+    "msg-procuracao-vencida": IMAGENS / "baixa" / "msg-procuracao-vencida.png",
+    "pop-up-error": IMAGENS / "pop-ups" / "erro.png",
+    "pop-up-nao-encontrado": IMAGENS / "pop-ups" / "nao-encontrado.png",
+    "pop-up-pedido": IMAGENS / "pop-ups" / "pedido.png",
+    "popup-nenhum-arquivo": IMAGENS / "pop-ups" / "nenhum-arquivo.png",
+}
+
+
+@pytest.mark.parametrize("popup", sorted(POPUPS))
+def test_request_popup_is_classified_on_a_replayed_frame(desktop, tmp_path, popup):
+    # The same search as ReceitaNetBx.classificar_popup.
+    for label, path in POPUPS.items():
+        desktop.add_image(label, str(path))
+    imagem = cv2.imread(str(POPUPS[popup]))
+    frame = synthetic_screen(seed=5)
+    frame[240: 240 + imagem.shape[0], 150: 150 + imagem.shape[1]] = imagem
+    desktop.capture = gravar(tmp_path / "a", synthetic_screen(seed=5), frame)
+
+    label, box = desktop.wait_any(list(POPUPS), 5, matching=0.8, pyramid=1)
+    assert label == popup
+    assert box[:2] == (150, 240)
+
+
+def test_wait_until_stable_returns_once_the_screen_stops_changing(desktop, tmp_path):
+    desktop.capture = gravar(
+        tmp_path / "a", _tela(), _tela((300, 200)), _tela((310, 200))
+    )
+    polling.savings.reset()
+
+    elapsed = desktop.wait_until_stable(quiet_ms=100, timeout=5, replaces=2)
+    assert 0.1 <= elapsed < 1
+    assert desktop.capture.index == 2
+    assert polling.savings.reset() == pytest.approx(2 - elapsed, abs=0.05)
+
+
+def test_wait_until_stable_times_out_on_a_changing_frame(desktop, tmp_path):
+    gravar(tmp_path / "a", _tela(), _tela((300, 200)))
+    desktop.capture = capture.ReplayCapture(str(tmp_path / "a"), loop=True)
+    polling.savings.reset()
+
+    inicio = time.monotonic()
+    assert desktop.wait_until_stable(quiet_ms=100, timeout=0.5, replaces=2) is None
+    assert time.monotonic() - inicio < 1
+    assert polling.savings.reset() == pytest.approx(1.5, abs=0.1)
+
+
+def test_weaker_look_alike_at_the_last_location_loses_to_a_better_match(
+    bot, tmp_path
+):
+    ruido = numpy.random.default_rng(1).integers(-30, 30, BOTAO.shape)
+    parecido = numpy.clip(BOTAO + ruido, 0, 255).astype(numpy.uint8)
+    duplicado = _tela()
+    duplicado[100:130, 100:160] = parecido
+    duplicado[300:330, 400:460] = BOTAO
+    sozinho = _tela()
+    sozinho[100:130, 100:160] = parecido
+    bot.capture = gravar(tmp_path / "a", _tela((100, 100)), duplicado, sozinho)
+
+    assert bot.find("botao", matching=0.8, waiting_time=1000) == (100, 100, 60, 30)
+    bot._on_input()
+    assert bot.find("botao", matching=0.8, waiting_time=1000) == (400, 300, 60, 30)
+    bot._on_input()
+    # Only the look-alike is left, so the search of the whole screen finds it.
+    assert bot.find("botao", matching=0.8, waiting_time=1000) == (100, 100, 60, 30)
+
+
+def test_presence_checks_look_at_the_screen(bot, tmp_path):
+    bot.capture = gravar(tmp_path / "a", _tela((500, 400)), _tela((100, 300)), _tela())
+    assert bot.find("botao", waiting_time=1000) == (500, 400, 60, 30)
+
+    # The application moved the button on its own, without an input action.
+    assert bot.find("botao", waiting_time=1000) == (500, 400, 60, 30)
+    assert bot.validate_exists("botao")
+    assert bot.state.element == (100, 300, 60, 30)
+    assert bot.find("botao", waiting_time=1000) == (100, 300, 60, 30)
+    assert bot.find("botao", waiting_time=300, cached=False) is None
+    assert bot.find("botao", waiting_time=300) is None
+
+
+def test_input_without_pyautogui_fails_clearly(desktop, monkeypatch):
+    monkeypatch.setattr(bot_module, "pyautogui", None)
+    monkeypatch.setattr(bot_module, "win32gui", None)
+    with pytest.raises(RuntimeError, match="PyAutoGUI is not available"):
+        desktop.type_keys(["a"])
+    # Raised before the retry loop, which would otherwise swallow it.
+    with pytest.raises(RuntimeError, match="win32gui is not available"):
+        desktop.focus_window_app("ReceitanetBX")
@@ -0,0 +1,42 @@
+import cv2
+import numpy
+import pytest
+
+from src.core import capture
+
+
+@pytest.fixture
+def recording(tmp_path):
+    for i in range(3):
+        frame = numpy.full((40, 60, 3), i * 50, numpy.uint8)
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), frame)
+    (tmp_path / "notas.txt").write_text("ignorado")
+    return tmp_path
+
+
+def test_replay_serves_frames_in_order_and_keeps_the_last(recording):
+    replay = capture.ReplayCapture(str(recording))
+    assert replay.size() == (60, 40)
+    assert [int(replay.grab()[0, 0, 0]) for _ in range(5)] == [0, 50, 100, 100, 100]
+    replay.rewind()
+    assert replay.index == 0
+
+
+def test_replay_loop_and_repeat(recording):
+    replay = capture.ReplayCapture(str(recording), loop=True, repeat=2)
+    values = [int(replay.grab()[0, 0, 0]) for _ in range(8)]
+    assert values == [0, 0, 50, 50, 100, 100, 0, 0]
+
+
+def test_replay_clips_the_region_to_the_frame(recording):
+    replay = capture.create(f"replay:{recording}")
+    assert isinstance(replay, capture.ReplayCapture)
+    assert replay.grab((50, 30, 20, 20)).shape == (10, 10, 3)
+    assert replay.grab((0, 0, 10, 5)).shape == (5, 10, 3)
+
+
+def test_replay_requires_frames(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        capture.ReplayCapture(str(tmp_path))
+    with pytest.raises(ValueError):
+        capture.create("desconhecido")
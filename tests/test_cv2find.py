@@ -0,0 +1,133 @@
+import cv2
+import numpy
+import pytest
+
+from src.core import cv2find
+from src.core.cv2find import Box
+
+
+def _crop(frame, left, top, width, height):
+    return frame[top: top + height, left: left + width].copy()
+
+
+def test_locate_best_with_pyramid_picks_the_best_needle(screen):
+    needles = {
+        "ausente": _crop(screen[::-1, ::-1], 100, 100, 64, 48),
+        "presente": _crop(screen, 233, 147, 64, 48),
+    }
+    match = cv2find.locate_best_opencv(needles, screen, confidence=0.9, pyramid=1)
+    assert match.label == "presente"
+    assert match.box == Box(233, 147, 64, 48)
+
+
+def test_pyramid_search_keeps_the_full_resolution_score(screen):
+    needle = _crop(screen, 233, 147, 64, 48)
+    hits = cv2find._locate_pyramid(needle, screen, 0.9, levels=2, limit=1)
+    assert [(x, y) for x, y, _ in hits] == [(233, 147)]
+    assert hits[0][2] == pytest.approx(1.0, abs=1e-4)
+
+    box = cv2find.locate_opencv(needle, screen, confidence=0.9, pyramid=2)
+    assert box == Box(233, 147, 64, 48)
+
+
+def test_pyramid_search_misses_absent_needles(screen):
+    other = _crop(screen[::-1, ::-1], 100, 100, 64, 48)
+    assert cv2find._locate_pyramid(other, screen, 0.9, levels=2, limit=1) == []
+
+
+def test_suppress_overlaps_keeps_the_best_of_each_group():
+    boxes = [
+        Box(10, 10, 20, 20),
+        Box(15, 12, 20, 20),
+        Box(50, 10, 20, 20),
+        Box(29, 29, 20, 20),
+    ]
+    assert cv2find.suppress_overlaps(boxes) == [boxes[0], boxes[2]]
+    assert cv2find.suppress_overlaps([]) == []
+
+
+def test_rolling_hash_index_finds_exact_occurrences(screen):
+    needle = _crop(screen, 200, 120, 60, 30)
+    index = cv2find.RollingHashIndex(screen)
+
+    assert index.find(needle) == [(200, 120)]
+    assert index.find(needle, region=(150, 100, 200, 100)) == [(200, 120)]
+    # The needle does not fit entirely inside the region.
+    assert index.find(needle, region=(201, 100, 200, 100)) == []
+
+    needle[5, 5] ^= 1
+    assert index.find(needle) == []
+
+
+def test_rolling_hash_index_finds_repeated_needles(screen):
+    needle = _crop(screen, 10, 10, 20, 12)
+    screen[300:312, 400:420] = needle
+    index = cv2find.RollingHashIndex(screen)
+    assert index.find(needle) == [(10, 10), (400, 300)]
+    assert index.find(needle, limit=1) == [(10, 10)]
+
+
+def test_locate_exact_offsets_the_region(screen):
+    needle = _crop(screen, 300, 200, 40, 20)
+    boxes = list(cv2find.locate_exact(needle, screen, region=(250, 150, 200, 200)))
+    assert boxes == [Box(300, 200, 40, 20)]
+
+    gray = cv2find._load_cv2(screen, grayscale=True)
+    boxes = list(cv2find.locate_exact(_crop(gray, 300, 200, 40, 20), gray, True))
+    assert boxes == [Box(300, 200, 40, 20)]
+
+
+def test_shared_index_gives_the_same_hits(screen):
+    needles = {
+        "a": _crop(screen, 100, 50, 50, 25),
+        "b": _crop(screen, 420, 330, 40, 30),
+    }
+    index = cv2find.RollingHashIndex(screen)
+    region = (380, 300, 200, 150)
+    for needle in needles.values():
+        for kwargs in ({}, {"region": region}):
+            assert cv2find.locate_opencv(
+                needle, screen, exact=True, index=index, **kwargs
+            ) == cv2find.locate_opencv(needle, screen, exact=True, **kwargs)
+
+    match = cv2find.locate_best_opencv(
+        needles, screen, region=region, exact=True, index=index
+    )
+    assert match == cv2find.Match("b", Box(420, 330, 40, 30), 1.0)
+
+
+def test_exact_miss_falls_back_to_correlation(screen):
+    needle = cv2.add(_crop(screen, 200, 120, 60, 30), 3)
+    box = cv2find.locate_opencv(needle, screen, confidence=0.9, exact=True)
+    assert box == Box(200, 120, 60, 30)
+
+
+def test_prefilter_keeps_the_true_position(screen):
+    cv2.rectangle(screen, (333, 222), (393, 252), (40, 160, 220), -1)
+    cv2.putText(screen, "OK", (343, 245), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 0, 2)
+    needle = _crop(screen, 333, 222, 60, 30)
+    probes = cv2find.discriminative_pixels(needle)
+    assert probes is not None
+
+    misses = cv2find.prefilter_misses(probes, 0.9)
+    ys, xs = cv2find.prefilter_positions(probes, screen, needle.shape[:2], misses)
+    assert (222, 333) in set(zip(ys.tolist(), xs.tolist()))
+    positions = (screen.shape[0] - 29) * (screen.shape[1] - 59)
+    assert len(ys) < cv2find.PREFILTER_MAX_SURVIVORS * positions
+
+    stats = {}
+    boxes = list(
+        cv2find.locate_all_opencv(
+            needle, screen, confidence=0.9, limit=5, prefilter=probes, stats=stats
+        )
+    )
+    assert boxes == list(
+        cv2find.locate_all_opencv(needle, screen, confidence=0.9, limit=5)
+    )
+    assert stats["positions"] == positions
+    assert stats["pruned"] == positions - len(ys)
+
+
+def test_flat_needles_are_not_prefiltered():
+    flat = numpy.full((20, 20, 3), 90, numpy.uint8)
+    assert cv2find.discriminative_pixels(flat) is None
@@ -0,0 +1,132 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from src.modules import batch
+from src.modules.daemon import JobDaemon
+
+PAYLOAD = {
+    "Cnpj": "44.616.568/0001-07",
+    "Sistema": "SPED Fiscal",
+    "DataInicial": "01/01/2024",
+    "DataFinal": "31/12/2024",
+}
+
+
+class Cliente:
+    def __init__(self, endereco):
+        self.socket = socket.create_connection(endereco, timeout=5)
+        self.arquivo = self.socket.makefile("rwb")
+
+    def enviar(self, mensagem):
+        self.arquivo.write((json.dumps(mensagem) + "\n").encode())
+        self.arquivo.flush()
+        return json.loads(self.arquivo.readline())
+
+    def close(self):
+        self.arquivo.close()
+        self.socket.close()
+
+
+def _aguardar(condicao, timeout=5):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, "tempo esgotado"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def liberar():
+    return threading.Event()
+
+
+@pytest.fixture
+def servidor(liberar):
+    executados = []
+
+    def executar(job):
+        liberar.wait(5)
+        executados.append(job)
+        return batch.resultado(job, batch.STATUS_OK, duracao=0.0)
+
+    daemon = JobDaemon(executar, port=0, capacidade=1)
+    daemon.executados = executados
+    daemon.start()
+    yield daemon
+    liberar.set()
+    daemon.shutdown()
+
+
+def test_submit_and_query_status(servidor, liberar):
+    cliente = Cliente(servidor.endereco)
+    try:
+        resposta = cliente.enviar({"acao": "enviar", "payload": PAYLOAD})
+        assert resposta == {"ok": True, "jobs": [1], "posicao": 0}
+
+        _aguardar(lambda: servidor.status()["executando"] == 1)
+        assert cliente.enviar({"acao": "status", "job": 1})["job"]["status"] == (
+            "executando"
+        )
+
+        liberar.set()
+        _aguardar(lambda: servidor.status(1)["job"]["status"] == "ok")
+        registro = cliente.enviar({"acao": "status", "job": 1})["job"]
+        assert registro["cnpj"] == "44616568000107"
+        assert cliente.enviar({"acao": "status"})["finalizados"] == {"ok": 1}
+    finally:
+        cliente.close()
+
+
+def test_full_queue_rejects_submissions(servidor):
+    assert servidor.enviar(PAYLOAD)["ok"]
+    _aguardar(lambda: servidor.status()["executando"] == 1)
+    assert servidor.enviar(PAYLOAD)["ok"]
+
+    resposta = servidor.enviar(PAYLOAD)
+    assert resposta == {"ok": False, "erro": "fila cheia", "capacidade": 1}
+    assert servidor.status()["fila"] == 1
+
+
+def test_multi_system_payload_is_queued_as_one_job_per_system(servidor):
+    payload = {**PAYLOAD, "Sistema": ["SPED Fiscal", "SPED Contribuicoes"]}
+    # Os dois jobs não cabem juntos na fila de capacidade 1.
+    assert servidor.enviar(payload)["erro"] == "fila cheia"
+
+    servidor.enviar(PAYLOAD)
+    _aguardar(lambda: servidor.status()["executando"] == 1)
+    assert servidor.enviar({**payload, "Sistema": ["SPED ECF"]})["jobs"] == [2]
+
+
+def test_invalid_messages_are_rejected(servidor):
+    cliente = Cliente(servidor.endereco)
+    try:
+        resposta = cliente.enviar({"acao": "enviar", "payload": {"Cnpj": "123"}})
+        assert not resposta["ok"]
+        assert not cliente.enviar({"acao": "desconhecida"})["ok"]
+        assert not cliente.enviar({"acao": "status", "job": 99})["ok"]
+    finally:
+        cliente.close()
+    assert servidor.status()["fila"] == 0
+
+
+def test_idle_callback_runs_once_after_jobs():
+    ociosos = []
+    daemon = JobDaemon(
+        lambda job: batch.resultado(job, batch.STATUS_OK),
+        ocioso=lambda: ociosos.append(time.monotonic()),
+        port=0,
+        tempo_ocioso=0.1,
+    )
+    daemon.start()
+    try:
+        time.sleep(0.7)
+        assert ociosos == []
+        daemon.enviar(PAYLOAD)
+        _aguardar(lambda: ociosos)
+        time.sleep(0.7)
+        assert len(ociosos) == 1
+    finally:
+        daemon.shutdown()
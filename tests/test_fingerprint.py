@@ -0,0 +1,60 @@
+import cv2
+
+from src.core import fingerprint
+
+from conftest import synthetic_screen
+
+
+def test_screen_index_recognizes_registered_screens(screen):
+    index = fingerprint.ScreenIndex()
+    other = synthetic_screen(seed=1)
+    index.register("inicial", screen)
+    index.register("pesquisa", other)
+
+    assert index.classify(screen)[0] == "inicial"
+    assert index.classify(other)[0] == "pesquisa"
+    # Small changes, like a blinking caret, keep the screen recognizable.
+    changed = screen.copy()
+    changed[10:30, 10:12] = 0
+    assert index.matches("inicial", changed)
+    assert not index.matches("pesquisa", screen)
+    assert index.classify(screen, names=["pesquisa"]) == (None, None)
+
+
+def test_screen_index_compares_only_the_region(screen):
+    index = fingerprint.ScreenIndex()
+    region = (100, 100, 120, 40)
+    index.register("caixa", screen, region)
+    assert index.region("caixa") == region
+    assert index.region("desconhecida") is None
+
+    elsewhere = screen.copy()
+    elsewhere[300:, :] = 0
+    assert index.matches("caixa", elsewhere)
+    inside = screen.copy()
+    inside[100:140, 100:220] = 255 - inside[100:140, 100:220]
+    assert not index.matches("caixa", inside)
+    # Regions outside the frame are ignored.
+    index.register("fora", screen, (600, 450, 100, 100))
+    assert "fora" not in index
+
+
+def test_screen_index_keeps_the_latest_variants(screen):
+    index = fingerprint.ScreenIndex(variants=2)
+    frames = [synthetic_screen(seed=seed) for seed in range(3)]
+    for frame in frames:
+        index.register("tela", frame)
+    assert not index.matches("tela", frames[0])
+    assert index.matches("tela", frames[2])
+    index.forget("tela")
+    assert "tela" not in index
+
+
+def test_load_directory_names_screens_after_files(tmp_path, screen):
+    cv2.imwrite(str(tmp_path / "inicial.png"), screen)
+    (tmp_path / "pesquisa").mkdir()
+    cv2.imwrite(str(tmp_path / "pesquisa" / "1.png"), synthetic_screen(seed=1))
+    index = fingerprint.ScreenIndex()
+    assert index.load_directory(str(tmp_path)) == 2
+    assert index.classify(screen)[0] == "inicial"
+    assert index.load_directory(str(tmp_path / "inexistente")) == 2
@@ -0,0 +1,100 @@
+import time
+
+import cv2
+import numpy
+
+from src.core import cv2find, frames
+from src.core.cv2find import Box
+
+
+def test_signature_changes_only_with_the_pixels(screen):
+    copy = screen.copy()
+    assert frames.signature(copy) == frames.signature(screen)
+    copy[400, 600] += 1
+    assert frames.signature(copy) != frames.signature(screen)
+    assert frames.signature(copy, (0, 0, 100, 100)) == frames.signature(
+        screen, (0, 0, 100, 100)
+    )
+
+
+def test_frame_gate_skips_only_the_frame_that_missed():
+    gate = frames.FrameGate(size=2)
+    assert not gate.unchanged("a", 1)
+    gate.miss("a", 1)
+    assert gate.unchanged("a", 1)
+    assert not gate.unchanged("a", 2)
+    assert not gate.unchanged("b", 1)
+
+    gate.miss("b", 1)
+    gate.miss("c", 1)
+    assert not gate.unchanged("a", 1)
+    gate.clear()
+    assert not gate.unchanged("c", 1)
+
+
+def test_match_cache_serves_searches_asking_for_less():
+    cache = frames.MatchCache(max_age=10)
+    box = Box(1, 2, 3, 4)
+    assert cache.get("a", 0.9) is None
+    cache.put("a", 0.9, box)
+    assert cache.get("a", 0.9) == box
+    assert cache.get("a", 0.8) == box
+    assert cache.get("a", 0.95) is None
+    cache.discard("a")
+    assert cache.get("a", 0.8) is None
+    cache.put("a", 0.9, box)
+    cache.clear()
+    assert cache.get("a", 0.8) is None
+
+
+def test_match_cache_expires_and_evicts():
+    cache = frames.MatchCache(max_age=0.05, size=1)
+    cache.put("a", 0.9, Box(1, 2, 3, 4))
+    cache.put("b", 0.9, Box(1, 2, 3, 4))
+    assert cache.get("a", 0.9) is None
+    assert cache.get("b", 0.9) is not None
+    time.sleep(0.1)
+    assert cache.get("b", 0.9) is None
+
+    disabled = frames.MatchCache(max_age=0)
+    disabled.put("a", 0.9, Box(1, 2, 3, 4))
+    assert disabled.get("a", 0.9) is None
+
+
+def test_changed_regions_cover_the_changes(screen):
+    assert frames.changed_regions(screen, screen.copy()) == []
+
+    current = screen.copy()
+    current[100:110, 200:230] = 0
+    current[400:405, 600:640] = 255
+    assert sorted(frames.changed_regions(screen, current, cell=16)) == [
+        (192, 96, 48, 16),
+        (592, 400, 48, 16),
+    ]
+    regions = frames.changed_regions(screen, current, cell=16, max_regions=1)
+    assert regions == [(192, 96, 448, 320)]
+
+
+def test_incremental_matcher_agrees_with_the_full_search(screen):
+    needle = screen[150:180, 300:360].copy()
+    matcher = frames.IncrementalMatcher(needle)
+    assert matcher.best(screen, 0.9)[:2] == (300, 150)
+
+    # Move the needle: only the two changed areas are matched again.
+    current = screen.copy()
+    current[150:180, 300:360] = cv2.GaussianBlur(needle, (0, 0), 5)
+    current[50:80, 100:160] = needle
+    scores = matcher.scores(current)
+    expected = cv2.matchTemplate(current, needle, cv2.TM_CCOEFF_NORMED)
+    assert numpy.allclose(scores, expected, atol=1e-4)
+    assert matcher.best(current, 0.9)[:2] == (100, 50)
+
+
+def test_incremental_matcher_exact_pass(screen):
+    needle = screen[150:180, 300:360].copy()
+    for index in (None, cv2find.RollingHashIndex(screen)):
+        matcher = frames.IncrementalMatcher(needle, exact=True)
+        assert matcher.best(screen, 0.9, index=index) == (300, 150, 1.0)
+
+    matcher = frames.IncrementalMatcher(needle, exact=True)
+    assert matcher.best(screen[200:, :], 0.9) is None
@@ -0,0 +1,54 @@
+from src.core.cv2find import Box
+from src.core.locations import LocationPrior
+
+
+def test_location_prior_pads_and_clips_the_last_hit(tmp_path):
+    priors = LocationPrior(str(tmp_path / "posicoes.json"))
+    assert priors.region("800x600", "botao", (0, 0, 800, 600)) is None
+
+    priors.record("800x600", "botao", Box(5, 100, 50, 20))
+    assert priors.get("800x600", "botao") == Box(5, 100, 50, 20)
+    assert priors.region("800x600", "botao", (0, 0, 800, 600), padding=10) == (
+        0,
+        90,
+        65,
+        40,
+    )
+    # The bounds are too small to hold the element.
+    assert priors.region("800x600", "botao", (0, 105, 800, 495), padding=0) is None
+    assert priors.get("1024x768", "botao") is None
+
+
+def test_location_prior_persists_the_locations(tmp_path):
+    path = str(tmp_path / "posicoes.json")
+    LocationPrior(path).record("800x600", "botao", Box(1, 2, 3, 4))
+    reloaded = LocationPrior(path)
+    assert reloaded.get("800x600", "botao") == Box(1, 2, 3, 4)
+    reloaded.forget("800x600", "botao")
+    assert LocationPrior(path).get("800x600", "botao") is None
+
+
+def test_invalid_location_file_is_ignored(tmp_path):
+    path = tmp_path / "posicoes.json"
+    path.write_text("{nao e json")
+    assert LocationPrior(str(path)).get("800x600", "botao") is None
+
+
+def test_location_prior_keeps_the_best_score_of_the_location(tmp_path):
+    path = str(tmp_path / "posicoes.json")
+    priors = LocationPrior(path)
+    box = Box(5, 100, 50, 20)
+    priors.record("800x600", "botao", box)
+    assert priors.score("800x600", "botao") is None
+    assert priors.trusts("800x600", "botao", 0.5)
+
+    priors.record("800x600", "botao", box, 0.99)
+    priors.record("800x600", "botao", box, 0.95)
+    assert LocationPrior(path).score("800x600", "botao") == 0.99
+    assert priors.trusts("800x600", "botao", 0.98)
+    assert not priors.trusts("800x600", "botao", 0.95)
+
+    # A new location starts over.
+    priors.record("800x600", "botao", Box(6, 100, 50, 20), 0.9)
+    assert priors.score("800x600", "botao") == 0.9
+    assert priors.get("800x600", "botao") == Box(6, 100, 50, 20)
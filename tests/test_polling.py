@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from src.core import polling
+
+
+@pytest.fixture
+def scheduler():
+    return polling.PollScheduler(fast=0.001, slow=0.008, input_window=0.05, budget=1.0)
+
+
+def test_static_screen_backs_off_up_to_the_slow_interval(scheduler):
+    poll = scheduler.loop()
+    delays = [poll.wait(changed=False) for _ in range(4)]
+    assert delays == pytest.approx([0.002, 0.004, 0.008, 0.008])
+    assert poll.wait(changed=True) == pytest.approx(0.001)
+
+
+def test_input_keeps_the_loop_fast(scheduler):
+    poll = scheduler.loop()
+    poll.wait(changed=False)
+    scheduler.notify_input()
+    assert scheduler.after_input()
+    assert poll.wait(changed=False) == pytest.approx(0.001)
+    time.sleep(0.06)
+    assert not scheduler.after_input()
+
+
+def test_wait_never_passes_the_deadline(scheduler):
+    poll = scheduler.loop()
+    assert poll.wait(changed=False, deadline=time.time() - 1) == 0.0
+
+
+def test_cpu_budget_stretches_the_sleep():
+    scheduler = polling.PollScheduler(fast=0.001, slow=0.008, budget=0.5)
+    poll = scheduler.loop()
+    poll.wait()
+    time.sleep(0.02)  # Work done since the loop woke up.
+    assert poll.wait() >= 0.02
+
+
+def test_sleep_savings_reset_per_job():
+    savings = polling.SleepSavings()
+    savings.add(1.5)
+    savings.add(0.5)
+    assert (savings.total, savings.waits) == (2.0, 2)
+    assert savings.reset() == 2.0
+    assert (savings.total, savings.waits) == (0.0, 0)
@@ -0,0 +1,92 @@
+import json
+
+from src.modules import batch, scheduler
+from src.modules.types import SpedType
+
+CNPJ_A = "44616568000107"
+CNPJ_B = "11222333000181"
+
+
+def _job(cnpj, sped_type, linha=1, data_inicial="01/01/2024"):
+    return batch.Job(linha, cnpj, sped_type, data_inicial, "31/12/2024")
+
+
+def test_transicao_classifies_login_profile_switch_and_system_change():
+    fiscal = scheduler.Estado(CNPJ_A, SpedType.FISCAL)
+    ecf = scheduler.Estado(CNPJ_A, SpedType.ECF)
+    outro = scheduler.Estado(CNPJ_B, SpedType.ECF)
+    assert scheduler.transicao(None, fiscal) == ("login", "sped fiscal")
+    assert scheduler.transicao(fiscal, outro) == ("contribuinte", "sped ecf")
+    assert scheduler.transicao(ecf, fiscal) == ("sistema", "sped ecf", "sped fiscal")
+
+
+def test_default_costs_favor_the_next_system_in_the_chain():
+    modelo = scheduler.CustoTransicoes()
+    contabil = scheduler.Estado(CNPJ_A, SpedType.CONTABIL)
+    ecf = scheduler.Estado(CNPJ_A, SpedType.ECF)
+    fiscal = scheduler.Estado(CNPJ_A, SpedType.FISCAL)
+    assert modelo.custo(ecf, ecf) < modelo.custo(contabil, ecf) < modelo.custo(
+        contabil, fiscal
+    )
+
+
+def test_learned_median_replaces_default_after_enough_samples():
+    modelo = scheduler.CustoTransicoes(minimo_amostras=3)
+    chave = ("sistema", "sped ecf", "sped contabil")
+    ecf = scheduler.Estado(CNPJ_A, SpedType.ECF)
+    contabil = scheduler.Estado(CNPJ_A, SpedType.CONTABIL)
+    modelo.aprender([(chave, 5.0), (chave, 7.0)])
+    assert modelo.custo(ecf, contabil) == modelo.OUTRO_SISTEMA
+    modelo.observar(chave, 100.0)
+    assert modelo.custo(ecf, contabil) == 7.0
+
+
+def test_ordenar_groups_contributors_and_follows_the_system_chain():
+    jobs = [
+        _job(CNPJ_A, SpedType.FISCAL, 1),
+        _job(CNPJ_B, SpedType.ECF, 2),
+        _job(CNPJ_A, SpedType.CONTRIBUICOES, 3),
+        _job(CNPJ_A, SpedType.FISCAL, 4, "01/01/2023"),
+        _job(CNPJ_A, SpedType.ECF, 5),
+    ]
+    ordem = scheduler.ordenar(jobs)
+    assert [job.linha for job in ordem] == [3, 5, 1, 4, 2]
+
+    modelo = scheduler.CustoTransicoes()
+    assert scheduler.custo_total(ordem, modelo) < scheduler.custo_total(jobs, modelo)
+
+
+def test_ordenar_uses_learned_costs_and_current_session():
+    jobs = [
+        _job(CNPJ_B, SpedType.ECF, 1),
+        _job(CNPJ_A, SpedType.CONTRIBUICOES, 2),
+        _job(CNPJ_A, SpedType.FISCAL, 3),
+    ]
+    inicial = scheduler.Estado(CNPJ_A, SpedType.ECF)
+    # A sessão já está logada com CNPJ_A, que passa na frente; de ECF o seguinte
+    # na cadeia é Fiscal.
+    assert [job.linha for job in scheduler.ordenar(jobs, inicial=inicial)] == [3, 2, 1]
+
+    modelo = scheduler.CustoTransicoes(minimo_amostras=1)
+    # Voltar de ECF para Contribuições ficou barato nas medições.
+    modelo.observar(("sistema", "sped ecf", "sped contribuicoes"), 1.0)
+    ordem = scheduler.ordenar(jobs, modelo, inicial)
+    assert [job.linha for job in ordem] == [2, 3, 1]
+
+
+def test_timing_log_round_trip_skips_malformed_lines(tmp_path):
+    caminho = tmp_path / "logs" / "tempos.jsonl"
+    log = scheduler.TimingLog(str(caminho))
+    ecf = scheduler.Estado(CNPJ_A, SpedType.ECF)
+    log.registrar(None, ecf, 95.123)
+    log.registrar(ecf, scheduler.Estado(CNPJ_A, SpedType.FISCAL), 30.0)
+    with caminho.open("a", encoding="utf-8") as arquivo:
+        arquivo.write("nao e json\n")
+        arquivo.write(json.dumps({"duracao": 1}) + "\n")
+
+    assert list(log.ler()) == [
+        (("login", "sped ecf"), 95.12),
+        (("sistema", "sped ecf", "sped fiscal"), 30.0),
+    ]
+    assert CNPJ_A not in caminho.read_text(encoding="utf-8")
+    assert list(scheduler.TimingLog(str(tmp_path / "vazio.jsonl")).ler()) == []
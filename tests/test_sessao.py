@@ -0,0 +1,87 @@
+import pytest
+
+from src.modules import batch, scheduler
+from src.modules.exceptions import LoginError
+from src.modules.types import SpedType
+
+# main e receitanet dependem da configuração do aplicativo (src.config.settings).
+main = pytest.importorskip("main")
+
+
+class Aplicativo:
+    """Registra as chamadas que a sessão faz ao ReceitaNetBx."""
+
+    def __init__(self):
+        self.chamadas = []
+        self.troca_ok = True
+        self.login_ok = True
+
+    def login(self, contribuinte):
+        self.chamadas.append(("login", contribuinte))
+        if not self.login_ok:
+            raise LoginError("certificado recusado")
+
+    def trocar_contribuinte(self, contribuinte):
+        self.chamadas.append(("trocar", contribuinte))
+        return self.troca_ok
+
+    def fechar_aplicativo(self):
+        self.chamadas.append(("fechar",))
+
+
+class Download:
+    def __init__(self, sistema, contribuinte, data_inicial, data_final):
+        pass
+
+    def baixar(self):
+        pass
+
+
+def _job(cnpj, linha=1):
+    return batch.Job(linha, cnpj, SpedType.FISCAL, "01/01/2024", "31/12/2024")
+
+
+@pytest.fixture
+def sessao(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "ReceitaNetBx", Aplicativo)
+    monkeypatch.setattr(main, "Bot", Download)
+    monkeypatch.setattr(main.time, "sleep", lambda segundos: None)
+    sessao = main.Sessao()
+    sessao.dir_docs = tmp_path / "docs"
+    sessao.tempos = scheduler.TimingLog(str(tmp_path / "tempos.jsonl"))
+    return sessao
+
+
+def test_switching_contributor_keeps_the_application_open(sessao):
+    for linha, cnpj in enumerate(["111", "111", "222"], start=1):
+        assert sessao.executar(_job(cnpj, linha))["status"] == batch.STATUS_OK
+    assert sessao.receitanet.chamadas == [("login", "111"), ("trocar", "222")]
+    assert sessao.contribuinte == "222"
+
+
+def test_failed_switch_relaunches_the_application(sessao):
+    sessao.executar(_job("111"))
+    sessao.receitanet.troca_ok = False
+    assert sessao.executar(_job("222", 2))["status"] == batch.STATUS_OK
+    assert sessao.receitanet.chamadas == [
+        ("login", "111"),
+        ("trocar", "222"),
+        ("fechar",),
+        ("login", "222"),
+    ]
+    assert sessao.contribuinte == "222"
+
+
+def test_login_error_is_not_retried(sessao):
+    sessao.receitanet.login_ok = False
+    registro = sessao.executar(_job("111"))
+    assert registro["status"] == batch.STATUS_ERRO
+    assert sessao.receitanet.chamadas == [("login", "111")]
+    assert sessao.contribuinte is None
+
+
+def test_switch_is_not_attempted_without_the_profile_button(monkeypatch):
+    receitanet = pytest.importorskip("receitanet")
+    monkeypatch.setattr(receitanet.ReceitaNetBx, "load_images", lambda self: None)
+    bot = receitanet.ReceitaNetBx()
+    assert bot.trocar_contribuinte("222") is False
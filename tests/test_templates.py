@@ -0,0 +1,55 @@
+import os
+
+import cv2
+
+from src.core import templates
+
+from conftest import synthetic_screen
+
+
+def _imagem(width, height, seed):
+    return synthetic_screen(seed=seed)[:height, :width].copy()
+
+
+def test_store_decodes_each_template_once(tmp_path):
+    path = str(tmp_path / "botao.png")
+    image = _imagem(60, 30, 3)
+    cv2.imwrite(path, image)
+    store = templates.TemplateStore()
+
+    template = store.load(path)
+    assert (template.width, template.height) == (60, 30)
+    assert (template.bgr == image).all()
+    assert template.gray.shape == (30, 60)
+    assert store.load(os.path.relpath(path)) is template
+    assert path in store and len(store) == 1
+
+
+def test_store_reloads_a_template_changed_on_disk(tmp_path):
+    path = str(tmp_path / "botao.png")
+    cv2.imwrite(path, _imagem(60, 30, 3))
+    store = templates.TemplateStore()
+    template = store.load(path)
+
+    cv2.imwrite(path, _imagem(40, 20, 4))
+    os.utime(path, (template.mtime + 1, template.mtime + 1))
+    reloaded = store.load(path)
+    assert reloaded is not template
+    assert (reloaded.width, reloaded.height) == (40, 20)
+    assert store.load(path) is reloaded
+
+
+def test_preload_and_discard(tmp_path):
+    paths = []
+    for seed in range(3):
+        paths.append(str(tmp_path / f"{seed}.png"))
+        cv2.imwrite(paths[-1], _imagem(50, 20, seed))
+    store = templates.TemplateStore()
+    assert store.preload(paths) == 3
+
+    template = store.load(paths[0])
+    store.discard(paths[0])
+    assert paths[0] not in store
+    assert store.load(paths[0]) is not template
+    store.clear()
+    assert len(store) == 0
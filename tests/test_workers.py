@@ -0,0 +1,69 @@
+import cv2
+import pytest
+
+from src.core import workers
+from src.core.cv2find import Box
+
+from conftest import gravar, synthetic_screen
+
+
+@pytest.fixture
+def paths(screen, tmp_path):
+    crops = {
+        "a": screen[50:75, 100:150],
+        "b": screen[330:360, 420:460],
+        "ausente": synthetic_screen(seed=7)[:30, :60],
+    }
+    for name, crop in crops.items():
+        cv2.imwrite(str(tmp_path / f"{name}.png"), crop)
+    return [str(tmp_path / f"{name}.png") for name in crops]
+
+
+@pytest.mark.parametrize("exact", [False, True])
+def test_thread_backend_matches_the_serial_one(screen, paths, exact):
+    serial = workers.locate(screen, paths, backend="serial", exact=exact)
+    assert serial == [Box(100, 50, 50, 25), Box(420, 330, 40, 30), None]
+    assert workers.locate(screen, paths, backend="thread", exact=exact) == serial
+
+
+def test_process_pool_matches_the_serial_one(screen, paths):
+    pool = workers.MatchingPool(processes=2)
+    try:
+        serial = workers.locate(screen, paths, backend="serial")
+        assert pool.locate(screen, paths) == serial
+        # The shared memory block is reused by a frame that fits in it.
+        name = pool._shm.name
+        smaller = screen[:400, :500]
+        assert pool.locate(smaller, paths, exact=True) == workers.locate(
+            smaller, paths, backend="serial"
+        )
+        assert pool._shm.name == name
+
+        gray = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+        assert pool.locate(gray, paths, grayscale=True) == workers.locate(
+            gray, paths, grayscale=True, backend="serial"
+        )
+    finally:
+        pool.shutdown()
+    assert pool._shm is None
+
+
+def test_unknown_backend_is_rejected(screen, paths):
+    with pytest.raises(ValueError):
+        workers.locate(screen, paths, backend="gpu")
+
+
+def test_find_multiple_returns_every_label(
+    desktop, screen, paths, tmp_path, monkeypatch
+):
+    for name, path in zip(("a", "b", "ausente"), paths):
+        desktop.add_image(name, path)
+    desktop.capture = gravar(tmp_path / "frames", screen)
+    monkeypatch.setattr(workers.config, "MATCHING_BACKEND", "thread")
+
+    assert desktop.find_multiple(["a", "b"], waiting_time=1000) == {
+        "a": Box(100, 50, 50, 25),
+        "b": Box(420, 330, 40, 30),
+    }
+    result = desktop.find_multiple(["a", "ausente"], waiting_time=300)
+    assert result == {"a": Box(100, 50, 50, 25), "ausente": None}